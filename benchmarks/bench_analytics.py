@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark for cohort progress analytics
+
+Records turns for synthetic cohorts of increasing size and reports ingest
+throughput plus the latency of each vectorized query.
+
+Usage: python benchmarks/bench_analytics.py [--turns-per-session N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from memory.analytics import PHASES, ProgressAnalytics
+
+SIZES = [10_000, 100_000, 1_000_000]
+TOPICS = [f"topic {i}" for i in range(200)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns-per-session", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print(
+        f"{'sessions':>9} {'turns/s':>10} {'summary_ms':>11} {'dist_ms':>8} "
+        f"{'stuck_ms':>9} {'topics_ms':>10} {'pctl_ms':>8}"
+    )
+    for size in SIZES:
+        analytics = ProgressAnalytics()
+        turns = size * args.turns_per_session
+        start = time.perf_counter()
+        clock = 0.0
+        for turn in range(turns):
+            clock += 1.0
+            analytics.record_turn(
+                f"s{turn % size}",
+                rng.choice(PHASES),
+                rng.choice(TOPICS) if turn % 2 else None,
+                timestamp=clock,
+            )
+        ingest = turns / (time.perf_counter() - start)
+
+        print(
+            f"{size:>9} {ingest:>10.0f} "
+            f"{timed(analytics.summary):>11.2f} "
+            f"{timed(analytics.progress_distribution):>8.2f} "
+            f"{timed(lambda: analytics.stuck_learners(2, limit=100)):>9.2f} "
+            f"{timed(analytics.topic_popularity):>10.2f} "
+            f"{timed(lambda: analytics.percentile_of('s0')):>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
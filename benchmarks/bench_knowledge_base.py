@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the offline knowledge base
+
+Builds BM25 indexes over synthetic corpora of increasing size and reports
+build time, load (mmap) time and cold/warm retrieval latency.
+
+Usage: python benchmarks/bench_knowledge_base.py [--queries N]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from knowledge.index import KnowledgeBase, build_index
+
+SIZES = [1_000, 10_000, 50_000]
+TOPICS = [
+    "climate",
+    "carbon",
+    "solar",
+    "wind",
+    "recycling",
+    "plastic",
+    "forest",
+    "ocean",
+    "compost",
+    "biodiversity",
+    "water",
+    "energy",
+]
+
+
+def synthetic_passages(count: int, rng: random.Random):
+    filler = [f"term{i}" for i in range(5_000)]
+    for i in range(count):
+        words = rng.choices(TOPICS, k=8) + rng.choices(filler, k=100)
+        rng.shuffle(words)
+        yield {"title": f"Passage {i}", "text": " ".join(words), "source": "bench"}
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    queries = [" ".join(rng.sample(TOPICS, 2)) for _ in range(args.queries)]
+
+    print(
+        f"{'passages':>9} {'build_s':>8} {'load_ms':>8} "
+        f"{'cold_p50_ms':>12} {'cold_p95_ms':>12} {'warm_p50_us':>12}"
+    )
+    for size in SIZES:
+        with tempfile.TemporaryDirectory() as path:
+            start = time.perf_counter()
+            build_index(synthetic_passages(size, rng), path)
+            build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            kb = KnowledgeBase(path, cache_size=0)
+            load = time.perf_counter() - start
+
+            cold = []
+            for query in queries:
+                start = time.perf_counter()
+                kb.search(query)
+                cold.append(time.perf_counter() - start)
+            kb.close()
+
+            kb = KnowledgeBase(path)
+            for query in queries:
+                kb.search(query)
+            warm = []
+            for query in queries:
+                start = time.perf_counter()
+                kb.search(query)
+                warm.append(time.perf_counter() - start)
+            kb.close()
+
+        print(
+            f"{size:>9} {build:>8.2f} {load * 1e3:>8.2f} "
+            f"{percentile(cold, 0.5) * 1e3:>12.2f} {percentile(cold, 0.95) * 1e3:>12.2f} "
+            f"{statistics.median(warm) * 1e6:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
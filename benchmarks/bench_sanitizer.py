@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the shared input sanitizer
+
+Compares InputSanitizer.clean against the per-agent implementation it
+replaced, over inputs from 10 bytes to 10 MB.
+
+Usage: python benchmarks/bench_sanitizer.py [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils.sanitizer import (
+    CODE_INDICATORS,
+    DEFAULT_TOPIC,
+    TOPIC_KEYWORDS,
+    InputSanitizer,
+)
+
+SIZES = [10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def legacy_clean(user_input: str) -> str:
+    """The repeated-scan implementation previously copied into each agent"""
+    if any(indicator in user_input for indicator in CODE_INDICATORS):
+        for keyword in TOPIC_KEYWORDS:
+            if keyword in user_input.lower():
+                return keyword
+        return DEFAULT_TOPIC
+    return user_input.strip()
+
+
+def make_inputs(size: int):
+    prose = (
+        "the river quality near our local school keeps changing " * (size // 50 + 1)
+    )[:size]
+    code = ("x = load(path)\n" * (size // 15 + 1))[: max(size - 30, 0)]
+    code += "\nimport os  # measure warming"
+    return {"prose": prose, "code_paste": code[-size:] if size < len(code) else code}
+
+
+def time_call(func, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sanitizer = InputSanitizer()
+    print(f"max_chars={sanitizer.max_chars}")
+    print(
+        f"{'size':>10} {'input':>11} {'legacy_us':>12} {'shared_us':>12} {'speedup':>9}"
+    )
+    for size in SIZES:
+        for label, text in make_inputs(size).items():
+            legacy = time_call(legacy_clean, text, args.repeat)
+            shared = time_call(sanitizer.clean, text, args.repeat)
+            print(
+                f"{size:>10} {label:>11} {legacy * 1e6:>12.1f} {shared * 1e6:>12.1f}"
+                f" {legacy / shared if shared else float('inf'):>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
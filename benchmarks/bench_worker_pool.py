@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for the multi-process worker pool
+
+Drives concurrent sessions through WorkerPool with a CPU-bound stub
+orchestrator (sanitizing, parsing and JSON work, no model calls) and
+reports throughput for 1..N workers.
+
+Usage: python benchmarks/bench_worker_pool.py [--max-workers N] [--sessions S] [--turns T]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from serving.worker_pool import WorkerPool
+from tools.response_parser import StreamingQuestionParser
+from utils.sanitizer import InputSanitizer
+
+RESPONSE = "Good start. " * 200 + "What would you like to explore next?\n" + "x" * 2000
+
+
+class CpuBoundOrchestrator:
+    """Stand-in orchestrator whose turns are pure CPU work"""
+
+    def __init__(self):
+        self.sanitizer = InputSanitizer(max_chars=0)
+        self.sessions = {}
+
+    async def process_user_input(self, user_input, session_id):
+        history = self.sessions.setdefault(session_id, [])
+        clean = self.sanitizer.clean(user_input * 200)
+        question = StreamingQuestionParser.parse(RESPONSE)
+        history.append({"input": clean[:100], "question": question})
+        payload = json.dumps({"history": history[-20:], "blob": clean[:20000]})
+        return {"type": "bench", "size": len(payload)}
+
+
+async def drive(pool: WorkerPool, sessions: int, turns: int) -> float:
+    async def learner(index: int):
+        for turn in range(turns):
+            await pool.process_user_input(
+                f"How does recycling plastic help, question {turn}? ", f"s{index}"
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(learner(index) for index in range(sessions)))
+    return time.perf_counter() - start
+
+
+async def run(workers: int, sessions: int, turns: int):
+    async with WorkerPool(workers, orchestrator_factory=CpuBoundOrchestrator) as pool:
+        await drive(pool, workers, 1)  # warm up every worker
+        elapsed = await drive(pool, sessions, turns)
+        metrics = await pool.metrics()
+    return elapsed, metrics["totals"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    counts = sorted(
+        {1, *[2**i for i in range(1, 8) if 2**i < args.max_workers], args.max_workers}
+    )
+    total = args.sessions * args.turns
+    baseline = None
+    print(f"{'workers':>8} {'seconds':>9} {'turns/s':>10} {'speedup':>8} {'busy_s':>8}")
+    for workers in counts:
+        elapsed, totals = asyncio.run(run(workers, args.sessions, args.turns))
+        throughput = total / elapsed
+        baseline = baseline or throughput
+        print(
+            f"{workers:>8} {elapsed:>9.2f} {throughput:>10.1f}"
+            f" {throughput / baseline:>7.2f}x {totals['busy_seconds']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Offline microbenchmark suite for the hot paths, with regression thresholds
+
+Times session memory at 10^3-10^6 sessions, the input sanitizers, assessment
+response parsing, full orchestrator turns per phase (stub model, no API key),
+concurrent turns with and without per-session lock contention, and CLI
+rendering. Results are compared against a JSON baseline; any case
+slower than the baseline by more than the threshold is reported and the
+exit status is 1.
+
+Usage: python benchmarks/run.py [--save] [--baseline PATH] [--threshold PCT]
+                                [--only SUBSTRING] [--max-sessions N]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+os.environ.setdefault("GEMINI_API_KEY", "bench-key")
+
+from main import EcoLearnTutor
+from memory.cold_store import ColdStore
+from memory.session_locks import SessionLocks
+from memory.session_manager import SessionManager
+from tools.assessment_tools import KnowledgeAssessmentTool
+from utils.config import Config
+from utils.config_simple import Config as SimpleConfig
+from utils.sanitizer import ASSESSMENT_CODE_INDICATORS, InputSanitizer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# Percent slowdown against the baseline that counts as a regression
+DEFAULT_THRESHOLD = float(os.getenv("ECOLEARN_BENCH_THRESHOLD", "25"))
+SESSION_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+CONCURRENT_TURNS = 32  # Turns in flight at once in the contention cases
+MIN_CASE_SECONDS = 0.2  # Each timing run is sized to last at least this long
+REPEAT = 5
+
+MODEL_TEXT = (
+    "You sound like a beginner with a real interest in energy. "
+    "Solar panels and wind farms are good places to start. "
+    "Which of these would you like to explore first?"
+)
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Offline model answering every prompt instantly with canned text"""
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return StubResponse(MODEL_TEXT)
+
+    def generate_content(self, prompt, **kwargs):
+        return StubResponse(MODEL_TEXT)
+
+
+class SleepyModel(StubModel):
+    """Stub whose calls take a millisecond, so overlapping turns show up"""
+
+    async def generate_content_async(self, prompt, **kwargs):
+        await asyncio.sleep(0.001)
+        return StubResponse(MODEL_TEXT)
+
+
+def measure(op: Callable[[], None]) -> float:
+    """Best-of-REPEAT seconds per call, with the call count calibrated first"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_CASE_SECONDS / REPEAT or number >= 1 << 20:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(REPEAT - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def measure_async(loop: asyncio.AbstractEventLoop, op) -> float:
+    """measure() for a coroutine function, awaited on one shared loop"""
+    return measure(lambda: loop.run_until_complete(op()))
+
+
+def session_cases(max_sessions: int) -> Dict[str, Callable[[], float]]:
+    cases = {}
+    for count in SESSION_COUNTS:
+        if count > max_sessions:
+            continue
+
+        def run(count=count) -> Dict[str, float]:
+            manager = SessionManager()
+            # One shared body keeps 10^6 sessions affordable; lookups and
+            # updates only touch the dict entry, not the session's contents
+            template = manager._create_new_session("template")
+            manager.sessions = {f"s{i}": template for i in range(count)}
+            ids = [f"s{i}" for i in range(0, count, max(1, count // 1000))]
+            position = [0]
+
+            def next_id() -> str:
+                position[0] = (position[0] + 1) % len(ids)
+                return ids[position[0]]
+
+            return {
+                "get_session": measure(lambda: manager.get_session(next_id())),
+                "update_session": measure(
+                    lambda: manager.update_session(next_id(), {"state": "learning"})
+                ),
+            }
+
+        cases[f"sessions_{count}"] = run
+    return cases
+
+
+def single_cases() -> Dict[str, Callable[[], None]]:
+    content = InputSanitizer()
+    assessment = InputSanitizer(
+        extract_topic=False, indicators=ASSESSMENT_CODE_INDICATORS
+    )
+    prose = "How do solar panels turn sunlight into electricity for a home? " * 4
+    paste = "import os\ndef main():\n    print(self.climate)\n" * 200
+    manager = SessionManager()
+    tool = KnowledgeAssessmentTool.__new__(KnowledgeAssessmentTool)
+    long_response = MODEL_TEXT * 40
+
+    cold = ColdStore("")
+    cold_session = manager._create_new_session("cold")
+    for i in range(20):
+        manager.log_interaction(cold_session, {"type": "user", "content": prose})
+
+    def cold_roundtrip():
+        cold.put("cold", cold_session)
+        cold.take("cold")
+
+    def compact():
+        session = {
+            "learning_interactions": [
+                {"type": "user", "content": f"question {i}"} for i in range(50)
+            ]
+        }
+        manager.compact_context(session)
+
+    tutor = EcoLearnTutor()
+    responses = [
+        {"type": "assessment_question", "question": "What interests you?"},
+        {"type": "learning_start", "learning_path": ["Energy", "Renewable Energy"]},
+        {
+            "type": "learning_content",
+            "content": [
+                {"type": "explanation", "content": MODEL_TEXT},
+                {"type": "examples", "content": MODEL_TEXT},
+                {"type": "visual_suggestion", "content": MODEL_TEXT},
+                {"type": "progress_check", "message": "You've completed 30%"},
+            ],
+        },
+        {"type": "greeting", "message": "Hello!"},
+    ]
+
+    def render():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for response in responses:
+                tutor._display_response(response)
+
+    return {
+        "compact_context_50": compact,
+        "cold_roundtrip": cold_roundtrip,
+        "sanitize_prose": lambda: content.clean(prose),
+        "sanitize_code_paste": lambda: content.clean(paste),
+        "sanitize_assessment": lambda: assessment.clean(prose),
+        "topic_key": lambda: content.topic_key(prose),
+        "looks_like_code": lambda: content.looks_like_code(paste),
+        "parse_assessment_response": lambda: tool._parse_assessment_response(
+            long_response, "specific_interests"
+        ),
+        "display_response": render,
+    }
+
+
+def build_orchestrator(loop: asyncio.AbstractEventLoop):
+    """Simple-variant orchestrator on a stub model, with disk and network off"""
+    from agents.orchestrator_simple import EcoLearnOrchestrator
+
+    Config.EVENT_LOG_DIR = ""
+    Config.SNAPSHOT_PATH = ""
+    Config.FETCH_REFERENCES = False
+    SimpleConfig.validate_config = classmethod(lambda cls: True)
+
+    async def build():
+        orchestrator = EcoLearnOrchestrator()
+        orchestrator.model = StubModel()
+        orchestrator.model_router.model_factory = lambda model_name: StubModel()
+        return orchestrator
+
+    return loop.run_until_complete(build())
+
+
+def turn_cases(loop: asyncio.AbstractEventLoop) -> Dict[str, Callable[[], float]]:
+    orchestrator = build_orchestrator(loop)
+    counter = [0]
+
+    def fresh_session(state: str) -> str:
+        counter[0] += 1
+        session_id = f"bench-{counter[0]}"
+        orchestrator.session_manager.get_session(session_id)["state"] = state
+        return session_id
+
+    def turn(state: str, text: str):
+        async def op():
+            await orchestrator.process_user_input(text, fresh_session(state))
+
+        return lambda: measure_async(loop, op)
+
+    return {
+        "turn_local_intent": turn("assessment", "hello"),
+        "turn_assessment": turn("assessment", "I know a little about solar power"),
+        "turn_learning": turn("learning", "Explain renewable energy"),
+        "turn_progress": turn("progress", "I think I understand it now"),
+    }
+
+
+def contention_cases(
+    loop: asyncio.AbstractEventLoop,
+) -> Dict[str, Callable[[], float]]:
+    """Concurrent turns: distinct sessions overlap, one session's turns queue up"""
+    orchestrator = build_orchestrator(loop)
+    orchestrator.model_router.model_factory = lambda model_name: SleepyModel()
+    locks = SessionLocks()
+    counter = [0]
+
+    def held(sessions: int):
+        # Each turn holds its session's lock across a millisecond of awaiting
+        async def turn(session_id: str):
+            async with locks.hold(session_id):
+                await asyncio.sleep(0.001)
+
+        async def op():
+            await asyncio.gather(
+                *(turn(f"s{i % sessions}") for i in range(CONCURRENT_TURNS))
+            )
+
+        return lambda: measure_async(loop, op)
+
+    async def hold():
+        async with locks.hold("bench"):
+            pass
+
+    async def turns():
+        counter[0] += 1
+        await asyncio.gather(
+            *(
+                orchestrator.process_user_input(
+                    "we covered it in class", f"contend-{counter[0]}-{i}"
+                )
+                for i in range(CONCURRENT_TURNS)
+            )
+        )
+
+    return {
+        "contention_lock_hold": lambda: measure_async(loop, hold),
+        f"contention_{CONCURRENT_TURNS}_sessions": held(CONCURRENT_TURNS),
+        "contention_1_session": held(1),
+        f"contention_turns_{CONCURRENT_TURNS}_sessions": lambda: measure_async(
+            loop, turns
+        ),
+    }
+
+
+def run_suite(only: str, max_sessions: int) -> Dict[str, float]:
+    """Microseconds per operation for every selected case"""
+    results: Dict[str, float] = {}
+    loop = asyncio.new_event_loop()
+    try:
+        for prefix, run in session_cases(max_sessions).items():
+            if only in prefix:
+                for name, seconds in run().items():
+                    results[f"{prefix}.{name}"] = seconds * 1e6
+        for name, op in single_cases().items():
+            if only in name:
+                results[name] = measure(op) * 1e6
+        for name, run in turn_cases(loop).items():
+            if only in name:
+                results[name] = run() * 1e6
+        for name, run in contention_cases(loop).items():
+            if only in name:
+                results[name] = run() * 1e6
+    finally:
+        loop.close()
+    return results
+
+
+def compare(
+    results: Dict[str, float], baseline: Dict[str, float], threshold: float
+) -> List[Tuple[str, float, float, float]]:
+    """(case, baseline_us, current_us, percent change) for each regression"""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        change = (current - before) / before * 100
+        if change > threshold:
+            regressions.append((name, before, current, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="Write a new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--only", default="", help="Run cases containing this")
+    parser.add_argument("--max-sessions", type=int, default=SESSION_COUNTS[-1])
+    args = parser.parse_args()
+
+    results = run_suite(args.only, args.max_sessions)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results_us"]
+
+    print(f"{'case':<36} {'baseline_us':>12} {'current_us':>12} {'change':>8}")
+    for name, current in results.items():
+        before = baseline.get(name)
+        change = f"{(current - before) / before:+.0%}" if before else "new"
+        before_text = f"{before:.2f}" if before else "-"
+        print(f"{name:<36} {before_text:>12} {current:>12.2f} {change:>8}")
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "results_us": {**baseline, **results},
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed more than {args.threshold}%:")
+        for name, before, current, change in regressions:
+            print(f"  {name}: {before:.2f}us -> {current:.2f}us ({change:+.0f}%)")
+        sys.exit(1)
+    if baseline:
+        print(f"\nNo regressions above {args.threshold}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Soak test: hours of simulated tutoring traffic with memory growth checks
+
+Learners arrive every simulated hour and run a scripted conversation through
+the simple orchestrator on a stub model. Time is simulated, so sessions age
+and expire without waiting; housekeeping runs as it would in the CLI. After
+one expiry period the traced heap must stop growing: the run fails when the
+final hours exceed the post-warm-up level by more than the tolerance.
+
+Usage: python benchmarks/soak.py [--hours H] [--learners-per-hour N]
+                                 [--expiry-hours E] [--tolerance FRACTION]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(__file__))
+
+from run import build_orchestrator
+
+import agents.orchestrator_simple
+import memory.analytics
+import memory.session_manager
+
+# One learner's conversation: greeting, assessment, then learning with repeats
+CONVERSATION = [
+    "hello",
+    "I know a little about the environment",
+    "solar panels and electric vehicles",
+    "I want to help my community",
+    "Explain renewable energy",
+    "what is renewable energy?",
+    "more examples",
+    "Explain how recycling works",
+    "what's my progress?",
+    "Tell me about climate change",
+    "How do forests store carbon?",
+    "thanks",
+]
+HOUSEKEEPING_PER_HOUR = 2  # The CLI runs it every 30 real seconds; enough here
+
+
+class SimulatedClock:
+    """Stands in for the time module where wall-clock ages are computed"""
+
+    def __init__(self, start: float):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+@contextlib.contextmanager
+def simulated_time(clock: SimulatedClock):
+    modules = [memory.session_manager, memory.analytics, agents.orchestrator_simple]
+    for module in modules:
+        module.time = clock
+    try:
+        yield clock
+    finally:
+        for module in modules:
+            module.time = time
+
+
+def traced_bytes() -> int:
+    """Heap traced outside this harness, whose own samples would look like growth"""
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ]
+    )
+    return sum(trace.size for trace in snapshot.traces)
+
+
+async def drive(
+    orchestrator, clock: SimulatedClock, hours: int, learners_per_hour: int
+) -> List[Dict[str, float]]:
+    """Run the traffic; traced heap and session count at the end of each hour"""
+    samples = []
+    turns_per_hour = learners_per_hour * len(CONVERSATION)
+    step = 3600.0 / turns_per_hour
+    housekeeping_every = turns_per_hour // HOUSEKEEPING_PER_HOUR
+    learner = 0
+
+    for hour in range(1, hours + 1):
+        turn = 0
+        for _ in range(learners_per_hour):
+            learner += 1
+            session_id = f"learner-{learner:08d}"  # Fixed width, fixed size
+            for text in CONVERSATION:
+                await orchestrator.process_user_input(text, session_id)
+                clock.now += step
+                turn += 1
+                if turn % housekeeping_every == 0:
+                    orchestrator.housekeeping()
+
+        gc.collect()
+        samples.append(
+            {
+                "hour": hour,
+                "sessions": len(orchestrator.session_manager.sessions),
+                "traced_bytes": traced_bytes(),
+            }
+        )
+    return samples
+
+
+def growth_after_warmup(samples: List[Dict[str, float]], warmup_hours: int) -> float:
+    """Fractional growth of the last quarter's peak over the post-warm-up level"""
+    settled = [sample["traced_bytes"] for sample in samples[warmup_hours:]]
+    if len(settled) < 2:
+        raise ValueError("Soak too short to measure growth after warm-up")
+    tail = settled[-max(1, len(settled) // 4) :]
+    return max(tail) / settled[0] - 1
+
+
+def soak(
+    hours: int, learners_per_hour: int, expiry_hours: float
+) -> List[Dict[str, float]]:
+    """Drive simulated traffic with tracemalloc on; samples per simulated hour"""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    loop = asyncio.new_event_loop()
+    try:
+        orchestrator = build_orchestrator(loop)
+        orchestrator.session_manager.session_expiry = expiry_hours * 3600
+        with simulated_time(SimulatedClock(time.time())) as clock:
+            return loop.run_until_complete(
+                drive(orchestrator, clock, hours, learners_per_hour)
+            )
+    finally:
+        loop.close()
+        if started:
+            tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=int, default=48)
+    parser.add_argument("--learners-per-hour", type=int, default=40)
+    parser.add_argument("--expiry-hours", type=float, default=24)
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    samples = soak(args.hours, args.learners_per_hour, args.expiry_hours)
+    print(f"{'hour':>5} {'sessions':>9} {'traced_kib':>11}")
+    for sample in samples:
+        print(
+            f"{sample['hour']:>5} {sample['sessions']:>9} "
+            f"{sample['traced_bytes'] / 1024:>11.0f}"
+        )
+
+    # Sessions stop accumulating once the first ones expire
+    growth = growth_after_warmup(samples, int(args.expiry_hours) + 1)
+    print(
+        f"\n{args.hours}h simulated in {time.perf_counter() - start:.1f}s; "
+        f"growth after warm-up {growth:+.1%} (tolerance {args.tolerance:.0%})"
+    )
+    if growth > args.tolerance:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
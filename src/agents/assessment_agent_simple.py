@@ -1,27 +1,34 @@
-from typing import Any, Dict, List
-
-import google.generativeai as genai
+from typing import Any, Dict, List, Optional
 
+from knowledge.topic_graph import get_topic_graph
 from tools.assessment_tools_simple import KnowledgeAssessmentTool
 from utils.config_simple import Config
+from utils.model_router import ModelRouter
 
 
 class AssessmentAgent:
     """Sequential agent for knowledge assessment - Simple version"""
 
-    def __init__(self):
-        self.assessment_tool = KnowledgeAssessmentTool()
+    def __init__(self, router: Optional[ModelRouter] = None):
+        self.assessment_tool = KnowledgeAssessmentTool(router)
         self.assessment_flow = [
             "general_environmental_knowledge",
             "specific_interests",
             "current_understanding",
         ]
         self.current_step = 0
+        # Each skipped step is one learner turn and one assessment call saved
+        self.early_exits = 0
+        self.steps_skipped = 0
 
     async def assess_knowledge(self, user_input: str, session: Dict) -> Dict[str, Any]:
         """Sequential assessment process"""
 
-        if self.current_step >= len(self.assessment_flow):
+        # Each session tracks its own position in the flow; a local copy keeps
+        # concurrent turns from overwriting each other across the await
+        step = session.get("assessment_step", 0)
+
+        if step >= len(self.assessment_flow):
             learning_path = self._generate_learning_path(session)
             return {
                 "assessment_complete": True,
@@ -29,7 +36,7 @@ class AssessmentAgent:
                 "message": "Assessment complete! Ready to start learning.",
             }
 
-        current_assessment_type = self.assessment_flow[self.current_step]
+        current_assessment_type = self.assessment_flow[step]
 
         try:
             assessment_result = await self.assessment_tool.assess(
@@ -43,20 +50,58 @@ class AssessmentAgent:
                 "is_fallback": True,
             }
 
-        self.current_step += 1
+        self._record_answer(session, user_input, assessment_result)
+        step += 1
+        session["assessment_step"] = step
+        self.current_step = step
+
+        # Stop asking once the level and interests are clear enough
+        remaining = len(self.assessment_flow) - step
+        graph = get_topic_graph()
+        session["assessment_confidence"] = graph.confidence(session)
+        if remaining and graph.settled(session["assessment_confidence"]):
+            session["assessment_step"] = len(self.assessment_flow)
+            self.early_exits += 1
+            self.steps_skipped += remaining
+            return {
+                "assessment_complete": True,
+                "learning_path": self._generate_learning_path(session),
+                "message": "Assessment complete! Ready to start learning.",
+                "skipped_steps": remaining,
+            }
 
         return {
             "type": "assessment_question",
             "question": assessment_result["next_question"],
-            "progress": f"{self.current_step}/{len(self.assessment_flow)}",
-            "assessment_complete": self.current_step >= len(self.assessment_flow),
+            "progress": f"{step}/{len(self.assessment_flow)}",
+            "assessment_complete": step >= len(self.assessment_flow),
         }
 
+    def stats(self) -> Dict[str, int]:
+        return {"early_exits": self.early_exits, "steps_skipped": self.steps_skipped}
+
+    def _record_answer(self, session: Dict, user_input: str, result: Dict[str, Any]):
+        """Keep the learner's answer and the model's full reply in the session"""
+        record = {
+            "answer": user_input,
+            "question": result["next_question"],
+            "raw_response": result.get("raw_response"),
+            "category": result.get("category"),
+        }
+        session.setdefault("assessment_data", {})[result["assessment_type"]] = record
+
+        # A streamed reply is still arriving; fill it in once the stream ends
+        task = result.get("raw_response_task")
+        if task is not None:
+
+            def store(done):
+                if not done.cancelled():
+                    record["raw_response"] = done.result()
+
+            task.add_done_callback(store)
+
     def _generate_learning_path(self, session: Dict) -> List[str]:
-        """Generate personalized learning path"""
-        return [
-            "Introduction to Environmental Science",
-            "Climate Change Fundamentals",
-            "Sustainable Living Practices",
-            "Conservation and Biodiversity",
-        ]
+        """Personalized learning path from the topic graph, cached per profile"""
+        graph = get_topic_graph()
+        session["knowledge_level"] = graph.detect_level(session)
+        return graph.path_for(session)
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.delivery import section_result
+from memory.delivered import SECTION_TYPES, DeliveredContent, TurnPlan
+from utils.config import Config
+
+
+async def run_batch(
+    orchestrator: Any,
+    items: List[Tuple[str, str]],
+    max_concurrency: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Process a cohort's turns, generating each topic's sections once"""
+    # Interactive turns for these learners wait until the batch is done
+    async with orchestrator.session_manager.locks.hold_all(
+        session_id for session_id, _ in items
+    ):
+        return await _run_batch(orchestrator, items, max_concurrency)
+
+
+async def _run_batch(
+    orchestrator: Any,
+    items: List[Tuple[str, str]],
+    max_concurrency: Optional[int] = None,
+) -> Dict[str, Any]:
+    start = time.perf_counter()
+    limit = asyncio.Semaphore(max_concurrency or Config.BATCH_MAX_CONCURRENCY)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    stats = {
+        "students": len(items),
+        "local_turns": 0,
+        "learning_turns": 0,
+        "unique_topics": 0,
+        "sections_generated": 0,
+    }
+
+    # A learner listed twice gets their turns in order, one per round
+    rounds: List[List[int]] = []
+    seen: Dict[str, int] = {}
+    for index, (session_id, _) in enumerate(items):
+        turn = seen.get(session_id, 0)
+        seen[session_id] = turn + 1
+        if turn == len(rounds):
+            rounds.append([])
+        rounds[turn].append(index)
+
+    async def bounded(coroutine):
+        async with limit:
+            return await coroutine
+
+    for round_indexes in rounds:
+        topics: Dict[str, List[int]] = {}
+        singles: List[int] = []
+        sessions: Dict[int, Dict] = {}
+        plans: Dict[int, Tuple[DeliveredContent, TurnPlan]] = {}
+
+        for index in round_indexes:
+            session_id, user_input = items[index]
+            session = orchestrator.session_manager.get_session(session_id)
+            sessions[index] = session
+            intent = orchestrator.intent_router.classify(user_input)
+            if intent is not None:
+                stats["local_turns"] += 1
+                results[index] = await orchestrator._handle_local_intent(
+                    intent, session
+                )
+                continue
+
+            orchestrator._log_user_turn(session, user_input)
+            if session.get("state", "assessment") == "learning":
+                plans[index] = orchestrator._plan_learning_turn(user_input, session)
+                topics.setdefault(plans[index][1].topic, []).append(index)
+            else:
+                singles.append(index)
+
+        async def run_single(index: int):
+            results[index] = await bounded(
+                orchestrator._route_by_phase(items[index][1], sessions[index])
+            )
+
+        async def run_topic(topic: str, indexes: List[int]):
+            # Each learner's history and offers decide what they still need;
+            # every section type needed by anyone is generated once
+            needed_by: Dict[str, List[int]] = {}
+            for index in indexes:
+                for kind in plans[index][1].generate:
+                    needed_by.setdefault(kind, []).append(index)
+            tasks = []
+            for kind, learners in needed_by.items():
+                delivered, plan = plans[learners[0]]
+                generate = orchestrator._generate_section(
+                    kind, topic, plan.prompt_input, sessions[learners[0]], delivered
+                )
+                tasks.append(asyncio.create_task(bounded(generate), name=kind))
+            stats["sections_generated"] += len(tasks)
+
+            # Sections still running at the turn SLO go to each learner's
+            # deferred queue, as in interactive turns
+            if tasks:
+                slo = Config.LEARNING_SLO_SECONDS
+                await asyncio.wait(tasks, timeout=slo if slo > 0 else None)
+            for index in indexes:
+                session_id = items[index][0]
+                delivered, plan = plans[index]
+                content = list(plan.earlier)
+                late = []
+                for task in tasks:
+                    if index not in needed_by[task.get_name()]:
+                        continue
+                    if task.done():
+                        section = section_result(task)
+                        delivered.record(topic, section)
+                        content.append(section)
+                    else:
+                        late.append(task)
+                if late:
+                    orchestrator.deferred_sections.defer(session_id, topic, late)
+                results[index] = await orchestrator._finish_learning_turn(
+                    content, sessions[index]
+                )
+
+        await asyncio.gather(
+            *(run_single(index) for index in singles),
+            *(run_topic(topic, indexes) for topic, indexes in topics.items()),
+        )
+
+        stats["unique_topics"] += len(topics)
+        stats["learning_turns"] += sum(len(indexes) for indexes in topics.values())
+        for index in round_indexes:
+            session_id, user_input = items[index]
+            orchestrator._record_turn(
+                session_id, sessions[index], user_input, results[index]
+            )
+
+    # Against every learning turn generating every section for itself
+    stats["calls_saved"] = (
+        len(SECTION_TYPES) * stats["learning_turns"] - stats["sections_generated"]
+    )
+    stats["wall_seconds"] = round(time.perf_counter() - start, 4)
+    return {
+        "results": [
+            {"session_id": session_id, "response": results[index]}
+            for index, (session_id, _) in enumerate(items)
+        ],
+        "stats": stats,
+    }
@@ -1,24 +1,41 @@
-from typing import Any, Dict
-
-import google.generativeai as genai
+from typing import Any, Dict, Optional, Sequence
 
+from knowledge.index import KnowledgeBase, Passage, get_knowledge_base
+from tools.reference_fetcher import ReferenceFetcher, get_reference_fetcher
 from utils.config import Config
+from utils.model_router import ModelRouter
+from utils.sanitizer import InputSanitizer
 
 
 class ContentAgent:
     """Content generation agent for educational materials"""
 
-    def __init__(self):
-        self.model = genai.GenerativeModel(Config.GEMINI_MODEL)
+    def __init__(
+        self,
+        router: Optional[ModelRouter] = None,
+        knowledge_base: Optional[KnowledgeBase] = None,
+        fetcher: Optional[ReferenceFetcher] = None,
+    ):
+        self.router = router or ModelRouter(default_model=Config.GEMINI_MODEL)
+        self.sanitizer = InputSanitizer()
+        self.knowledge_base = knowledge_base or get_knowledge_base()
+        self.fetcher = fetcher or get_reference_fetcher()
 
     async def generate_explanation(
         self, user_input: str, session: dict
     ) -> Dict[str, Any]:
         """Generate educational explanations"""
         clean_input = self._clean_user_input(user_input)
+        passages = await self._retrieve(clean_input)
 
         try:
-            prompt = f"""Create a clear, educational explanation about this environmental topic: {clean_input}
+            if passages:
+                prompt = f"""Using only these notes, explain {clean_input} in under 3 simple sentences relevant to daily life.
+
+            Notes:
+            {self._format_notes(passages)}"""
+            else:
+                prompt = f"""Create a clear, educational explanation about this environmental topic: {clean_input}
             
             Guidelines:
             - Explain in simple, engaging terms
@@ -26,32 +43,51 @@ class ContentAgent:
             - Keep it under 3 sentences
             - Make it relevant to daily life"""
 
-            response = self.model.generate_content(prompt)
+            response = await self.router.generate("explanation", prompt, session)
             return {"type": "explanation", "content": response.text}
         except Exception as e:
+            if passages:
+                return self._from_passage("explanation", passages[0])
             return {
                 "type": "explanation",
                 "content": f"Let me explain {clean_input} in simple terms. This environmental topic relates to sustainable practices that help protect our planet.",
+                "fallback": True,
             }
 
-    async def generate_examples(self, user_input: str, session: dict) -> Dict[str, Any]:
-        """Generate real-world examples"""
+    async def generate_examples(
+        self, user_input: str, session: dict, previous: Sequence[str] = ()
+    ) -> Dict[str, Any]:
+        """Generate real-world examples, different from any previously shown"""
         clean_input = self._clean_user_input(user_input)
+        passages = await self._retrieve(clean_input)
 
         try:
-            prompt = f"""Provide 2 practical, real-world examples for this environmental concept: {clean_input}
+            if passages:
+                prompt = f"""Using these notes, give 2 short, actionable everyday examples of {clean_input}.
+
+            Notes:
+            {self._format_notes(passages)}"""
+            else:
+                prompt = f"""Provide 2 practical, real-world examples for this environmental concept: {clean_input}
             
             Make the examples:
             - Easy to understand
             - Relevant to everyday life
             - Actionable for individuals"""
 
-            response = self.model.generate_content(prompt)
+            if previous:
+                prompt += "\nDo not repeat these examples:\n" + "\n".join(
+                    f"- {text}" for text in previous
+                )
+            response = await self.router.generate("examples", prompt, session)
             return {"type": "examples", "content": response.text}
         except Exception as e:
+            if passages:
+                return self._from_passage("examples", passages[-1])
             return {
                 "type": "examples",
                 "content": f"Here are practical examples for {clean_input}: 1) Simple daily actions, 2) Community involvement opportunities.",
+                "fallback": True,
             }
 
     async def generate_visual_suggestion(
@@ -68,69 +104,39 @@ class ContentAgent:
             - Why it helps understanding
             - Where to find or create it"""
 
-            response = self.model.generate_content(prompt)
+            response = await self.router.generate("visual_suggestion", prompt, session)
             return {"type": "visual_suggestion", "content": response.text}
         except Exception as e:
             return {
                 "type": "visual_suggestion",
                 "content": f"To visualize {clean_input}, consider looking at environmental impact charts or sustainable practice infographics online.",
+                "fallback": True,
             }
 
+    async def _retrieve(self, topic: str) -> Sequence[Passage]:
+        """Top knowledge base passages for the topic, else a fetched reference"""
+        passages = self.knowledge_base.search(topic) if self.knowledge_base else ()
+        if passages or self.fetcher is None:
+            return passages
+
+        try:
+            summary = await self.fetcher.wikipedia_summary(topic)
+        except Exception as e:
+            print(f"Reference lookup failed: {e}")
+            return ()
+        if summary is None:
+            return ()
+        return (
+            Passage(-1, summary["title"], summary["extract"], summary["source"], 0.0),
+        )
+
+    def _format_notes(self, passages: Sequence[Passage]) -> str:
+        return "\n".join(f"- {passage.title}: {passage.text}" for passage in passages)
+
+    def _from_passage(self, content_type: str, passage: Passage) -> Dict[str, Any]:
+        """Serve a retrieved passage directly when the model is unavailable"""
+        return {"type": content_type, "content": passage.text, "source": passage.title}
+
     def _clean_user_input(self, user_input: str) -> str:
         """Clean user input to remove code and focus on actual content"""
-        # Remove common code indicators and script content
-        code_indicators = [
-            "def ",
-            "class ",
-            "import ",
-            "async ",
-            "await ",
-            "print(",
-            "self.",
-            "if ",
-            "for ",
-            "while ",
-            "try:",
-            "except:",
-            "with ",
-            "open(",
-            "api_key",
-            "GEMINI_API_KEY",
-            "cat >",
-            "EOF",
-            "config.py",
-            "assessment_tools.py",
-            "orchestrator.py",
-            "content_agent.py",
-        ]
-
-        # If input contains code indicators, return a default environmental topic
-        if any(indicator in user_input for indicator in code_indicators):
-            # Try to extract any environmental keywords
-            env_keywords = [
-                "environment",
-                "climate",
-                "sustainable",
-                "green",
-                "energy",
-                "recycle",
-                "planet",
-                "earth",
-                "eco",
-                "conservation",
-                "pollution",
-                "biodiversity",
-                "renewable",
-                "carbon",
-                "emissions",
-                "warming",
-            ]
-
-            for keyword in env_keywords:
-                if keyword in user_input.lower():
-                    return keyword
-
-            # Default fallback to general environmental topic
-            return "environmental sustainability"
-
-        return user_input.strip()
+        return self.sanitizer.clean(user_input)
@@ -1,44 +1,72 @@
-from typing import Any, Dict
-
-import google.generativeai as genai
+from typing import Any, Dict, Optional, Sequence
 
+from knowledge.index import KnowledgeBase, Passage, get_knowledge_base
+from tools.reference_fetcher import ReferenceFetcher, get_reference_fetcher
 from utils.config_simple import Config
+from utils.model_router import ModelRouter
+from utils.sanitizer import InputSanitizer
 
 
 class ContentAgent:
     """Content generation agent - Simple version"""
 
-    def __init__(self):
-        self.model = genai.GenerativeModel(Config.GEMINI_MODEL)
+    def __init__(
+        self,
+        router: Optional[ModelRouter] = None,
+        knowledge_base: Optional[KnowledgeBase] = None,
+        fetcher: Optional[ReferenceFetcher] = None,
+    ):
+        self.router = router or ModelRouter(default_model=Config.GEMINI_MODEL)
+        self.sanitizer = InputSanitizer()
+        self.knowledge_base = knowledge_base or get_knowledge_base()
+        self.fetcher = fetcher or get_reference_fetcher()
 
     async def generate_explanation(
         self, user_input: str, session: dict
     ) -> Dict[str, Any]:
         """Generate educational explanations"""
         clean_input = self._clean_user_input(user_input)
+        passages = await self._retrieve(clean_input)
 
         try:
             prompt = f"Explain this environmental topic in simple terms: {clean_input}"
-            response = self.model.generate_content(prompt)
+            if passages:
+                prompt = f"Using these notes, explain {clean_input} in 3 simple sentences:\n{self._format_notes(passages)}"
+            response = await self.router.generate("explanation", prompt, session)
             return {"type": "explanation", "content": response.text}
         except Exception as e:
+            if passages:
+                return self._from_passage("explanation", passages[0])
             return {
                 "type": "explanation",
                 "content": f"Let me explain {clean_input} in environmental context.",
+                "fallback": True,
             }
 
-    async def generate_examples(self, user_input: str, session: dict) -> Dict[str, Any]:
-        """Generate real-world examples"""
+    async def generate_examples(
+        self, user_input: str, session: dict, previous: Sequence[str] = ()
+    ) -> Dict[str, Any]:
+        """Generate real-world examples, different from any previously shown"""
         clean_input = self._clean_user_input(user_input)
+        passages = await self._retrieve(clean_input)
 
         try:
             prompt = f"Provide 2 practical examples for: {clean_input}"
-            response = self.model.generate_content(prompt)
+            if passages:
+                prompt = f"Using these notes, give 2 practical examples of {clean_input}:\n{self._format_notes(passages)}"
+            if previous:
+                prompt += "\nDo not repeat these examples:\n" + "\n".join(
+                    f"- {text}" for text in previous
+                )
+            response = await self.router.generate("examples", prompt, session)
             return {"type": "examples", "content": response.text}
         except Exception as e:
+            if passages:
+                return self._from_passage("examples", passages[-1])
             return {
                 "type": "examples",
                 "content": f"Practical examples for {clean_input}.",
+                "fallback": True,
             }
 
     async def generate_visual_suggestion(
@@ -49,55 +77,39 @@ class ContentAgent:
 
         try:
             prompt = f"Suggest a visual way to understand: {clean_input}"
-            response = self.model.generate_content(prompt)
+            response = await self.router.generate("visual_suggestion", prompt, session)
             return {"type": "visual_suggestion", "content": response.text}
         except Exception as e:
             return {
                 "type": "visual_suggestion",
                 "content": f"Visual aids can help understand {clean_input}.",
+                "fallback": True,
             }
 
-    def _clean_user_input(self, user_input: str) -> str:
-        """Clean user input to remove code"""
-        code_indicators = [
-            "def ",
-            "class ",
-            "import ",
-            "async ",
-            "await ",
-            "print(",
-            "self.",
-            "if ",
-            "for ",
-            "while ",
-            "try:",
-            "except:",
-            "with ",
-            "open(",
-            "api_key",
-            "GEMINI_API_KEY",
-            "cat >",
-            "EOF",
-        ]
+    async def _retrieve(self, topic: str) -> Sequence[Passage]:
+        """Top knowledge base passages for the topic, else a fetched reference"""
+        passages = self.knowledge_base.search(topic) if self.knowledge_base else ()
+        if passages or self.fetcher is None:
+            return passages
 
-        if any(indicator in user_input for indicator in code_indicators):
-            env_keywords = [
-                "environment",
-                "climate",
-                "sustainable",
-                "green",
-                "energy",
-                "recycle",
-                "planet",
-                "earth",
-                "eco",
-                "conservation",
-            ]
+        try:
+            summary = await self.fetcher.wikipedia_summary(topic)
+        except Exception as e:
+            print(f"Reference lookup failed: {e}")
+            return ()
+        if summary is None:
+            return ()
+        return (
+            Passage(-1, summary["title"], summary["extract"], summary["source"], 0.0),
+        )
 
-            for keyword in env_keywords:
-                if keyword in user_input.lower():
-                    return keyword
+    def _format_notes(self, passages: Sequence[Passage]) -> str:
+        return "\n".join(f"- {passage.title}: {passage.text}" for passage in passages)
 
-            return "environmental sustainability"
+    def _from_passage(self, content_type: str, passage: Passage) -> Dict[str, Any]:
+        """Serve a retrieved passage directly when the model is unavailable"""
+        return {"type": content_type, "content": passage.text, "source": passage.title}
 
-        return user_input.strip()
+    def _clean_user_input(self, user_input: str) -> str:
+        """Clean user input to remove code"""
+        return self.sanitizer.clean(user_input)
@@ -0,0 +1,108 @@
+import asyncio
+from typing import Any, AsyncIterator, Container, Dict, List, Optional, Tuple
+
+from utils.config import Config
+
+
+class DeferredSections:
+    """Content sections that missed their turn's deadline, held per session"""
+
+    def __init__(self):
+        # session_id -> (topic, task) per section still to be served
+        self._pending: Dict[str, List[Tuple[str, asyncio.Task]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def defer(self, session_id: str, topic: str, tasks: List[asyncio.Task]):
+        self._pending.setdefault(session_id, []).extend((topic, task) for task in tasks)
+
+    def pending_types(self, session_id: str, topic: Optional[str] = None) -> List[str]:
+        """Section types still running for the session, optionally for one topic"""
+        return [
+            task.get_name()
+            for pending_topic, task in self._pending.get(session_id, [])
+            if topic is None or pending_topic == topic
+        ]
+
+    def take_ready(self, session_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """(topic, section) for sections that have finished since they were deferred"""
+        pending = self._pending.get(session_id, [])
+        self._keep(session_id, [entry for entry in pending if not entry[1].done()])
+        return [
+            (topic, section_result(task, deferred=True))
+            for topic, task in pending
+            if task.done()
+        ]
+
+    async def wait(self, session_id: str, timeout: Optional[float] = None):
+        """Wait up to timeout for the session's deferred sections to finish"""
+        pending = self._pending.get(session_id, [])
+        if pending:
+            await asyncio.wait([task for _, task in pending], timeout=timeout)
+
+    def retain(self, session_ids: Container[str]) -> int:
+        """Cancel and drop sections of sessions that are gone; returns how many sessions"""
+        stale = [
+            session_id for session_id in self._pending if session_id not in session_ids
+        ]
+        for session_id in stale:
+            for _, task in self._pending.pop(session_id):
+                task.cancel()
+        return len(stale)
+
+    def cancel_all(self):
+        for pending in self._pending.values():
+            for _, task in pending:
+                task.cancel()
+        self._pending.clear()
+
+    def _keep(self, session_id: str, tasks: List[Tuple[str, asyncio.Task]]):
+        if tasks:
+            self._pending[session_id] = tasks
+        else:
+            self._pending.pop(session_id, None)
+
+
+def section_result(task: asyncio.Task, deferred: bool = False) -> Dict[str, Any]:
+    if task.cancelled():
+        section = {"type": "error", "content": "Content generation was cancelled"}
+    elif task.exception() is not None:
+        section = {
+            "type": "error",
+            "content": f"Content generation error: {str(task.exception())}",
+        }
+    else:
+        section = dict(task.result())
+    if deferred:
+        section["deferred"] = True
+    return section
+
+
+async def deliver_sections(
+    tasks: List[asyncio.Task],
+    session_id: str,
+    topic: str,
+    deferred: DeferredSections,
+    slo_seconds: Optional[float] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield sections in completion order; defer those still running at the SLO"""
+    if slo_seconds is None:
+        slo_seconds = Config.LEARNING_SLO_SECONDS
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + slo_seconds if slo_seconds > 0 else None
+
+    order = {task: index for index, task in enumerate(tasks)}
+    pending = set(tasks)
+    while pending:
+        timeout = None if deadline is None else max(0.0, deadline - loop.time())
+        done, pending = await asyncio.wait(
+            pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+        if not done:
+            break
+        for task in sorted(done, key=order.get):
+            yield section_result(task)
+
+    if pending:
+        deferred.defer(session_id, topic, sorted(pending, key=order.get))
@@ -0,0 +1,153 @@
+import re
+from typing import Any, Dict, Optional
+
+from utils.sanitizer import InputSanitizer
+
+
+class IntentRouter:
+    """Local rule-plus-classifier router for turns that need no model call"""
+
+    GREETING = "greeting"
+    PROGRESS = "progress"
+    HELP = "help"
+    GARBAGE = "garbage"
+
+    # Short, unambiguous turns matched by rules
+    RULES = {
+        GREETING: re.compile(
+            r"^(hi+|hello+|hey+|hiya|yo|howdy|greetings|good (morning|afternoon|evening)"
+            r"|thanks?( you)?( so much)?|thank you|thx|ty|cheers)"
+            r"( there| tutor| ecolearn)?[\s!.,:)]*$",
+            re.IGNORECASE,
+        ),
+        # "the progress" only as the whole turn: "the status of ocean pollution"
+        # is a topic question
+        PROGRESS: re.compile(
+            r"^(what'?s|what is|show( me)?|check|how'?s) "
+            r"(my (progress|score|status)\b|the (progress|score|status)[\s?!.]*$)",
+            re.IGNORECASE,
+        ),
+        HELP: re.compile(
+            r"^(help|menu|commands|what can you do|how does this work)[\s?!.]*$",
+            re.IGNORECASE,
+        ),
+    }
+
+    # Bag-of-words weights for the fallback classifier on short inputs. Help is
+    # rule-only: "how can I help?" is a real question in an environmental tutor
+    CLASSIFIER_WEIGHTS = {
+        GREETING: {
+            "hi": 1.0,
+            "hello": 1.0,
+            "hey": 1.0,
+            "thanks": 1.0,
+            "thank": 1.0,
+            "morning": 0.5,
+            "evening": 0.5,
+            "there": 0.2,
+            "you": 0.1,
+        },
+        PROGRESS: {
+            "progress": 1.0,
+            "doing": 0.6,
+            "far": 0.4,
+            "completed": 0.6,
+            "score": 0.8,
+            "how": 0.2,
+            "my": 0.3,
+            "am": 0.2,
+            "level": 0.5,
+        },
+    }
+    CLASSIFIER_THRESHOLD = 1.0
+    CLASSIFIER_MAX_TOKENS = 8
+
+    # Any of these means the learner is asking about an actual topic
+    TOPIC_PATTERN = re.compile(
+        r"environment|climate|sustainab|green|energy|recycl|planet|earth|eco|"
+        r"conservation|pollution|biodiversity|renewable|carbon|emission|warming|"
+        r"water|forest|ocean|waste|solar|wind",
+        re.IGNORECASE,
+    )
+
+    TOKEN_PATTERN = re.compile(r"[a-z']+")
+
+    REPLIES = {
+        GREETING: {
+            "assessment": "Hello! Tell me which environmental topics interest you, "
+            "or what you already know about them, and we'll get started.",
+            "learning": "Hi again! Ask me about any environmental topic, like "
+            "renewable energy or reducing your carbon footprint.",
+        },
+        HELP: {
+            "assessment": "I'm first asking a few questions to understand your interests. "
+            "Just answer in your own words. Type 'quit' to leave.",
+            "learning": "Ask about any environmental topic, for example 'Explain climate change'. "
+            "Ask 'what's my progress?' to see how far you've come. Type 'quit' to leave.",
+        },
+        GARBAGE: {
+            "assessment": "That doesn't look like an answer I can use. "
+            "Which environmental topics are you curious about?",
+            "learning": "That looks like code or text I can't teach from. "
+            "Ask me a question about an environmental topic instead.",
+        },
+    }
+
+    def __init__(self, sanitizer: Optional[InputSanitizer] = None):
+        self.sanitizer = sanitizer or InputSanitizer()
+        self.total_turns = 0
+        self.local_turns: Dict[str, int] = {}
+
+    def classify(self, user_input: str) -> Optional[str]:
+        """Return a locally answerable intent, or None when the model is needed"""
+        self.total_turns += 1
+        intent = self._classify(self.sanitizer.truncate(user_input).strip())
+        if intent is not None:
+            self.local_turns[intent] = self.local_turns.get(intent, 0) + 1
+        return intent
+
+    def reply(self, intent: str, phase: str) -> Dict[str, Any]:
+        """Canned response for a greeting, help or garbage turn"""
+        replies = self.REPLIES[intent]
+        return {
+            "type": intent,
+            "message": replies.get(phase, replies["learning"]),
+            "handled_locally": True,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Share of turns served without calling the API"""
+        local = sum(self.local_turns.values())
+        return {
+            "total_turns": self.total_turns,
+            "local_turns": local,
+            "local_share": local / self.total_turns if self.total_turns else 0.0,
+            "by_intent": dict(self.local_turns),
+        }
+
+    def _classify(self, text: str) -> Optional[str]:
+        if not re.search(r"[A-Za-z]{2,}", text):
+            return self.GARBAGE
+        if self.sanitizer.looks_like_code(text):
+            return self.GARBAGE
+        for intent, pattern in self.RULES.items():
+            if pattern.match(text):
+                return intent
+        if self.TOPIC_PATTERN.search(text):
+            return None
+        return self._score(text)
+
+    def _score(self, text: str) -> Optional[str]:
+        tokens = self.TOKEN_PATTERN.findall(text.lower())
+        if not tokens or len(tokens) > self.CLASSIFIER_MAX_TOKENS:
+            return None
+
+        best_intent, best_score = None, 0.0
+        for intent, weights in self.CLASSIFIER_WEIGHTS.items():
+            score = sum(weights.get(token, 0.0) for token in tokens)
+            if score > best_score:
+                best_intent, best_score = intent, score
+
+        if best_score >= self.CLASSIFIER_THRESHOLD:
+            return best_intent
+        return None
@@ -1,12 +1,28 @@
-from typing import Any, Dict, List
-
-import google.generativeai as genai
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
 
 from agents.assessment_agent_simple import AssessmentAgent
+from agents.batch import run_batch
 from agents.content_agent_simple import ContentAgent
+from agents.delivery import DeferredSections, deliver_sections
+from agents.intent_router import IntentRouter
 from agents.progress_agent import ProgressAgent
-from memory.session_manager import SessionManager
+from knowledge.question_bank import get_question_bank
+from memory.analytics import ProgressAnalytics
+from memory.delivered import (
+    SECTION_TYPES,
+    DeliveredContent,
+    TurnPlan,
+    content_hash,
+)
+from memory.event_log import get_event_log, replay
+from memory.session_manager import SessionManager, interaction_count
+from memory.snapshot import get_snapshotter
 from utils.config_simple import Config
+from utils.gemini import get_genai
+from utils.memory_profiler import get_memory_profiler
+from utils.model_router import ModelRouter
 
 
 class EcoLearnOrchestrator:
@@ -17,41 +33,273 @@ class EcoLearnOrchestrator:
     def __init__(self):
         Config.validate_config()
 
-        # Configure Gemini
-        genai.configure(api_key=Config.GEMINI_API_KEY)
+        # One router so latency tracking is shared by every agent
+        self.model_router = ModelRouter(
+            default_model=Config.GEMINI_MODEL,
+            available_models=Config.DISCOVERED_MODELS,
+        )
 
         # Initialize specialist agents
-        self.assessment_agent = AssessmentAgent()
-        self.content_agent = ContentAgent()
-        self.progress_agent = ProgressAgent()
+        self.assessment_agent = AssessmentAgent(self.model_router)
+        self.content_agent = ContentAgent(self.model_router)
+        self.analytics = ProgressAnalytics()
+        self.progress_agent = ProgressAgent(self.analytics)
         self.session_manager = SessionManager()
+        self.intent_router = IntentRouter()
+        self.deferred_sections = DeferredSections()
+        self.model_calls_saved = 0  # Sections served from a learner's history
+        # Sections offered for on-demand generation, and those learners asked for
+        self.lazy_sections_offered = 0
+        self.lazy_sections_requested = 0
 
-        # Initialize Gemini model
-        self.model = genai.GenerativeModel(Config.GEMINI_MODEL)
+        # Warm restart: attach the last snapshot, then replay the turns after it
+        self.snapshotter = get_snapshotter()
+        restored_at = 0.0
+        if self.snapshotter is not None:
+            restored_at = self.snapshotter.restore(
+                self.session_manager, self.model_router, self.analytics
+            )
+        self.event_log = get_event_log()
+        if self.event_log is not None:
+            replay(
+                self.event_log.directory,
+                self.session_manager,
+                self.analytics,
+                since=restored_at,
+            )
+
+        # Opt-in tracemalloc reports every N turns
+        self.memory_profiler = get_memory_profiler()
+
+        # Gemini model, created on first use so the SDK loads lazily
+        self._model = None
 
         # Agent state
         self.current_state = "assessment"
 
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            self._model = get_genai(Config.GEMINI_API_KEY).GenerativeModel(
+                Config.GEMINI_MODEL
+            )
+        return self._model
+
+    @model.setter
+    def model(self, model: Any):
+        self._model = model
+
     async def process_user_input(
         self, user_input: str, session_id: str
     ) -> Dict[str, Any]:
         """Main method to process user input through the agent system"""
+        response = None
+        stream = self.stream_user_input(user_input, session_id)
+        try:
+            async for response in stream:
+                pass
+        finally:
+            await stream.aclose()
+        return response
+
+    async def stream_user_input(
+        self, user_input: str, session_id: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Progressive mode: yield sections as they finish, then the full response"""
+        # Turns for one session run one at a time; other sessions run in parallel.
+        # The lock is held across yields: consumers that may stop early must
+        # aclose() the stream
+        async with self.session_manager.locks.hold(session_id):
+            start = time.perf_counter()
+
+            # Retrieve or create session
+            session = self.session_manager.get_session(session_id)
+
+            # Sections that missed the previous turn's deadline and are ready now
+            deferred = self._collect_deferred(
+                session, self.deferred_sections.take_ready(session_id)
+            )
+            for section in deferred:
+                yield section
+
+            # Answer greetings, help, progress queries and garbage without a model call
+            intent = self.intent_router.classify(user_input)
+            if intent is not None:
+                response = await self._handle_local_intent(intent, session)
+            elif session.get("state", "assessment") == "learning":
+                self._log_user_turn(session, user_input)
+                sections = []
+                async for section in self._stream_learning_content(
+                    user_input, session, shown=deferred
+                ):
+                    sections.append(section)
+                    yield section
+                response = await self._finish_learning_turn(sections, session)
+            else:
+                self._log_user_turn(session, user_input)
+                response = await self._route_by_phase(user_input, session)
+
+            if deferred:
+                response["deferred_sections"] = deferred
+            self._record_turn(
+                session_id, session, user_input, response, time.perf_counter() - start
+            )
+            yield response
+
+    async def get_deferred_sections(
+        self, session_id: str, timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Serve sections that missed the deadline, waiting up to timeout for them"""
+        # Wait without the lock, so the learner's next turn isn't held up
+        await self.deferred_sections.wait(session_id, timeout)
+        async with self.session_manager.locks.hold(session_id):
+            return self._collect_deferred(
+                self.session_manager.get_session(session_id),
+                self.deferred_sections.take_ready(session_id),
+            )
+
+    def _collect_deferred(
+        self, session: Dict, ready: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Index late sections like on-time ones so they aren't generated again"""
+        delivered = DeliveredContent(session)
+        for topic, section in ready:
+            delivered.record(topic, section)
+        return [section for _, section in ready]
+
+    async def get_section(
+        self, session_id: str, section_type: str
+    ) -> Optional[Dict[str, Any]]:
+        """Generate an offered section on request, or repeat one already shown"""
+        # Claims and records change the session like a turn does
+        async with self.session_manager.locks.hold(session_id):
+            session = self.session_manager.get_session(session_id)
+            delivered = DeliveredContent(session)
+            claim = delivered.claim(section_type)
+            if claim is None:
+                topic = delivered.index["last_topic"]
+                earlier = [
+                    section
+                    for section in (delivered.earlier_sections(topic) if topic else [])
+                    if section["type"] == section_type
+                ]
+                return earlier[0] if earlier else None
+
+            topic, prompt_input = claim
+            self.lazy_sections_requested += 1
+            section = await self._generate_section(
+                section_type, topic, prompt_input, session, delivered
+            )
+            delivered.record(topic, section)
+            return section
+
+    async def process_batch(
+        self, items: List[Tuple[str, str]], max_concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Classroom mode: one call for a cohort's (session_id, user_input) turns"""
+        return await run_batch(self, items, max_concurrency)
+
+    async def close(self):
+        """Release pooled connections held by the agents"""
+        self.deferred_sections.cancel_all()
+        if self.content_agent.fetcher is not None:
+            await self.content_agent.fetcher.close()
+        if self.event_log is not None:
+            self.event_log.close()
+        if self.snapshotter is not None:
+            self.snapshotter.save(
+                self.session_manager, self.model_router, self.analytics
+            )
+        self.session_manager.close()
+
+    def housekeeping(self) -> Dict[str, int]:
+        """Idle-time upkeep: flush the event log, expire and tier sessions, snapshot"""
+        if self.event_log is not None:
+            self.event_log.flush()
+        expired = self.session_manager.expire_sessions()
+        self.analytics.expire(time.time() - self.session_manager.session_expiry)
+        demoted = self.session_manager.demote_idle()
+        # Late sections are only kept for learners whose session is still hot
+        self.deferred_sections.retain(self.session_manager.sessions)
+        if self.model_router.chats is not None:
+            # Model chats live only as long as their learner's hot session
+            self.model_router.chats.retain(self.session_manager.sessions)
+        if self.snapshotter is not None:
+            self.snapshotter.save_if_due(
+                self.session_manager, self.model_router, self.analytics
+            )
+        return {"expired_sessions": expired, "demoted_sessions": demoted}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Operational counters, including the share of turns served locally"""
+        stats = {
+            "intent_router": self.intent_router.stats(),
+            "sessions": len(self.session_manager.sessions),
+            "session_tiers": self.session_manager.stats(),
+            "session_locks": self.session_manager.locks.stats(),
+            "analytics": self.analytics.summary(),
+            "model_calls_saved": self.model_calls_saved,
+            "assessment": self.assessment_agent.stats(),
+            "lazy_sections": {
+                "offered": self.lazy_sections_offered,
+                "requested": self.lazy_sections_requested,
+                "model_calls_avoided": self.lazy_sections_offered
+                - self.lazy_sections_requested,
+            },
+            "model_queue": self.model_router.scheduler.stats(),
+        }
+        question_bank = get_question_bank()
+        if question_bank is not None:
+            stats["question_bank"] = question_bank.stats()
+        if self.memory_profiler is not None:
+            stats["memory"] = self.memory_profiler.last_report
+        return stats
+
+    def _log_user_turn(self, session: Dict, user_input: str):
+        """Add user input to session"""
+        self.session_manager.log_interaction(
+            session, {"type": "user", "content": user_input}
+        )
+
+    async def _route_by_phase(self, user_input: str, session: Dict) -> Dict[str, Any]:
+        """Route to appropriate agent based on current state"""
+        phase = session.get("state", "assessment")
+        if phase == "assessment":
+            return await self._handle_assessment_phase(user_input, session)
+        if phase == "learning":
+            return await self._handle_learning_phase(user_input, session)
+        return await self._handle_progress_phase(user_input, session)
 
-        # Retrieve or create session
-        session = self.session_manager.get_session(session_id)
+    def _record_turn(
+        self,
+        session_id: str,
+        session: Dict,
+        user_input: str,
+        response: Dict,
+        latency: Optional[float] = None,
+    ):
+        # Phase lives in the session so concurrent learners don't share it
+        self.current_state = session.get("state", "assessment")
 
-        # Add user input to session
-        if "learning_interactions" not in session:
-            session["learning_interactions"] = []
-        session["learning_interactions"].append({"type": "user", "content": user_input})
+        topic = None
+        if response.get("type") == "learning_content":
+            topic = self.content_agent.sanitizer.topic_key(user_input)
+        self.analytics.record_turn(session_id, self.current_state, topic)
 
-        # Route to appropriate agent based on current state
-        if self.current_state == "assessment":
-            response = await self._handle_assessment_phase(user_input, session)
-        elif self.current_state == "learning":
-            response = await self._handle_learning_phase(user_input, session)
-        else:
-            response = await self._handle_progress_phase(user_input, session)
+        if self.event_log is not None:
+            self.event_log.append(
+                {
+                    "timestamp": time.time(),
+                    "session_id": session_id,
+                    "input": user_input,
+                    "phase": self.current_state,
+                    "response_type": response.get("type"),
+                    "handled_locally": bool(response.get("handled_locally")),
+                    "topic": topic,
+                    "assessment_step": session.get("assessment_step", 0),
+                    "latency_ms": None if latency is None else latency * 1e3,
+                }
+            )
 
         # Update session memory
         self.session_manager.update_session(
@@ -62,8 +310,17 @@ class EcoLearnOrchestrator:
                 "state": self.current_state,
             },
         )
+        if self.memory_profiler is not None:
+            self.memory_profiler.on_turn(self.session_manager)
 
-        return response
+    async def _handle_local_intent(self, intent: str, session: Dict) -> Dict[str, Any]:
+        """Deterministic reply for a turn the intent router recognised"""
+        if intent == IntentRouter.PROGRESS:
+            progress = await self.progress_agent.check_progress(session)
+            progress["handled_locally"] = True
+            return progress
+
+        return self.intent_router.reply(intent, session.get("state", "assessment"))
 
     async def _handle_assessment_phase(
         self, user_input: str, session: Dict
@@ -86,7 +343,7 @@ class EcoLearnOrchestrator:
             }
 
         if assessment_result.get("assessment_complete", False):
-            self.current_state = "learning"
+            session["state"] = "learning"
             learning_path = assessment_result.get(
                 "learning_path",
                 ["Environmental Basics", "Climate Change", "Sustainable Living"],
@@ -102,45 +359,104 @@ class EcoLearnOrchestrator:
     async def _handle_learning_phase(
         self, user_input: str, session: Dict
     ) -> Dict[str, Any]:
-        """Parallel agent pattern for content delivery"""
+        """Content delivery, bounded by the turn SLO"""
+        content_results = [
+            section
+            async for section in self._stream_learning_content(user_input, session)
+        ]
+        return await self._finish_learning_turn(content_results, session)
 
-        # Run content generation
-        try:
-            content_results = [
-                await self.content_agent.generate_explanation(user_input, session),
-                await self.content_agent.generate_examples(user_input, session),
-                await self.content_agent.generate_visual_suggestion(
-                    user_input, session
+    async def _stream_learning_content(
+        self,
+        user_input: str,
+        session: Dict,
+        shown: Optional[List[Dict[str, Any]]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Sections in completion order; slow ones are deferred to a later turn"""
+        delivered, plan = self._plan_learning_turn(user_input, session)
+        # Skip repeats of late sections this turn already served, and don't
+        # start sections whose deferred copy is still running
+        served = {content_hash(section) for section in shown or []}
+        for section in plan.earlier:
+            if content_hash(section) not in served:
+                yield section
+        session_id = session.get("session_id", "")
+        in_flight = self.deferred_sections.pending_types(session_id, plan.topic)
+        generate = [kind for kind in plan.generate if kind not in in_flight]
+        if not generate:
+            return
+
+        tasks = [
+            asyncio.create_task(
+                self._generate_section(
+                    kind, plan.topic, plan.prompt_input, session, delivered
                 ),
-            ]
-        except Exception as e:
-            # Fallback content if API fails
-            content_results = [
-                {
-                    "type": "explanation",
-                    "content": f"Let me explain {user_input} in environmental context.",
-                },
-                {
-                    "type": "examples",
-                    "content": "There are many practical examples we can explore.",
-                },
-                {
-                    "type": "visual_suggestion",
-                    "content": "Visual aids can help understand this concept.",
-                },
-            ]
+                name=kind,
+            )
+            for kind in generate
+        ]
+        async for section in deliver_sections(
+            tasks, session_id, plan.topic, self.deferred_sections
+        ):
+            delivered.record(plan.topic, section)
+            yield section
+
+    def _plan_learning_turn(
+        self, user_input: str, session: Dict
+    ) -> Tuple[DeliveredContent, TurnPlan]:
+        """Serve what this learner already saw and generate only what is new"""
+        delivered = DeliveredContent(session)
+        plan = delivered.plan(user_input, self.content_agent.sanitizer)
+        delivered.touch(plan.topic)
+        saved = len(SECTION_TYPES) - len(plan.generate) - len(plan.lazy)
+        if saved:
+            delivered.note_saved(saved)
+            self.model_calls_saved += saved
+        self.lazy_sections_offered += delivered.offer(
+            plan.topic, plan.prompt_input, plan.lazy
+        )
+        return delivered, plan
+
+    def _generate_section(
+        self,
+        section_type: str,
+        topic: str,
+        prompt_input: str,
+        session: Dict,
+        delivered: DeliveredContent,
+    ) -> Awaitable[Dict[str, Any]]:
+        if section_type == "explanation":
+            return self.content_agent.generate_explanation(prompt_input, session)
+        if section_type == "examples":
+            return self.content_agent.generate_examples(
+                prompt_input, session, previous=delivered.previous(topic, "examples")
+            )
+        return self.content_agent.generate_visual_suggestion(prompt_input, session)
+
+    async def _finish_learning_turn(
+        self, content_results: List[Dict[str, Any]], session: Dict
+    ) -> Dict[str, Any]:
+        """Wrap generated content for one learner and check their progress"""
+        content_results = list(content_results)
 
         # Check progress
-        if len(session.get("learning_interactions", [])) >= 3:
-            self.current_state = "progress"
+        if interaction_count(session) >= 3:
+            session["state"] = "progress"
             progress_check = await self.progress_agent.check_progress(session)
             content_results.append(progress_check)
 
-        return {
+        response = {
             "type": "learning_content",
             "content": content_results,
-            "session_progress": len(session.get("learning_interactions", [])),
+            "session_progress": interaction_count(session),
         }
+        pending = self.deferred_sections.pending_types(session.get("session_id", ""))
+        if pending:
+            response["pending_sections"] = pending
+        available = DeliveredContent(session).offered()
+        if available:
+            response["available_sections"] = available
+        return response
 
     async def _handle_progress_phase(
         self, user_input: str, session: Dict
@@ -152,7 +468,7 @@ class EcoLearnOrchestrator:
 
         # Loop back to learning if needed
         if progress_result.get("needs_more_learning", False):
-            self.current_state = "learning"
+            session["state"] = "learning"
             updated_result = progress_result.copy()
             updated_result["next_step"] = "continuing_learning"
             return updated_result
@@ -1,23 +1,36 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from memory.analytics import ProgressAnalytics
+from memory.session_manager import interaction_count
 
 class ProgressAgent:
     """Progress tracking agent"""
+
+    def __init__(self, analytics: Optional[ProgressAnalytics] = None):
+        self.analytics = analytics
     
     async def check_progress(self, session: dict) -> Dict[str, Any]:
         """Check learning progress"""
-        interactions = len(session.get('learning_interactions', []))
+        interactions = interaction_count(session)
         progress_percentage = min(100, (interactions / 10) * 100)
         
-        return {
+        result = {
             "type": "progress_check",
             "progress_percentage": progress_percentage,
             "interactions_count": interactions,
             "message": f"You've completed {progress_percentage:.0f}% of this learning session."
         }
+
+        # Where this learner stands in the cohort, when analytics are tracked
+        if self.analytics is not None and "session_id" in session:
+            percentile = self.analytics.percentile_of(session["session_id"])
+            if percentile is not None:
+                result["cohort_percentile"] = round(percentile, 1)
+        return result
     
     async def evaluate_progress(self, user_input: str, session: dict) -> Dict[str, Any]:
         """Evaluate overall progress and determine next steps"""
-        interactions = len(session.get('learning_interactions', []))
+        interactions = interaction_count(session)
         
         # Simple logic: if less than 5 interactions, suggest more learning
         needs_more_learning = interactions < 5
@@ -0,0 +1,195 @@
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import sys
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from utils.config import Config
+
+INDEX_VERSION = 1
+
+# Files making up an index directory
+VOCAB_FILE = "vocab.json"
+POSTINGS_FILE = "postings.bin"  # uint32 (passage_id, term_frequency) pairs
+LENGTHS_FILE = "lengths.bin"  # uint32 token count per passage
+PASSAGES_FILE = "passages.jsonl"  # one {"title", "text", "source"} per line
+OFFSETS_FILE = "offsets.bin"  # uint64 byte offset of each passage line, plus end
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that "
+    "the their this to was were what when where which why will with about into "
+    "can do does more most not than these they those".split()
+)
+
+
+class Passage(NamedTuple):
+    passage_id: int
+    title: str
+    text: str
+    source: str
+    score: float
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms with stopwords dropped and plurals folded"""
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+def build_index(
+    passages: Iterable[Dict[str, str]], path: str, k1: float = 1.5, b: float = 0.75
+) -> Dict[str, float]:
+    """Write a BM25 inverted index for the passages into the directory at path"""
+    os.makedirs(path, exist_ok=True)
+    postings: Dict[str, Dict[int, int]] = {}
+    lengths = array("I")
+    offsets = array("Q", [0])
+
+    with open(os.path.join(path, PASSAGES_FILE), "wb") as f:
+        for passage_id, passage in enumerate(passages):
+            terms = tokenize(passage.get("title", "") + " " + passage["text"])
+            lengths.append(len(terms))
+            for term in terms:
+                counts = postings.setdefault(term, {})
+                counts[passage_id] = counts.get(passage_id, 0) + 1
+
+            line = json.dumps(
+                {
+                    "title": passage.get("title", ""),
+                    "text": passage["text"],
+                    "source": passage.get("source", ""),
+                }
+            )
+            f.write(line.encode("utf-8") + b"\n")
+            offsets.append(f.tell())
+
+    if not lengths:
+        raise ValueError("Cannot build a knowledge base from an empty corpus")
+
+    flat = array("I")
+    terms: Dict[str, List[int]] = {}
+    for term in sorted(postings):
+        counts = postings[term]
+        terms[term] = [len(flat) // 2, len(counts)]
+        for passage_id in sorted(counts):
+            flat.append(passage_id)
+            flat.append(counts[passage_id])
+
+    with open(os.path.join(path, POSTINGS_FILE), "wb") as f:
+        flat.tofile(f)
+    with open(os.path.join(path, LENGTHS_FILE), "wb") as f:
+        lengths.tofile(f)
+    with open(os.path.join(path, OFFSETS_FILE), "wb") as f:
+        offsets.tofile(f)
+
+    stats = {
+        "passages": len(lengths),
+        "terms": len(terms),
+        "avg_length": sum(lengths) / len(lengths),
+    }
+    meta = dict(
+        stats, version=INDEX_VERSION, byteorder=sys.byteorder, k1=k1, b=b, vocab=terms
+    )
+    # Written last so a half-built directory never loads
+    with open(os.path.join(path, VOCAB_FILE), "w") as f:
+        json.dump(meta, f)
+    return stats
+
+
+class KnowledgeBase:
+    """Read-only BM25 index over memory-mapped postings and passages"""
+
+    def __init__(self, path: str, cache_size: int = 256):
+        with open(os.path.join(path, VOCAB_FILE), "r") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION or meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"Knowledge base at {path} needs rebuilding")
+
+        self.path = path
+        self.vocab: Dict[str, List[int]] = meta["vocab"]
+        self.num_passages: int = meta["passages"]
+        self.avg_length: float = meta["avg_length"] or 1.0
+        self.k1: float = meta["k1"]
+        self.b: float = meta["b"]
+
+        # Pages are only read when a query touches them
+        self._maps = [
+            self._map(os.path.join(path, name))
+            for name in (POSTINGS_FILE, LENGTHS_FILE, PASSAGES_FILE, OFFSETS_FILE)
+        ]
+        postings, lengths, self._passages, offsets = self._maps
+        self._postings = memoryview(postings).cast("I")
+        self._lengths = memoryview(lengths).cast("I")
+        self._offsets = memoryview(offsets).cast("Q")
+
+        self.search = lru_cache(maxsize=cache_size)(self._search)
+
+    def _search(self, query: str, top_k: Optional[int] = None) -> Tuple[Passage, ...]:
+        """Best passages for the query by BM25, highest score first"""
+        top_k = top_k or Config.KB_TOP_K
+        scores: Dict[int, float] = {}
+        k1, b = self.k1, self.b
+        for term in set(tokenize(query)):
+            entry = self.vocab.get(term)
+            if entry is None:
+                continue
+            start, count = entry
+            idf = math.log(1 + (self.num_passages - count + 0.5) / (count + 0.5))
+            pairs = self._postings[2 * start : 2 * (start + count)]
+            for i in range(0, 2 * count, 2):
+                passage_id, tf = pairs[i], pairs[i + 1]
+                norm = k1 * (1 - b + b * self._lengths[passage_id] / self.avg_length)
+                weight = idf * tf * (k1 + 1) / (tf + norm)
+                scores[passage_id] = scores.get(passage_id, 0.0) + weight
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return tuple(self.passage(passage_id, score) for passage_id, score in best)
+
+    def passage(self, passage_id: int, score: float = 0.0) -> Passage:
+        start, end = self._offsets[passage_id], self._offsets[passage_id + 1]
+        record = json.loads(self._passages[start:end])
+        return Passage(
+            passage_id, record["title"], record["text"], record["source"], score
+        )
+
+    def close(self):
+        self.search.cache_clear()
+        self._postings.release()
+        self._lengths.release()
+        self._offsets.release()
+        for mapped in self._maps:
+            mapped.close()
+
+    @staticmethod
+    def _map(file_path: str) -> mmap.mmap:
+        with open(file_path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+_shared: Dict[str, Optional[KnowledgeBase]] = {}
+
+
+def get_knowledge_base(path: Optional[str] = None) -> Optional[KnowledgeBase]:
+    """Process-wide knowledge base, or None when no index has been built"""
+    path = path or Config.KNOWLEDGE_BASE_PATH
+    if path not in _shared:
+        try:
+            _shared[path] = KnowledgeBase(path)
+        except FileNotFoundError:
+            _shared[path] = None
+        except ValueError as e:
+            print(f"Knowledge base unavailable: {e}")
+            _shared[path] = None
+    return _shared[path]
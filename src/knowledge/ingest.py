@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Build the offline knowledge base used to ground content generation
+
+Reads a corpus file (JSON lines with "title" and "text", or a directory of
+.txt files) and/or pulls article summaries from Config.WIKIPEDIA_API,
+splits everything into overlapping passages and writes the BM25 index.
+
+Usage:
+    python src/knowledge/ingest.py --corpus data/corpus/environment_seed.jsonl
+    python src/knowledge/ingest.py --wikipedia "Climate change" Recycling
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+from urllib.parse import quote
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge.index import build_index
+from utils.config import Config
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def chunk_document(
+    title: str,
+    text: str,
+    source: str = "",
+    max_words: Optional[int] = None,
+    overlap: int = 20,
+) -> Iterator[Dict[str, str]]:
+    """Split a document into passages of at most max_words, overlapping slightly"""
+    max_words = max_words or Config.KB_PASSAGE_WORDS
+    step = max(1, max_words - overlap)
+
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        words = paragraph.split()
+        for start in range(0, len(words), step):
+            window = words[start : start + max_words]
+            yield {"title": title, "text": " ".join(window), "source": source}
+            if start + max_words >= len(words):
+                break
+
+
+def read_corpus(path: str) -> Iterator[Dict[str, str]]:
+    """Documents from a JSON lines file or a directory of .txt files"""
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".txt"):
+                with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+                    title = os.path.splitext(name)[0].replace("_", " ")
+                    yield {"title": title, "text": f.read(), "source": name}
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                document = json.loads(line)
+                document.setdefault("source", os.path.basename(path))
+                yield document
+
+
+def fetch_wikipedia(titles: Iterable[str], delay: float = 0.2) -> List[Dict[str, str]]:
+    """Article summaries from the Wikipedia REST API (Config.WIKIPEDIA_API)"""
+    import requests
+
+    documents = []
+    with requests.Session() as http:
+        http.headers["User-Agent"] = "EcoLearnTutor/1.0 (knowledge base ingestion)"
+        for title in titles:
+            url = Config.WIKIPEDIA_API + quote(title.replace(" ", "_"))
+            try:
+                response = http.get(url, timeout=10)
+                response.raise_for_status()
+                summary = response.json()
+            except Exception as e:
+                print(f"Skipping {title}: {e}")
+                continue
+
+            if summary.get("extract"):
+                page = summary.get("content_urls", {}).get("desktop", {}).get("page")
+                documents.append(
+                    {
+                        "title": summary.get("title", title),
+                        "text": summary["extract"],
+                        "source": page or url,
+                    }
+                )
+            time.sleep(delay)
+    return documents
+
+
+def ingest(
+    documents: Iterable[Dict[str, str]], path: Optional[str] = None
+) -> Dict[str, float]:
+    """Chunk the documents and build the index at path"""
+    path = path or Config.KNOWLEDGE_BASE_PATH
+    passages = (
+        passage
+        for document in documents
+        for passage in chunk_document(
+            document.get("title", ""), document["text"], document.get("source", "")
+        )
+    )
+    return build_index(passages, path)
+
+
+def main():
+    import argparse
+    import itertools
+
+    parser = argparse.ArgumentParser(description="Build the EcoLearn knowledge base")
+    parser.add_argument("--corpus", action="append", default=[])
+    parser.add_argument("--wikipedia", nargs="+", default=[], metavar="TITLE")
+    parser.add_argument("--output", default=Config.KNOWLEDGE_BASE_PATH)
+    args = parser.parse_args()
+
+    if not args.corpus and not args.wikipedia:
+        parser.error("give at least one --corpus file or --wikipedia title")
+
+    documents = itertools.chain(
+        *(read_corpus(path) for path in args.corpus), fetch_wikipedia(args.wikipedia)
+    )
+    start = time.perf_counter()
+    stats = ingest(documents, args.output)
+    print(
+        f"Indexed {stats['passages']} passages, {stats['terms']} terms "
+        f"into {args.output} in {time.perf_counter() - start:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
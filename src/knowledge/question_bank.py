@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Branching assessment question bank, so most assessment turns skip the model
+
+Each assessment step classifies the learner's answer into a category with
+local keyword patterns; the categories of the answers so far select the next
+question, falling back to shorter suffixes of that path. Answers that match
+no category, or more than one, go to the model.
+
+The bank is built offline: nodes missing from the file are asked of the model
+and written back, so a curated seed can be grown into the full tree.
+
+Usage:
+    python src/knowledge/question_bank.py [--bank data/question_bank.json]
+                                          [--depth N] [--refresh]
+"""
+
+import itertools
+import json
+import os
+import re
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import Config
+
+PATH_SEPARATOR = "/"
+
+BUILD_PROMPT = """
+You are assessing a learner before an environmental education course.
+So far their answers were classified as: {path}.
+Ask exactly one short, friendly follow-up question about their {step}.
+Reply with the question only.
+"""
+
+
+class QuestionBank:
+    """Answer categories and questions per assessment step, keyed by answer path"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or Config.QUESTION_BANK_PATH
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.flow: List[str] = data["flow"]
+        self.categories: Dict[str, Dict[str, List[str]]] = data["categories"]
+        self.questions: Dict[str, Dict[str, str]] = data["questions"]
+        self.patterns: Dict[str, List[Tuple[str, re.Pattern]]] = {
+            step: [
+                (category, re.compile(r"\b(?:" + "|".join(patterns) + r")\b"))
+                for category, patterns in categories.items()
+            ]
+            for step, categories in self.categories.items()
+        }
+        self.hits = 0
+        self.misses = 0
+
+    def classify(self, assessment_type: str, answer: str) -> Optional[str]:
+        """The one category the answer matches, or None if it matches none or several"""
+        text = answer.lower()
+        matched = [
+            category
+            for category, pattern in self.patterns.get(assessment_type, [])
+            if pattern.search(text)
+        ]
+        return matched[0] if len(matched) == 1 else None
+
+    def next_question(
+        self, assessment_type: str, answer: str, session: Dict
+    ) -> Optional[Dict[str, Any]]:
+        """Assessment result from the bank, or None when the model must answer"""
+        category = self.classify(assessment_type, answer)
+        question = None
+        if category is not None:
+            # Most specific node first: the whole answer path, then shorter
+            # suffixes of it, down to this answer's category alone
+            path = self.answer_path(assessment_type, session) + [category]
+            questions = self.questions.get(assessment_type, {})
+            for start in range(len(path)):
+                question = questions.get(PATH_SEPARATOR.join(path[start:]))
+                if question is not None:
+                    break
+        if question is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return {
+            "next_question": question,
+            "assessment_type": assessment_type,
+            "category": category,
+            "from_bank": True,
+        }
+
+    def answer_path(self, assessment_type: str, session: Dict) -> List[str]:
+        """Categories of the learner's earlier answers, in flow order"""
+        data = session.get("assessment_data", {})
+        steps = self.flow[: self.flow.index(assessment_type)]
+        return [data.get(step, {}).get("category") or "?" for step in steps]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def tree_paths(bank: QuestionBank, depth: int) -> Iterator[Tuple[str, List[str]]]:
+    """(step, last depth answer categories) for every node the build fills in"""
+    for level, step in enumerate(bank.flow):
+        choices = [list(bank.categories[name]) for name in bank.flow[: level + 1]]
+        start = max(0, len(choices) - depth)
+        for path in itertools.product(*choices[start:]):
+            yield step, list(path)
+
+
+def build_question_bank(
+    bank: QuestionBank,
+    generate: Callable[[str], str],
+    depth: int = 2,
+    refresh: bool = False,
+) -> int:
+    """Ask the model for every missing node; returns how many were added"""
+    from tools.response_parser import StreamingQuestionParser
+
+    added = 0
+    for step, path in tree_paths(bank, depth):
+        key = PATH_SEPARATOR.join(path)
+        questions = bank.questions.setdefault(step, {})
+        if key in questions and not refresh:
+            continue
+        prompt = BUILD_PROMPT.format(path=", ".join(path), step=step.replace("_", " "))
+        try:
+            question = StreamingQuestionParser.parse(generate(prompt))
+        except Exception as e:
+            print(f"Skipping {step} {key}: {e}")
+            continue
+        if question:
+            questions[key] = question
+            added += 1
+    return added
+
+
+def save_question_bank(bank: QuestionBank, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": 1,
+                "flow": bank.flow,
+                "categories": bank.categories,
+                "questions": bank.questions,
+            },
+            f,
+            indent=2,
+        )
+        f.write("\n")
+
+
+_shared: Dict[str, Optional[QuestionBank]] = {}
+
+
+def get_question_bank(path: Optional[str] = None) -> Optional[QuestionBank]:
+    """Process-wide question bank, or None when disabled or not built"""
+    path = Config.QUESTION_BANK_PATH if path is None else path
+    if not path:
+        return None
+    if path not in _shared:
+        try:
+            _shared[path] = QuestionBank(path)
+        except FileNotFoundError:
+            _shared[path] = None
+        except (KeyError, ValueError, re.error) as e:
+            print(f"Question bank unavailable: {e}")
+            _shared[path] = None
+    return _shared[path]
+
+
+def main():
+    import argparse
+
+    from utils.gemini import get_genai
+
+    parser = argparse.ArgumentParser(description="Grow the assessment question bank")
+    parser.add_argument("--bank", default=Config.QUESTION_BANK_PATH)
+    parser.add_argument("--output", help="Defaults to overwriting --bank")
+    parser.add_argument("--depth", type=int, default=2, help="Answers keyed per node")
+    parser.add_argument("--refresh", action="store_true", help="Regenerate all nodes")
+    args = parser.parse_args()
+
+    if not Config.GEMINI_API_KEY:
+        parser.error("GEMINI_API_KEY is needed to generate questions")
+    model = get_genai(Config.GEMINI_API_KEY).GenerativeModel(Config.GEMINI_MODEL)
+
+    bank = QuestionBank(args.bank)
+    added = build_question_bank(
+        bank,
+        lambda prompt: model.generate_content(prompt).text,
+        args.depth,
+        args.refresh,
+    )
+    save_question_bank(bank, args.output or args.bank)
+    print(f"Added {added} questions to {args.output or args.bank}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import json
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from utils.config import Config
+
+# Per level: (difficulty assumed known unless asked for, hardest difficulty
+# used to pad a short path)
+LEVELS: Dict[str, Tuple[int, int]] = {
+    "beginner": (0, 2),
+    "intermediate": (1, 3),
+    "advanced": (2, 3),
+}
+DEFAULT_LEVEL = "beginner"
+LEVEL_PATTERN = re.compile(r"\b(beginner|intermediate|advanced)\b", re.IGNORECASE)
+# "Confidence: 0.8" after the level, when the model was asked to rate itself
+CONFIDENCE_PATTERN = re.compile(r"confidence\W{0,3}(0?\.\d+|[01](?:\.0+)?)\b", re.I)
+# Self-descriptions in the learner's own answers, when the model named no level
+ANSWER_LEVEL_HINTS = [
+    ("advanced", re.compile(r"\b(expert|a lot|professional|degree|researcher)\b")),
+    ("beginner", re.compile(r"\b(nothing|not much|new to|no idea|a little)\b")),
+    ("intermediate", re.compile(r"\b(some|a bit|basics|familiar|decent)\b")),
+]
+
+Profile = Tuple[str, FrozenSet[int]]
+
+
+class TopicGraph:
+    """Prerequisite DAG of topics, compiled to adjacency bitsets for path queries"""
+
+    def __init__(self, path: Optional[str] = None, cache_size: int = 4096):
+        path = path or Config.TOPIC_GRAPH_PATH
+        with open(path, "r", encoding="utf-8") as f:
+            topics = json.load(f)["topics"]
+
+        self.ids: List[str] = [topic["id"] for topic in topics]
+        self.titles: List[str] = [topic["title"] for topic in topics]
+        self.index: Dict[str, int] = {
+            topic_id: i for i, topic_id in enumerate(self.ids)
+        }
+        self.difficulty: List[int] = [topic["difficulty"] for topic in topics]
+
+        # Bit j of prerequisites[i] is set when topic j is a direct prerequisite
+        self.prerequisites: List[int] = [0] * len(topics)
+        for i, topic in enumerate(topics):
+            for prerequisite in topic["prerequisites"]:
+                if prerequisite not in self.index:
+                    raise ValueError(
+                        f"{topic['id']} needs unknown topic {prerequisite}"
+                    )
+                self.prerequisites[i] |= 1 << self.index[prerequisite]
+        self.order = self._topological_order()
+        self.ancestors: List[int] = [0] * len(topics)
+        for i in self.order:
+            mask = self.prerequisites[i]
+            for j in self._bits(mask):
+                mask |= self.ancestors[j]
+            self.ancestors[i] = mask
+
+        self.keyword_topics: Dict[str, List[int]] = {}
+        for i, topic in enumerate(topics):
+            for keyword in topic["keywords"]:
+                self.keyword_topics.setdefault(keyword.lower(), []).append(i)
+        # Longest keywords first so "climate change" wins over "climate"
+        keywords = sorted(self.keyword_topics, key=len, reverse=True)
+        self.keyword_pattern = re.compile(
+            r"\b(" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b"
+        )
+
+        # Learners with the same level and interests share one computed path
+        self.path_for_profile = lru_cache(maxsize=cache_size)(self._path)
+
+    def path_for(self, session: Dict, length: Optional[int] = None) -> List[str]:
+        """Topic titles in study order for the learner's assessed profile"""
+        return list(self.path_for_profile(self.profile(session), length))
+
+    def profile(self, session: Dict) -> Profile:
+        """(level, interest topic indexes) signature from the assessment answers"""
+        data = session.get("assessment_data", {})
+        answers = " ".join(record.get("answer", "") for record in data.values())
+        interests = frozenset(
+            i
+            for keyword in self.keyword_pattern.findall(answers.lower())
+            for i in self.keyword_topics[keyword]
+        )
+        return self.detect_level(session), interests
+
+    def detect_level(self, session: Dict) -> str:
+        data = session.get("assessment_data", {})
+        general = data.get("general_environmental_knowledge", {})
+        if general.get("category") in LEVELS:
+            return general["category"]
+        match = LEVEL_PATTERN.search(general.get("raw_response") or "")
+        if match:
+            return match.group(1).lower()
+
+        answer = general.get("answer", "").lower()
+        for level, pattern in ANSWER_LEVEL_HINTS:
+            if pattern.search(answer):
+                return level
+        level = session.get("knowledge_level", DEFAULT_LEVEL)
+        return level if level in LEVELS else DEFAULT_LEVEL
+
+    def confidence(self, session: Dict) -> Dict[str, float]:
+        """0-1 certainty of the detected level and interests, by evidence source"""
+        data = session.get("assessment_data", {})
+        general = data.get("general_environmental_knowledge", {})
+        raw_response = general.get("raw_response") or ""
+        stated = CONFIDENCE_PATTERN.search(raw_response)
+        answer = general.get("answer", "").lower()
+        if general.get("category") in LEVELS:
+            level = 1.0  # Classified unambiguously by the question bank
+        elif LEVEL_PATTERN.search(raw_response):
+            level = min(1.0, float(stated.group(1))) if stated else 0.8
+        elif any(pattern.search(answer) for _, pattern in ANSWER_LEVEL_HINTS):
+            level = 0.6
+        else:
+            level = 0.0
+
+        asked = data.get("specific_interests", {})
+        if asked.get("category"):
+            interests = 1.0
+        elif self.profile(session)[1]:
+            # Topics named when asked outweigh those mentioned in passing
+            interests = 0.9 if asked else 0.7
+        else:
+            interests = 0.0
+        return {"level": level, "interests": interests}
+
+    def settled(self, scores: Dict[str, float]) -> bool:
+        """Whether confidence() is high enough to skip the remaining assessment"""
+        return min(scores.values()) >= Config.ASSESSMENT_CONFIDENCE
+
+    def _path(self, profile: Profile, length: Optional[int] = None) -> Tuple[str, ...]:
+        """Interests and unknown prerequisites, padded to length with easy topics"""
+        level, interests = profile
+        length = length or Config.LEARNING_PATH_LENGTH
+        known_difficulty, max_difficulty = LEVELS[level]
+
+        interest_mask = 0
+        for i in interests:
+            interest_mask |= 1 << i
+        leads_to_interest = interest_mask
+        for i in interests:
+            leads_to_interest |= self.ancestors[i]
+
+        known = 0
+        for i, difficulty in enumerate(self.difficulty):
+            if difficulty <= known_difficulty and not interest_mask >> i & 1:
+                known |= 1 << i
+        selected = leads_to_interest & ~known
+
+        # Interests and their prerequisites are never cut, so length only
+        # bounds the padding: pad with the easiest topics whose prerequisites
+        # are already covered
+        for i in sorted(self.order, key=lambda i: (self.difficulty[i], i)):
+            if bin(selected).count("1") >= length:
+                break
+            bit = 1 << i
+            if selected & bit or known & bit or self.difficulty[i] > max_difficulty:
+                continue
+            if self.prerequisites[i] & ~(selected | known) == 0:
+                selected |= bit
+
+        # Topological order; among ready topics, those leading to an interest
+        # come first, then easier ones
+        path: List[str] = []
+        done = known
+        remaining = selected
+        while remaining:
+            ready = [
+                i
+                for i in self._bits(remaining)
+                if self.prerequisites[i] & ~done & selected == 0
+            ]
+            i = min(
+                ready,
+                key=lambda i: (not leads_to_interest >> i & 1, self.difficulty[i], i),
+            )
+            path.append(self.titles[i])
+            done |= 1 << i
+            remaining &= ~(1 << i)
+        return tuple(path)
+
+    def _topological_order(self) -> List[int]:
+        order: List[int] = []
+        done = 0
+        remaining = (1 << len(self.ids)) - 1
+        while remaining:
+            ready = [
+                i for i in self._bits(remaining) if self.prerequisites[i] & ~done == 0
+            ]
+            if not ready:
+                cycle = [self.ids[i] for i in self._bits(remaining)]
+                raise ValueError(f"Topic graph has a cycle among {cycle}")
+            for i in ready:
+                order.append(i)
+                done |= 1 << i
+                remaining &= ~(1 << i)
+        return order
+
+    @staticmethod
+    def _bits(mask: int) -> List[int]:
+        bits = []
+        while mask:
+            low = mask & -mask
+            bits.append(low.bit_length() - 1)
+            mask ^= low
+        return bits
+
+
+_shared: Dict[str, TopicGraph] = {}
+
+
+def get_topic_graph(path: Optional[str] = None) -> TopicGraph:
+    """Process-wide topic graph, so the path cache is shared by all agents"""
+    path = path or Config.TOPIC_GRAPH_PATH
+    if path not in _shared:
+        _shared[path] = TopicGraph(path)
+    return _shared[path]
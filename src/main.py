@@ -2,18 +2,67 @@
 import asyncio
 import os
 import sys
-from typing import Optional
+import threading
+from typing import Optional, TextIO
 
 sys.path.append(os.path.dirname(__file__))
 
 from agents.orchestrator_simple import EcoLearnOrchestrator
 from utils.config_simple import Config
 
+# Learning sections the orchestrator streams ahead of the full response
+SECTION_LABELS = {
+    "explanation": "EXPLANATION",
+    "examples": "EXAMPLES",
+    "visual_suggestion": "VISUAL AID",
+}
+# Commands that ask for a section the turn only offered
+SECTION_COMMANDS = {
+    "explanation": "explanation",
+    "examples": "examples",
+    "visual": "visual_suggestion",
+}
+MORE_TIMEOUT_SECONDS = 30  # How long 'more' waits for deferred sections
+HOUSEKEEPING_SECONDS = 30  # Idle-time upkeep interval while the learner types
+
+
+class AsyncInput:
+    """Reads lines on a daemon thread so the event loop keeps running meanwhile"""
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stdin
+        self._lines: Optional[asyncio.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+
+    async def readline(self, prompt: str = "") -> Optional[str]:
+        """Next line without its newline, or None at end of input"""
+        if self._thread is None:
+            self._lines = asyncio.Queue()
+            self._thread = threading.Thread(
+                target=self._read,
+                args=(asyncio.get_running_loop(),),
+                name="stdin-reader",
+                daemon=True,
+            )
+            self._thread.start()
+        if prompt:
+            print(prompt, end="", flush=True)
+        return await self._lines.get()
+
+    def _read(self, loop: asyncio.AbstractEventLoop):
+        while True:
+            line = self.stream.readline()
+            if not line:
+                loop.call_soon_threadsafe(self._lines.put_nowait, None)
+                return
+            loop.call_soon_threadsafe(self._lines.put_nowait, line.rstrip("\n"))
+
 
 class EcoLearnTutor:
     def __init__(self):
         self.orchestrator = None
         self.session_id = "default_session"
+        self.input = AsyncInput()
 
     async def initialize(self):
         try:
@@ -49,12 +98,18 @@ class EcoLearnTutor:
         if not await self.initialize():
             return
 
+        maintenance = asyncio.create_task(self._housekeeping())
         try:
             while True:
                 try:
-                    user_input = input("\nYou: ").strip()
+                    line = await self.input.readline("\nYou: ")
+                    if line is None:
+                        print("\n\nSession ended. Thanks for using EcoLearn Tutor!")
+                        break
+                    user_input = line.strip()
 
                     if user_input.lower() in ["quit", "exit", "bye"]:
+                        self._display_stats()
                         print("\nThanks for learning with EcoLearn Tutor! Goodbye!")
                         break
                     if not user_input:
@@ -63,12 +118,19 @@ class EcoLearnTutor:
 
                     # Make sure orchestrator is initialized (helps static analyzers and prevents None access)
                     assert self.orchestrator is not None, "Orchestrator not initialized"
-                    response = await self.orchestrator.process_user_input(
-                        user_input, self.session_id
-                    )
-                    self._display_response(response)
+                    if user_input.lower() == "more":
+                        await self._display_deferred()
+                        continue
+                    if user_input.lower() in SECTION_COMMANDS:
+                        await self._display_on_demand(
+                            SECTION_COMMANDS[user_input.lower()]
+                        )
+                        continue
 
-                except KeyboardInterrupt:
+                    await self._respond(user_input)
+
+                except (KeyboardInterrupt, asyncio.CancelledError):
+                    # Ctrl-C cancels the main task while it awaits input
                     print("\n\nSession ended. Thanks for using EcoLearn Tutor!")
                     break
                 except Exception as e:
@@ -77,8 +139,81 @@ class EcoLearnTutor:
 
         except Exception as e:
             print(f"Application error: {str(e)}")
+        finally:
+            maintenance.cancel()
+            if self.orchestrator is not None:
+                await self.orchestrator.close()
+
+    async def _housekeeping(self):
+        """Upkeep that runs while the learner is typing"""
+        while True:
+            await asyncio.sleep(HOUSEKEEPING_SECONDS)
+            try:
+                self.orchestrator.housekeeping()
+            except Exception as e:
+                print(f"Housekeeping error: {str(e)}")
+
+    async def _respond(self, user_input: str):
+        """Print each learning section as soon as it is ready"""
+        streamed = False
+        stream = self.orchestrator.stream_user_input(user_input, self.session_id)
+        try:
+            async for chunk in stream:
+                if self._is_section(chunk):
+                    if not streamed:
+                        print("\nEcoLearn:")
+                        streamed = True
+                    self._display_section(chunk)
+                else:
+                    self._display_response(chunk, streamed)
+        finally:
+            # Releases the session lock even if displaying a chunk fails
+            await stream.aclose()
+
+    async def _display_deferred(self):
+        sections = await self.orchestrator.get_deferred_sections(
+            self.session_id, timeout=MORE_TIMEOUT_SECONDS
+        )
+        if not sections:
+            print("\nEcoLearn: Nothing else is waiting for you right now.")
+            return
+        print("\nEcoLearn:")
+        for section in sections:
+            self._display_section(section)
+
+    async def _display_on_demand(self, section_type: str):
+        section = await self.orchestrator.get_section(self.session_id, section_type)
+        if section is None:
+            print("\nEcoLearn: Nothing to show yet. Ask me about a topic first!")
+            return
+        print("\nEcoLearn:")
+        self._display_section(section)
+
+    def _is_section(self, chunk) -> bool:
+        return chunk.get("type") in SECTION_LABELS or (
+            chunk.get("type") == "error" and "content" in chunk
+        )
+
+    def _display_section(self, item):
+        label = SECTION_LABELS.get(item.get("type"))
+        prefix = f"{label}: " if label else "- "
+        if item.get("deferred"):
+            prefix = f"(from your last question) {prefix}"
+        elif item.get("repeat"):
+            prefix = f"(as before) {prefix}"
+        print(f"{prefix}{item.get('content', '')}")
+
+    def _display_stats(self):
+        if self.orchestrator is None:
+            return
+        router = self.orchestrator.get_stats()["intent_router"]
+        if router["total_turns"]:
+            print(
+                f"\nAnswered {router['local_turns']} of {router['total_turns']} "
+                f"turns instantly ({router['local_share']:.0%}) without calling the model."
+            )
 
-    def _display_response(self, response):
+    def _display_response(self, response, streamed: bool = False):
         response_type = response.get("type", "unknown")
 
         if response_type == "assessment_question":
@@ -105,24 +240,30 @@ class EcoLearnTutor:
 
         elif response_type == "learning_content":
             content_items = response.get("content", [])
-            print("\nEcoLearn:")
+            if not streamed:
+                print("\nEcoLearn:")
             for item in content_items:
                 if isinstance(item, dict):
-                    content_type = item.get("type", "")
-                    content = item.get("content", "")
-
-                    if content_type == "explanation":
-                        print(f"EXPLANATION: {content}")
-                    elif content_type == "examples":
-                        print(f"EXAMPLES: {content}")
-                    elif content_type == "visual_suggestion":
-                        print(f"VISUAL AID: {content}")
-                    elif content_type == "progress_check":
-                        print(f"PROGRESS: {content.get('message', '')}")
-                    else:
-                        print(f"- {content}")
+                    if item.get("type") == "progress_check":
+                        print(f"PROGRESS: {item.get('message', '')}")
+                    elif not streamed:
+                        # Sections were already printed as they arrived
+                        self._display_section(item)
                 else:
                     print(f"- {item}")
+            if response.get("pending_sections"):
+                pending = ", ".join(
+                    SECTION_LABELS.get(name, name).lower()
+                    for name in response["pending_sections"]
+                )
+                print(f"(Still preparing: {pending}. Type 'more' to see it.)")
+            if response.get("available_sections"):
+                commands = " or ".join(
+                    f"'{command}'"
+                    for command, name in SECTION_COMMANDS.items()
+                    if name in response["available_sections"]
+                )
+                print(f"(Type {commands} for more on this topic.)")
 
         elif response_type == "progress_check":
             print(f"\nEcoLearn: {response.get('message', 'Checking your progress...')}")
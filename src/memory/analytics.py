@@ -0,0 +1,237 @@
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+PHASES = ["assessment", "learning", "progress"]
+PHASE_CODES = {phase: code for code, phase in enumerate(PHASES)}
+COLUMNS = (
+    "interactions",
+    "topics_touched",
+    "first_seen",
+    "last_seen",
+    "gap_total",
+    "phase",
+    "transitions",
+    "turns_in_phase",
+    "topic_bits",
+)
+TOPIC_WORD_BITS = 64
+
+
+class ProgressAnalytics:
+    """Columnar per-session aggregates, updated per turn and queried vectorized"""
+
+    def __init__(self, capacity: int = 1024):
+        self._row_index: Optional[Dict[str, int]] = {}
+        self._ids: List[str] = []
+        self._size = 0
+
+        # One slot per session; arrays grow by doubling
+        self.interactions = np.zeros(capacity, dtype=np.int32)
+        self.topics_touched = np.zeros(capacity, dtype=np.int32)
+        self.first_seen = np.zeros(capacity, dtype=np.float64)
+        self.last_seen = np.zeros(capacity, dtype=np.float64)
+        self.gap_total = np.zeros(capacity, dtype=np.float64)
+        self.phase = np.zeros(capacity, dtype=np.int8)
+        self.transitions = np.zeros(capacity, dtype=np.int32)
+        self.turns_in_phase = np.zeros(capacity, dtype=np.int32)
+        # Bitset of topics each session has touched, one uint64 per 64 topics
+        self.topic_bits = np.zeros((capacity, 1), dtype=np.uint64)
+
+        self._topics: Dict[str, int] = {}
+        self._topic_names: List[str] = []
+        self.topic_counts = np.zeros(64, dtype=np.int64)
+
+    def record_turn(
+        self,
+        session_id: str,
+        phase: str,
+        topic: Optional[str] = None,
+        timestamp: Optional[float] = None,
+    ):
+        """Fold one turn into the session's row"""
+        now = time.time() if timestamp is None else timestamp
+        row = self._rows.get(session_id)
+        if row is None:
+            row = self._add_session(session_id, now)
+        elif self.interactions[row]:
+            self.gap_total[row] += now - self.last_seen[row]
+
+        code = PHASE_CODES.get(phase, 0)
+        if self.interactions[row] and code != self.phase[row]:
+            self.transitions[row] += 1
+            self.turns_in_phase[row] = 0
+        self.phase[row] = code
+        self.turns_in_phase[row] += 1
+        self.interactions[row] += 1
+        self.last_seen[row] = now
+
+        if topic:
+            topic_id = self._topic_id(topic)
+            self.topic_counts[topic_id] += 1
+            word, bit = divmod(topic_id, TOPIC_WORD_BITS)
+            mask = np.uint64(1 << bit)
+            if not self.topic_bits[row, word] & mask:
+                self.topic_bits[row, word] |= mask
+                self.topics_touched[row] += 1
+
+    def progress_distribution(
+        self, bins: int = 10, turns_for_completion: int = 10
+    ) -> Dict[str, List[float]]:
+        """Histogram of progress percentage (the ProgressAgent formula)"""
+        progress = self.progress_percentages(turns_for_completion)
+        counts, edges = np.histogram(progress, bins=bins, range=(0, 100))
+        return {"counts": counts.tolist(), "edges": edges.tolist()}
+
+    def progress_percentages(self, turns_for_completion: int = 10) -> np.ndarray:
+        interactions = self.interactions[: self._size]
+        return np.minimum(100.0, interactions * (100.0 / turns_for_completion))
+
+    def percentile_of(self, session_id: str) -> Optional[float]:
+        """Share of learners (0-100) with fewer interactions than this one"""
+        row = self._rows.get(session_id)
+        if row is None or not self._size:
+            return None
+        below = np.count_nonzero(
+            self.interactions[: self._size] < self.interactions[row]
+        )
+        return float(100.0 * below / self._size)
+
+    def stuck_learners(
+        self,
+        min_turns_in_phase: int = 8,
+        phases: tuple = ("assessment", "learning"),
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        """Sessions that have spent many turns without leaving their phase"""
+        size = self._size
+        codes = [PHASE_CODES[phase] for phase in phases]
+        mask = (self.turns_in_phase[:size] >= min_turns_in_phase) & np.isin(
+            self.phase[:size], codes
+        )
+        rows = np.flatnonzero(mask)
+        if limit is not None:
+            # Longest stuck first
+            order = np.argsort(-self.turns_in_phase[rows], kind="stable")[:limit]
+            rows = rows[order]
+        return [self._ids[row] for row in rows.tolist()]
+
+    def topic_popularity(self, top_n: int = 10) -> List[Dict[str, Any]]:
+        counts = self.topic_counts[: len(self._topic_names)]
+        order = np.argsort(-counts, kind="stable")[:top_n]
+        return [
+            {"topic": self._topic_names[i], "turns": int(counts[i])}
+            for i in order.tolist()
+            if counts[i]
+        ]
+
+    def mean_seconds_between_turns(self) -> np.ndarray:
+        """Per session; NaN for sessions with a single turn"""
+        gaps = self.interactions[: self._size] - 1
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(gaps > 0, self.gap_total[: self._size] / gaps, np.nan)
+
+    def summary(self) -> Dict[str, Any]:
+        size = self._size
+        if not size:
+            return {"sessions": 0}
+        phase_counts = np.bincount(self.phase[:size], minlength=len(PHASES))
+        mean_gaps = self.mean_seconds_between_turns()
+        return {
+            "sessions": size,
+            "turns": int(self.interactions[:size].sum()),
+            "mean_interactions": float(self.interactions[:size].mean()),
+            "median_seconds_between_turns": (
+                float(np.nanmedian(mean_gaps)) if np.any(~np.isnan(mean_gaps)) else None
+            ),
+            "by_phase": dict(zip(PHASES, phase_counts.tolist())),
+            "transitions": int(self.transitions[:size].sum()),
+            "mean_topics_touched": float(self.topics_touched[:size].mean()),
+        }
+
+    def expire(self, before: float) -> int:
+        """Drop sessions last seen before the timestamp; returns how many"""
+        size = self._size
+        keep = self.last_seen[:size] >= before
+        kept = int(np.count_nonzero(keep))
+        if kept == size:
+            return 0
+
+        # Compact every column in place with the same mask
+        for name in COLUMNS:
+            column = getattr(self, name)
+            column[:kept] = column[:size][keep]
+            column[kept:size] = 0
+        self._ids = list(itertools.compress(self._ids, keep.tolist()))
+        self._row_index = None
+        self._size = kept
+        return size - kept
+
+    def state(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """Metadata and trimmed columns, for snapshots"""
+        meta = {"ids": self._ids, "topics": self._topic_names}
+        columns = {name: getattr(self, name)[: self._size] for name in COLUMNS}
+        columns["topic_counts"] = self.topic_counts[: len(self._topic_names)]
+        return meta, columns
+
+    def restore(self, meta: Dict[str, Any], columns: Dict[str, np.ndarray]):
+        """Adopt the state saved by state(), copying the columns"""
+        self._ids = list(meta["ids"])
+        self._size = len(self._ids)
+        self._row_index = None  # Built on the first lookup
+        self._topic_names = list(meta["topics"])
+        self._topics = {topic: i for i, topic in enumerate(self._topic_names)}
+
+        for name in COLUMNS:
+            column = columns[name]
+            # Room for the next session; _grow() doubles from there
+            grown = np.zeros(
+                (max(len(column) + 1, 1024),) + column.shape[1:], dtype=column.dtype
+            )
+            grown[: len(column)] = column
+            setattr(self, name, grown)
+        counts = columns["topic_counts"]
+        self.topic_counts = np.zeros(max(2 * len(counts), 64), dtype=np.int64)
+        self.topic_counts[: len(counts)] = counts
+
+    @property
+    def _rows(self) -> Dict[str, int]:
+        # session_id -> row; rebuilt on first use after restore() or expire()
+        if self._row_index is None:
+            self._row_index = dict(zip(self._ids, range(self._size)))
+        return self._row_index
+
+    def _add_session(self, session_id: str, now: float) -> int:
+        row = self._size
+        if row == len(self.interactions):
+            self._grow()
+        self._rows[session_id] = row
+        self._ids.append(session_id)
+        self.first_seen[row] = now
+        self._size += 1
+        return row
+
+    def _grow(self):
+        for name in COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros((2 * len(column),) + column.shape[1:], dtype=column.dtype)
+            grown[: len(column)] = column
+            setattr(self, name, grown)
+
+    def _topic_id(self, topic: str) -> int:
+        topic_id = self._topics.get(topic)
+        if topic_id is None:
+            topic_id = len(self._topic_names)
+            self._topics[topic] = topic_id
+            self._topic_names.append(topic)
+            if topic_id == len(self.topic_counts):
+                self.topic_counts = np.concatenate(
+                    [self.topic_counts, np.zeros_like(self.topic_counts)]
+                )
+            if topic_id // TOPIC_WORD_BITS == self.topic_bits.shape[1]:
+                self.topic_bits = np.hstack(
+                    [self.topic_bits, np.zeros_like(self.topic_bits[:, :1])]
+                )
+        return topic_id
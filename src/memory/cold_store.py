@@ -0,0 +1,125 @@
+import hashlib
+import json
+import lzma
+import os
+import shutil
+import zlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from utils.config import Config
+
+# name -> (compress, decompress); zlib blobs double as snapshot records
+CODECS = {
+    "zlib": (zlib.compress, zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+
+def encode_session(session: Dict[str, Any], codec: str = "zlib") -> bytes:
+    return CODECS[codec][0](json.dumps(session).encode("utf-8"))
+
+
+def decode_session(blob: bytes, codec: str = "zlib") -> Dict[str, Any]:
+    return json.loads(CODECS[codec][1](blob))
+
+
+class ColdStore:
+    """Idle sessions as compressed JSON blobs, in memory or one file each on disk"""
+
+    def __init__(self, directory: Optional[str] = None, codec: Optional[str] = None):
+        self.codec = codec or Config.COLD_STORE_CODEC
+        if self.codec not in CODECS:
+            raise ValueError(f"Unknown cold store codec {self.codec}")
+        directory = Config.COLD_STORE_DIR if directory is None else directory
+        # Per-process directory so workers sharing the setting never collide
+        self.directory = (
+            os.path.join(directory, str(os.getpid())) if directory else None
+        )
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+        self._blobs: Dict[str, bytes] = {}  # In-memory mode only
+        self._entries: Dict[str, Tuple[float, int]] = {}  # id -> (created_at, size)
+        self.bytes = 0
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def put(self, session_id: str, session: Dict[str, Any]) -> int:
+        """Compress the session into the store; returns the blob size"""
+        self.discard(session_id)
+        blob = encode_session(session, self.codec)
+        if self.directory:
+            with open(self._path(session_id), "wb") as f:
+                f.write(blob)
+        else:
+            self._blobs[session_id] = blob
+        self._entries[session_id] = (session["created_at"], len(blob))
+        self.bytes += len(blob)
+        return len(blob)
+
+    def take(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Remove and decode a session, or None if it is not stored"""
+        if session_id not in self._entries:
+            return None
+        session = decode_session(self._read(session_id), self.codec)
+        self.discard(session_id)
+        return session
+
+    def created_at(self, session_id: str) -> float:
+        return self._entries[session_id][0]
+
+    def zlib_record(self, session_id: str) -> bytes:
+        """The session as a snapshot record, without a round trip for zlib blobs"""
+        blob = self._read(session_id)
+        if self.codec == "zlib":
+            return blob
+        return encode_session(decode_session(blob, self.codec))
+
+    def discard(self, session_id: str):
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return
+        self.bytes -= entry[1]
+        if self.directory:
+            try:
+                os.remove(self._path(session_id))
+            except FileNotFoundError:
+                pass
+        else:
+            del self._blobs[session_id]
+
+    def expire(self, before: float) -> int:
+        """Drop sessions created before the timestamp; returns how many"""
+        expired = [
+            session_id
+            for session_id, (created_at, _) in self._entries.items()
+            if created_at < before
+        ]
+        for session_id in expired:
+            self.discard(session_id)
+        return len(expired)
+
+    def close(self):
+        """Remove this process's on-disk blobs; snapshots keep what must survive"""
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self._blobs.clear()
+        self._entries.clear()
+        self.bytes = 0
+
+    def _read(self, session_id: str) -> bytes:
+        if not self.directory:
+            return self._blobs[session_id]
+        with open(self._path(session_id), "rb") as f:
+            return f.read()
+
+    def _path(self, session_id: str) -> str:
+        digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.cold")
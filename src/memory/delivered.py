@@ -0,0 +1,140 @@
+import hashlib
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from utils.config import Config
+
+# Sections one learning turn delivers, in display order
+SECTION_TYPES = ("explanation", "examples", "visual_suggestion")
+
+# "more examples", "give me other examples of solar power", "another example"
+MORE_EXAMPLES_PATTERN = re.compile(
+    r"^(?:(?:please|can you|could you|give me|show me)\s+)*(?:some\s+)?"
+    r"(?:more|other|another|different|new)\s+examples?\b"
+    r"(?:\s+(?:of|for|about|on))?[\s?!.]*",
+    re.IGNORECASE,
+)
+
+
+class TurnPlan(NamedTuple):
+    """What a learning turn serves from history and what it still generates"""
+
+    topic: str
+    prompt_input: str  # Text the content agent prompts with
+    generate: Tuple[str, ...]  # Section types to ask the model for
+    earlier: List[Dict[str, Any]]  # Sections served again from the index
+    lazy: Tuple[str, ...] = ()  # Left for the learner to request by name
+
+
+def content_hash(section: Dict[str, Any]) -> str:
+    """Short digest identifying a section's text, so duplicates are stored once"""
+    text = f"{section.get('type')}\0{section.get('content', '')}"
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class DeliveredContent:
+    """Per-session index of the learning sections a learner has already seen"""
+
+    def __init__(self, session: Dict[str, Any]):
+        # Plain JSON inside the session so snapshots carry it: topic key ->
+        # section type -> content hashes, plus each section body by hash
+        self.index = session.setdefault(
+            "delivered",
+            {"topics": {}, "content": {}, "last_topic": None, "model_calls_saved": 0},
+        )
+
+    def plan(self, user_input: str, sanitizer) -> TurnPlan:
+        """Reuse sections already shown for the topic; "more examples" asks for new ones"""
+        text = user_input.strip()
+        match = MORE_EXAMPLES_PATTERN.match(text)
+        if match:
+            rest = text[match.end() :]
+            topic = sanitizer.topic_key(rest) if rest else self.index["last_topic"]
+            if topic in self.index["topics"]:
+                return TurnPlan(topic, topic, ("examples",), [])
+
+        topic = sanitizer.topic_key(user_input)
+        seen = self.index["topics"].get(topic, {})
+        missing = [kind for kind in SECTION_TYPES if kind not in seen]
+        return TurnPlan(
+            topic,
+            user_input,
+            tuple(kind for kind in missing if kind in Config.EAGER_SECTIONS),
+            self.earlier_sections(topic),
+            tuple(kind for kind in missing if kind not in Config.EAGER_SECTIONS),
+        )
+
+    def earlier_sections(self, topic: str) -> List[Dict[str, Any]]:
+        """First delivered version of each section for the topic, marked as a repeat"""
+        seen = self.index["topics"].get(topic, {})
+        return [
+            dict(self.index["content"][seen[kind][0]], repeat=True)
+            for kind in SECTION_TYPES
+            if kind in seen
+        ]
+
+    def previous(self, topic: str, section_type: str) -> List[str]:
+        """Every text of one section type already shown for the topic"""
+        hashes = self.index["topics"].get(topic, {}).get(section_type, [])
+        return [self.index["content"][digest]["content"] for digest in hashes]
+
+    def offer(
+        self, topic: str, prompt_input: str, section_types: Tuple[str, ...]
+    ) -> int:
+        """Hold lazy sections for the topic, replacing another topic's; returns new ones"""
+        offered = self.index.get("offered")
+        if offered is None or offered["topic"] != topic:
+            offered = self.index["offered"] = {
+                "topic": topic,
+                "prompt_input": prompt_input,
+                "sections": [],
+            }
+        new = [kind for kind in section_types if kind not in offered["sections"]]
+        offered["sections"].extend(new)
+        return len(new)
+
+    def offered(self) -> List[str]:
+        offered = self.index.get("offered")
+        return list(offered["sections"]) if offered else []
+
+    def claim(self, section_type: str) -> Optional[Tuple[str, str]]:
+        """(topic, prompt input) for an offered section, withdrawing the offer"""
+        offered = self.index.get("offered")
+        if not offered or section_type not in offered["sections"]:
+            return None
+        offered["sections"].remove(section_type)
+        return offered["topic"], offered["prompt_input"]
+
+    def touch(self, topic: str):
+        """Remember the topic a bare "more examples" refers to"""
+        self.index["last_topic"] = topic
+
+    def record(self, topic: str, section: Dict[str, Any]) -> bool:
+        """Index a delivered section; False for errors, fallbacks and duplicates"""
+        if section.get("type") not in SECTION_TYPES or section.get("fallback"):
+            return False
+        digest = content_hash(section)
+        hashes = (
+            self.index["topics"].setdefault(topic, {}).setdefault(section["type"], [])
+        )
+        if digest in hashes:
+            return False
+        hashes.append(digest)
+        offered = self.index.get("offered")
+        if (
+            offered
+            and offered["topic"] == topic
+            and section["type"] in offered["sections"]
+        ):
+            offered["sections"].remove(section["type"])
+        self.index["content"].setdefault(
+            digest, {key: value for key, value in section.items() if key != "repeat"}
+        )
+        return True
+
+    def note_saved(self, calls: int):
+        self.index["model_calls_saved"] += calls
+
+    @property
+    def model_calls_saved(self) -> int:
+        return self.index["model_calls_saved"]
@@ -0,0 +1,190 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.config import Config
+
+# Every record is a (payload length, CRC32) header followed by a JSON payload
+HEADER = struct.Struct("<II")
+SEGMENT_SUFFIX = ".log"
+
+
+class EventLog:
+    """Append-only, segmented log of turn events with batched fsync"""
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: Optional[int] = None,
+        fsync_every: Optional[int] = None,
+        fsync_seconds: Optional[float] = None,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes or Config.EVENT_LOG_SEGMENT_BYTES
+        self.fsync_every = fsync_every or Config.EVENT_LOG_FSYNC_EVERY
+        self.fsync_seconds = fsync_seconds or Config.EVENT_LOG_FSYNC_SECONDS
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment_size = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.counters = {"events": 0, "bytes": 0, "fsyncs": 0, "segments": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, event: Dict[str, Any]):
+        """Write one event; durable after the next batched fsync"""
+        payload = json.dumps(event, separators=(",", ":")).encode("utf-8")
+        record = HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        with self._lock:
+            if self._file is None or self._segment_size >= self.segment_bytes:
+                self._rotate()
+            self._file.write(record)
+            self._segment_size += len(record)
+            self._unsynced += 1
+            self.counters["events"] += 1
+            self.counters["bytes"] += len(record)
+
+            if (
+                self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_seconds
+            ):
+                self._sync()
+
+    def flush(self):
+        """Force pending events to disk"""
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters)
+
+    def _rotate(self):
+        self._close_segment()
+        # Named by creation time and pid, so worker processes never share a file
+        # and sorted names replay in order
+        name = f"{time.time_ns():020d}-{os.getpid()}{SEGMENT_SUFFIX}"
+        self._file = open(os.path.join(self.directory, name), "ab")
+        self._segment_size = 0
+        self.counters["segments"] += 1
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        if self._unsynced:
+            self._sync()
+        self._file.close()
+        self._file = None
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.counters["fsyncs"] += 1
+
+
+class EventReader:
+    """Iterates a log directory through memory-mapped segments"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def segments(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [
+            os.path.join(self.directory, name)
+            for name in sorted(os.listdir(self.directory))
+            if name.endswith(SEGMENT_SUFFIX)
+        ]
+
+    def iter_raw(self) -> Iterator[memoryview]:
+        """Zero-copy payload slices; each is valid only while it is being used"""
+        for path in self.segments():
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    continue
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mapped)
+            try:
+                yield from _records(view)
+            finally:
+                view.release()
+                try:
+                    mapped.close()
+                except BufferError:
+                    pass  # A caller kept a slice; the map closes when it is freed
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for payload in self.iter_raw():
+            yield json.loads(payload.tobytes())
+
+
+def _records(view: memoryview) -> Iterator[memoryview]:
+    offset = 0
+    end = len(view)
+    while offset + HEADER.size <= end:
+        length, checksum = HEADER.unpack_from(view, offset)
+        start = offset + HEADER.size
+        payload = view[start : start + length]
+        # A torn write at the tail of a crashed segment ends that segment
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            payload.release()
+            return
+        yield payload
+        offset = start + length
+
+
+def replay(directory: str, session_manager, analytics=None, since: float = 0.0) -> int:
+    """Rebuild sessions (and optionally cohort analytics) from events after since"""
+    replayed = 0
+    for event in EventReader(directory):
+        if event["timestamp"] <= since:
+            continue
+        session_id = event["session_id"]
+        session = session_manager.find_session(session_id)
+        if session is None:
+            session = session_manager._create_new_session(session_id)
+            session["created_at"] = event["timestamp"]
+            session_manager.sessions[session_id] = session
+
+        if not event.get("handled_locally"):
+            session_manager.log_interaction(
+                session, {"type": "user", "content": event["input"]}
+            )
+        session["state"] = event["phase"]
+        session["assessment_step"] = event.get("assessment_step", 0)
+        session["last_interaction"] = event["input"]
+        session["last_updated"] = event["timestamp"]
+
+        if analytics is not None:
+            analytics.record_turn(
+                session_id, event["phase"], event.get("topic"), event["timestamp"]
+            )
+        replayed += 1
+    return replayed
+
+
+_shared: Optional[EventLog] = None
+
+
+def get_event_log() -> Optional[EventLog]:
+    """Process-wide event log, or None unless ECOLEARN_EVENT_LOG_DIR is set"""
+    global _shared
+    if not Config.EVENT_LOG_DIR:
+        return None
+    if _shared is None:
+        _shared = EventLog(Config.EVENT_LOG_DIR)
+    return _shared
@@ -0,0 +1,98 @@
+import asyncio
+import contextlib
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Iterable
+
+
+class _Entry:
+    """A held session lock; it exists only while some turn holds it"""
+
+    __slots__ = ("waiters",)
+
+    def __init__(self):
+        self.waiters: Deque[asyncio.Future] = deque()
+
+
+class _Hold:
+    """async with target for one session's lock"""
+
+    __slots__ = ("locks", "session_id")
+
+    def __init__(self, locks: "SessionLocks", session_id: str):
+        self.locks = locks
+        self.session_id = session_id
+
+    async def __aenter__(self):
+        await self.locks.acquire(self.session_id)
+
+    async def __aexit__(self, *exc_info):
+        self.locks.release(self.session_id)
+
+
+class SessionLocks:
+    """One async lock per active session, created on demand and dropped when idle"""
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self.acquired = 0
+        self.contended = 0  # Acquisitions that had to wait for another turn
+        self.max_waiters = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def locked(self, session_id: str) -> bool:
+        return session_id in self._entries
+
+    def hold(self, session_id: str) -> _Hold:
+        """Serialize turns within a session; other sessions are not affected"""
+        return _Hold(self, session_id)
+
+    async def acquire(self, session_id: str):
+        entry = self._entries.get(session_id)
+        if entry is None:
+            # Uncontended: no lock object and no suspension
+            self._entries[session_id] = _Entry()
+            self.acquired += 1
+            return
+
+        self.contended += 1
+        self.max_waiters = max(self.max_waiters, len(entry.waiters) + 1)
+        waiter = asyncio.get_running_loop().create_future()
+        entry.waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Handed the lock just as the caller gave up: pass it on
+                self.release(session_id)
+            elif waiter in entry.waiters:
+                entry.waiters.remove(waiter)
+            raise
+        self.acquired += 1
+
+    def release(self, session_id: str):
+        """Hand the lock to the next waiting turn, or drop it if there is none"""
+        entry = self._entries[session_id]
+        while entry.waiters:
+            waiter = entry.waiters.popleft()
+            if not waiter.done():  # Skip waiters whose turn was cancelled
+                waiter.set_result(None)
+                return
+        del self._entries[session_id]
+
+    @contextlib.asynccontextmanager
+    async def hold_all(self, session_ids: Iterable[str]) -> AsyncIterator[None]:
+        """Hold several sessions at once, locking in sorted order to avoid deadlock"""
+        async with contextlib.AsyncExitStack() as stack:
+            for session_id in sorted(set(session_ids)):
+                await stack.enter_async_context(self.hold(session_id))
+            yield
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": len(self._entries),
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "max_waiters": self.max_waiters,
+        }
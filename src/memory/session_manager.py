@@ -1,7 +1,13 @@
+import itertools
 import time
 from typing import Any, Dict, Optional
 
+from memory.cold_store import ColdStore
+from memory.session_locks import SessionLocks
 from utils.config import Config
+from utils.memory_profiler import deep_size
+
+SIZE_SAMPLE = 32  # Hot sessions measured for the bytes-per-session estimate
 
 
 class SessionManager:
@@ -10,19 +16,52 @@ class SessionManager:
     def __init__(self):
         self.sessions: Dict[str, Dict] = {}
         self.session_expiry = Config.SESSION_EXPIRY_HOURS * 3600  # Convert to seconds
+        # Sessions from a snapshot, decoded on first access
+        self.restored = None
+        # Older learning_interactions are folded into a summary past this many
+        self.max_interactions = Config.MAX_SESSION_INTERACTIONS
+        # Sessions idle past cold_after are compressed out of the hot dict
+        self.cold_after = Config.COLD_AFTER_SECONDS
+        self.cold = ColdStore()
+        self.demoted = 0
+        self.rehydrated = 0
+        self.rehydrate_seconds = 0.0
+        self.rehydrate_max_seconds = 0.0
+        self._mean_session_bytes = 0.0
+        self._sized_at: Optional[float] = None
+        # Per-session turn locks for concurrent serving
+        self.locks = SessionLocks()
 
     def get_session(self, session_id: str) -> Dict[str, Any]:
         """Retrieve or create a session"""
-        if session_id not in self.sessions:
+        if self.find_session(session_id) is None:
             self.sessions[session_id] = self._create_new_session(session_id)
 
         session = self.sessions[session_id]
 
         # Check for expiry
-        if time.time() - session["created_at"] > self.session_expiry:
-            self.sessions[session_id] = self._create_new_session(session_id)
+        now = time.time()
+        if now - session["created_at"] > self.session_expiry:
+            session = self.sessions[session_id] = self._create_new_session(session_id)
 
-        return self.sessions[session_id]
+        # Keeps a session in use from being demoted mid-turn
+        session["last_accessed"] = now
+        return session
+
+    def find_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Existing session, rehydrating it from the cold tier or snapshot if needed"""
+        session = self.sessions.get(session_id)
+        if session is None and session_id in self.cold:
+            session = self._rehydrate(session_id)
+        if session is None and self.restored is not None:
+            session = self.restored.load(session_id)
+            if session is not None:
+                self.sessions[session_id] = session
+        return session
+
+    def restore(self, sessions):
+        """Serve sessions from a snapshot without decoding them up front"""
+        self.restored = sessions
 
     def update_session(self, session_id: str, updates: Dict[str, Any]):
         """Update session data"""
@@ -30,6 +69,85 @@ class SessionManager:
             self.sessions[session_id].update(updates)
             self.sessions[session_id]["last_updated"] = time.time()
 
+    def log_interaction(self, session: Dict[str, Any], entry: Dict[str, Any]):
+        """Append to learning_interactions, compacting once it outgrows the cap"""
+        session.setdefault("learning_interactions", []).append(entry)
+        if len(session["learning_interactions"]) > self.max_interactions:
+            self.compact_context(session, self.max_interactions)
+
+    def expire_sessions(self) -> int:
+        """Drop every expired session; returns how many were removed"""
+        now = time.time()
+        expired = [
+            session_id
+            for session_id, session in self.sessions.items()
+            if now - session["created_at"] > self.session_expiry
+        ]
+        for session_id in expired:
+            del self.sessions[session_id]
+        return len(expired) + self.cold.expire(now - self.session_expiry)
+
+    def demote_idle(self) -> int:
+        """Move sessions idle past cold_after into the cold tier"""
+        if self.cold_after <= 0:
+            return 0
+        cutoff = time.time() - self.cold_after
+        idle = [
+            session_id
+            for session_id, session in self.sessions.items()
+            if max(session["last_updated"], session.get("last_accessed", 0)) < cutoff
+        ]
+        for session_id in idle:
+            # Encode before removing, so a session that can't be stored stays hot
+            self.cold.put(session_id, self.sessions[session_id])
+            del self.sessions[session_id]
+        self.demoted += len(idle)
+        return len(idle)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hot and cold tier sizes, plus what rehydration has cost"""
+        return {
+            "hot_sessions": len(self.sessions),
+            "hot_bytes_estimate": round(self.mean_session_bytes() * len(self.sessions)),
+            "cold_sessions": len(self.cold),
+            "cold_bytes": self.cold.bytes,
+            "demoted": self.demoted,
+            "rehydrated": self.rehydrated,
+            "mean_rehydrate_ms": (
+                round(self.rehydrate_seconds / self.rehydrated * 1e3, 3)
+                if self.rehydrated
+                else None
+            ),
+            "max_rehydrate_ms": round(self.rehydrate_max_seconds * 1e3, 3),
+        }
+
+    def mean_session_bytes(self) -> float:
+        """Sampled size of a hot session, re-measured at most once per refresh interval"""
+        now = time.monotonic()
+        if (
+            self._sized_at is None
+            or now - self._sized_at >= Config.SESSION_SIZE_REFRESH_SECONDS
+        ):
+            sample = list(itertools.islice(self.sessions.values(), SIZE_SAMPLE))
+            if not sample:
+                return 0.0
+            self._mean_session_bytes = sum(map(deep_size, sample)) / len(sample)
+            self._sized_at = now
+        return self._mean_session_bytes
+
+    def close(self):
+        self.cold.close()
+
+    def _rehydrate(self, session_id: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        session = self.cold.take(session_id)
+        self.sessions[session_id] = session
+        elapsed = time.perf_counter() - start
+        self.rehydrated += 1
+        self.rehydrate_seconds += elapsed
+        self.rehydrate_max_seconds = max(self.rehydrate_max_seconds, elapsed)
+        return session
+
     def _create_new_session(self, session_id: str) -> Dict[str, Any]:
         """Create a new session with default structure"""
         return {
@@ -38,6 +156,7 @@ class SessionManager:
             "last_updated": time.time(),
             "assessment_data": {},
             "learning_progress": [],
+            "state": "assessment",
             "knowledge_level": "beginner",
             "preferences": {},
             "learning_interactions": [],
@@ -52,11 +171,20 @@ class SessionManager:
             recent = interactions[-5:]  # Last 5 interactions
             older = interactions[:-5]
 
-            # Summarize older interactions (simplified)
-            summary = f"Previous {len(older)} interactions about environmental learning"
+            # Summarize older interactions (simplified); the count keeps
+            # progress tracking exact across compactions
+            count = sum(entry.get("count", 1) for entry in older)
+            summary = f"Previous {count} interactions about environmental learning"
 
             session["learning_interactions"] = [
-                {"type": "summary", "content": summary}
+                {"type": "summary", "content": summary, "count": count}
             ] + recent
 
         return session
+
+
+def interaction_count(session: Dict) -> int:
+    """Interactions logged for the session, including those folded into summaries"""
+    return sum(
+        entry.get("count", 1) for entry in session.get("learning_interactions", [])
+    )
@@ -0,0 +1,246 @@
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.config import Config
+
+# File layout: preamble, JSON header, then the sections; section offsets in
+# the header are relative to the end of the header
+MAGIC = b"ECOSNAP"
+VERSION = 3  # 2: analytics topic bitsets; 3: analytics ids in their own section
+PREAMBLE = struct.Struct("<7sHI")  # magic, format version, header length
+# One entry per session, in the order of the NUL-separated "session_ids" section
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u4"), ("created_at", "<f8")])
+
+
+class SnapshotSessions:
+    """Sessions stored in a snapshot, each decoded only when first requested"""
+
+    def __init__(self, snapshot: "Snapshot"):
+        self.snapshot = snapshot
+        self.entries = np.frombuffer(
+            snapshot.section("sessions_index"), dtype=INDEX_DTYPE
+        )
+        self._index: Optional[Dict[str, int]] = None
+
+    @property
+    def index(self) -> Dict[str, int]:
+        # session_id -> entry row; built on first use
+        if self._index is None:
+            ids = self.snapshot.section("session_ids").tobytes().decode("utf-8")
+            self._index = {
+                session_id: row
+                for row, session_id in enumerate(ids.split("\0"))
+                if session_id
+            }
+        return self._index
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def raw(self, session_id: str) -> bytes:
+        """Compressed session record, copied through by the next snapshot"""
+        entry = self.entries[self.index[session_id]]
+        start = self.snapshot.data_start + self.snapshot.sections["sessions"][0]
+        start += int(entry["offset"])
+        return self.snapshot.view[start : start + int(entry["length"])].tobytes()
+
+    def created_at(self, session_id: str) -> float:
+        return float(self.entries[self.index[session_id]]["created_at"])
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if session_id not in self.index:
+            return None
+        return json.loads(zlib.decompress(self.raw(session_id)))
+
+
+class Snapshot:
+    """Memory-mapped snapshot file; sections are read on demand"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self._mapped)
+
+        magic, version, header_length = PREAMBLE.unpack_from(self.view, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a snapshot")
+        if version != VERSION:
+            raise ValueError(f"{path} has snapshot version {version}, need {VERSION}")
+        self.data_start = PREAMBLE.size + header_length
+        header = json.loads(self.view[PREAMBLE.size : self.data_start].tobytes())
+        self.created_at: float = header["created_at"]
+        self.sections: Dict[str, List[int]] = header["sections"]
+        self.arrays: Dict[str, Dict[str, Any]] = header["arrays"]
+        self.sessions = SnapshotSessions(self)
+
+    def section(self, name: str) -> memoryview:
+        offset, length = self.sections[name]
+        start = self.data_start + offset
+        return self.view[start : start + length]
+
+    def json_section(self, name: str) -> Any:
+        return json.loads(self.section(name).tobytes())
+
+    def array(self, name: str) -> np.ndarray:
+        """Read-only array backed by the mapping"""
+        spec = self.arrays[name]
+        return np.frombuffer(self.section(name), dtype=spec["dtype"]).reshape(
+            spec["shape"]
+        )
+
+
+def write_snapshot(
+    path: str, session_manager, router=None, analytics=None
+) -> Dict[str, Any]:
+    """Write sessions, router and analytics state to path atomically"""
+    start = time.perf_counter()
+    created_at = time.time()
+    chunks: List[bytes] = []
+    sections: Dict[str, List[int]] = {}
+    arrays: Dict[str, Dict[str, Any]] = {}
+    size = 0
+
+    def add(name: str, data: bytes):
+        nonlocal size
+        sections[name] = [size, len(data)]
+        chunks.append(data)
+        size += len(data)
+
+    # Cold sessions and those never touched since the last restore are copied
+    # through as-is
+    ids: List[str] = []
+    entries: List[tuple] = []
+    records: List[bytes] = []
+    offset = 0
+
+    def add_session(session_id: str, record: bytes, created: float):
+        nonlocal offset
+        ids.append(session_id)
+        entries.append((offset, len(record), created))
+        records.append(record)
+        offset += len(record)
+
+    for session_id, session in session_manager.sessions.items():
+        record = zlib.compress(json.dumps(session).encode("utf-8"))
+        add_session(session_id, record, session["created_at"])
+    cold = session_manager.cold
+    for session_id in cold:
+        add_session(
+            session_id, cold.zlib_record(session_id), cold.created_at(session_id)
+        )
+    restored = session_manager.restored
+    for session_id in restored.index if restored is not None else ():
+        created = restored.created_at(session_id)
+        if session_id in session_manager.sessions or session_id in cold:
+            continue
+        if created_at - created > session_manager.session_expiry:
+            continue
+        add_session(session_id, restored.raw(session_id), created)
+    add("sessions", b"".join(records))
+    add("sessions_index", np.array(entries, dtype=INDEX_DTYPE).tobytes())
+    add("session_ids", "\0".join(ids).encode("utf-8"))
+
+    if router is not None:
+        add("router", json.dumps(router.state()).encode("utf-8"))
+    if analytics is not None:
+        meta, columns = analytics.state()
+        add("analytics_ids", "\0".join(meta.pop("ids")).encode("utf-8"))
+        add("analytics", json.dumps(meta).encode("utf-8"))
+        for name, column in columns.items():
+            column = np.ascontiguousarray(column)
+            arrays[f"analytics.{name}"] = {
+                "dtype": column.dtype.str,
+                "shape": list(column.shape),
+            }
+            add(f"analytics.{name}", column.tobytes())
+
+    header = json.dumps(
+        {"created_at": created_at, "sections": sections, "arrays": arrays}
+    ).encode("utf-8")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return {
+        "sessions": len(ids),
+        "bytes": PREAMBLE.size + len(header) + size,
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+
+def restore_snapshot(snapshot: Snapshot, session_manager, router=None, analytics=None):
+    """Attach the snapshot's sessions lazily and adopt its router/analytics state"""
+    session_manager.restore(snapshot.sessions)
+    if router is not None and "router" in snapshot.sections:
+        router.restore(snapshot.json_section("router"))
+    if analytics is not None and "analytics" in snapshot.sections:
+        columns = {
+            name.split(".", 1)[1]: snapshot.array(name) for name in snapshot.arrays
+        }
+        meta = snapshot.json_section("analytics")
+        ids = snapshot.section("analytics_ids").tobytes().decode("utf-8")
+        meta["ids"] = ids.split("\0") if ids else []
+        analytics.restore(meta, columns)
+
+
+class Snapshotter:
+    """Restores the last snapshot at startup and writes new ones periodically"""
+
+    def __init__(self, path: str, interval_seconds: Optional[float] = None):
+        self.path = path
+        self.interval_seconds = interval_seconds or Config.SNAPSHOT_INTERVAL_SECONDS
+        self._last_save = time.monotonic()
+
+    def restore(self, session_manager, router=None, analytics=None) -> float:
+        """Timestamp of the restored snapshot, or 0.0 if there was none"""
+        if not os.path.exists(self.path):
+            return 0.0
+        try:
+            snapshot = Snapshot(self.path)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring snapshot {self.path}: {e}")
+            return 0.0
+        restore_snapshot(snapshot, session_manager, router, analytics)
+        return snapshot.created_at
+
+    def save(self, session_manager, router=None, analytics=None) -> Dict[str, Any]:
+        self._last_save = time.monotonic()
+        return write_snapshot(self.path, session_manager, router, analytics)
+
+    def save_if_due(self, session_manager, router=None, analytics=None):
+        if time.monotonic() - self._last_save >= self.interval_seconds:
+            return self.save(session_manager, router, analytics)
+        return None
+
+
+def worker_snapshot_path(path: str, worker: Optional[int]) -> str:
+    """state.snap -> state.worker-2.snap, so pool workers never overwrite each other"""
+    if worker is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.worker-{worker}{ext}"
+
+
+def get_snapshotter() -> Optional[Snapshotter]:
+    """Snapshotter for ECOLEARN_SNAPSHOT_PATH (per worker in a pool), or None when unset"""
+    if not Config.SNAPSHOT_PATH:
+        return None
+    return Snapshotter(worker_snapshot_path(Config.SNAPSHOT_PATH, Config.WORKER_INDEX))
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Multi-process worker mode for EcoLearn Tutor
+
+Starts N worker processes up front, each running its own EcoLearnOrchestrator,
+and routes every request by a hash of session_id so a session's state
+always lives on the same worker.
+"""
+
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import zlib
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_SHUTDOWN = None
+_METRICS = "metrics"
+_TURN = "turn"
+
+
+def default_orchestrator_factory():
+    """Build the orchestrator used by the CLI"""
+    from agents.orchestrator_simple import EcoLearnOrchestrator
+
+    return EcoLearnOrchestrator()
+
+
+def _worker_main(index: int, factory: Callable[[], Any], conn: Connection):
+    """Worker process entry point"""
+    from utils.config import Config
+
+    # Per-worker state files: workers own disjoint sessions
+    Config.WORKER_INDEX = index
+    # asyncio.run cancels and awaits leftover background tasks on shutdown
+    asyncio.run(_serve(factory, conn))
+
+
+async def _serve(factory: Callable[[], Any], conn: Connection):
+    """Worker loop: one orchestrator, one request at a time, loop always running"""
+    orchestrator = factory()
+    loop = asyncio.get_running_loop()
+    stats = {"requests": 0, "errors": 0, "busy_seconds": 0.0}
+
+    while True:
+        # Waiting in a thread keeps background tasks (stream drains) progressing
+        try:
+            message = await loop.run_in_executor(None, conn.recv)
+        except EOFError:
+            break
+        if message is _SHUTDOWN:
+            break
+
+        request_id, kind, payload = message
+        if kind == _METRICS:
+            session_manager = getattr(orchestrator, "session_manager", None)
+            sessions = getattr(session_manager, "sessions", {})
+            metrics = dict(stats, pid=os.getpid(), sessions=len(sessions))
+            if hasattr(orchestrator, "get_stats"):
+                router = orchestrator.get_stats().get("intent_router", {})
+                metrics["total_turns"] = router.get("total_turns", 0)
+                metrics["local_turns"] = router.get("local_turns", 0)
+            conn.send((request_id, metrics))
+            continue
+
+        user_input, session_id = payload
+        start = time.perf_counter()
+        try:
+            response = await orchestrator.process_user_input(user_input, session_id)
+        except Exception as e:
+            stats["errors"] += 1
+            response = {"type": "error", "message": f"Worker error: {e}"}
+        stats["requests"] += 1
+        stats["busy_seconds"] += time.perf_counter() - start
+        conn.send((request_id, response))
+
+
+class WorkerPool:
+    """Pre-started orchestrator workers behind a sticky session router"""
+
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        orchestrator_factory: Callable[[], Any] = default_orchestrator_factory,
+        restart_crashed: bool = True,
+        max_restarts: int = 10,
+    ):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.orchestrator_factory = orchestrator_factory
+        self.restart_crashed = restart_crashed
+        self.max_restarts = max_restarts
+
+        # Forking a parent that already runs gRPC threads can deadlock the
+        # child, so workers start from a clean forkserver (spawn elsewhere)
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn"
+        )
+        # One pipe per worker: a worker dying mid-write can't wedge the others
+        self._workers: List[Optional[multiprocessing.Process]] = []
+        self._conns: List[Optional[Connection]] = []
+        self.restarts = [0] * self.num_workers
+
+        self._ids = itertools.count()
+        self._pending: Dict[int, Tuple[asyncio.Future, int]] = {}
+        self._lock = threading.Lock()
+        self._collector: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self):
+        """Start the workers and start collecting their results"""
+        for index in range(self.num_workers):
+            self._conns.append(None)
+            self._workers.append(None)
+            self._spawn(index)
+
+        self._running = True
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        return self
+
+    def worker_for(self, session_id: str) -> int:
+        """Stable worker index for a session (same across parent restarts)"""
+        return zlib.crc32(session_id.encode("utf-8")) % self.num_workers
+
+    async def process_user_input(
+        self, user_input: str, session_id: str
+    ) -> Dict[str, Any]:
+        """Same contract as EcoLearnOrchestrator.process_user_input"""
+        index = self.worker_for(session_id)
+        return await self._submit(index, _TURN, (user_input, session_id))
+
+    async def metrics(self) -> Dict[str, Any]:
+        """Per-worker counters plus pool-wide totals"""
+        per_worker = await asyncio.gather(
+            *(self._submit(index, _METRICS, None) for index in range(self.num_workers)),
+            return_exceptions=True,
+        )
+
+        workers = []
+        totals = {"requests": 0, "errors": 0, "busy_seconds": 0.0, "sessions": 0}
+        for index, stats in enumerate(per_worker):
+            if isinstance(stats, Exception):
+                stats = {"error": str(stats)}
+            else:
+                for key in totals:
+                    totals[key] += stats.get(key, 0)
+            stats["worker"] = index
+            stats["restarts"] = self.restarts[index]
+            workers.append(stats)
+
+        totals["local_turns"] = sum(w.get("local_turns", 0) for w in workers)
+        totals["total_turns"] = sum(w.get("total_turns", 0) for w in workers)
+        totals["local_share"] = (
+            totals["local_turns"] / totals["total_turns"]
+            if totals["total_turns"]
+            else 0.0
+        )
+        totals["restarts"] = sum(self.restarts)
+        totals["workers"] = self.num_workers
+        return {"workers": workers, "totals": totals}
+
+    def shutdown(self, timeout: float = 5.0):
+        """Let workers finish their current request, then stop them"""
+        self._running = False
+        for conn in self._conns:
+            try:
+                if conn is not None:
+                    conn.send(_SHUTDOWN)
+            except OSError:
+                pass  # Worker already gone
+
+        deadline = time.monotonic() + timeout
+        for process in self._workers:
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        if self._collector is not None:
+            self._collector.join(timeout)
+        self._fail_pending(lambda request_id, worker: True, "Worker pool shut down")
+        for conn in self._conns:
+            if conn is not None:
+                conn.close()
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, *exc_info):
+        self.shutdown()
+
+    def _spawn(self, index: int) -> List[int]:
+        """Start a worker process; returns requests stranded on the one it replaces"""
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self.orchestrator_factory, child_conn),
+            name=f"ecolearn-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        with self._lock:
+            old_conn, self._conns[index] = self._conns[index], parent_conn
+            self._workers[index] = process
+            stranded = [
+                request_id
+                for request_id, (_, worker) in self._pending.items()
+                if worker == index
+            ]
+        if old_conn is not None:
+            old_conn.close()
+        return stranded
+
+    async def _submit(self, index: int, kind: str, payload: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request_id = next(self._ids)
+        with self._lock:
+            if self._conns[index] is None:
+                raise RuntimeError(f"Worker {index} is not running")
+            self._pending[request_id] = (future, index)
+            try:
+                self._conns[index].send((request_id, kind, payload))
+            except OSError:
+                del self._pending[request_id]
+                raise RuntimeError(f"Worker {index} is not running")
+        return await future
+
+    def _collect(self):
+        """Resolve futures from worker results and restart crashed workers"""
+        last_check = time.monotonic()
+        while self._running or self._pending:
+            with self._lock:
+                conns = {conn: index for index, conn in enumerate(self._conns) if conn}
+            if not self._running and not any(
+                p is not None and p.is_alive() for p in self._workers
+            ):
+                break
+
+            for conn in wait(list(conns), timeout=0.2):
+                try:
+                    request_id, result = conn.recv()
+                except (EOFError, OSError):
+                    # Worker exited; stop polling its pipe until it is replaced
+                    self._reap(conns[conn])
+                    continue
+                with self._lock:
+                    entry = self._pending.pop(request_id, None)
+                if entry is not None:
+                    self._resolve(entry[0], result)
+
+            if self._running and time.monotonic() - last_check >= 0.2:
+                self._check_workers()
+                last_check = time.monotonic()
+
+    def _reap(self, index: int):
+        process = self._workers[index]
+        if process is not None:
+            process.join(1.0)
+        if self._running:
+            self._check_workers()
+        else:
+            self._retire(index)
+
+    def _check_workers(self):
+        for index, process in enumerate(self._workers):
+            if process is None or process.is_alive() or not self._running:
+                continue
+
+            print(f"Worker {index} exited with code {process.exitcode}")
+            # Requests sent to the dead worker are failed, not replayed; new
+            # ones go straight to its replacement
+            if self.restart_crashed and self.restarts[index] < self.max_restarts:
+                self.restarts[index] += 1
+                stranded = set(self._spawn(index))
+                self._fail_pending(
+                    lambda request_id, worker: request_id in stranded,
+                    "Worker crashed",
+                )
+            else:
+                self._retire(index)
+                self._fail_pending(
+                    lambda request_id, worker: worker == index, "Worker crashed"
+                )
+
+    def _retire(self, index: int):
+        with self._lock:
+            conn, self._conns[index] = self._conns[index], None
+            self._workers[index] = None
+        if conn is not None:
+            conn.close()
+
+    def _fail_pending(self, matches: Callable[[int, int], bool], message: str):
+        with self._lock:
+            failed = [
+                request_id
+                for request_id, (_, worker) in self._pending.items()
+                if matches(request_id, worker)
+            ]
+            futures = [self._pending.pop(request_id)[0] for request_id in failed]
+        for future in futures:
+            self._resolve(future, RuntimeError(message))
+
+    def _resolve(self, future: asyncio.Future, result: Any):
+        def apply():
+            if future.done():
+                return
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        try:
+            future.get_loop().call_soon_threadsafe(apply)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+
+async def serve_lines(pool: WorkerPool):
+    """Line front end: '<session_id>\\t<user input>' in, one JSON response out"""
+    loop = asyncio.get_running_loop()
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            break
+        session_id, _, user_input = line.rstrip("\n").partition("\t")
+        if not user_input:
+            continue
+        try:
+            response = await pool.process_user_input(user_input, session_id)
+        except Exception as e:
+            response = {"type": "error", "message": str(e)}
+        print(json.dumps({"session_id": session_id, "response": response}), flush=True)
+
+    print(json.dumps({"metrics": await pool.metrics()}), flush=True)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run EcoLearn Tutor worker processes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    pool = WorkerPool(args.workers).start()
+    try:
+        asyncio.run(serve_lines(pool))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
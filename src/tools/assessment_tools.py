@@ -1,16 +1,24 @@
-from typing import Any, Dict
-
-import google.generativeai as genai
+import asyncio
+from typing import Any, Dict, Optional
 
+from knowledge.question_bank import get_question_bank
+from tools.response_parser import StreamingQuestionParser
 from utils.config import Config
+from utils.model_router import ModelRouter
+from utils.sanitizer import ASSESSMENT_CODE_INDICATORS, InputSanitizer
 
 
 class KnowledgeAssessmentTool:
     """Custom tool for knowledge assessment"""
 
-    def __init__(self):
-        # Initialize Gemini model with available model
-        self.model = genai.GenerativeModel(Config.GEMINI_MODEL)
+    def __init__(self, router: Optional[ModelRouter] = None):
+        # Model choice per assessment step comes from the routing policy
+        self.router = router or ModelRouter(default_model=Config.GEMINI_MODEL)
+        self.sanitizer = InputSanitizer(
+            extract_topic=False, indicators=ASSESSMENT_CODE_INDICATORS
+        )
+        # Background tasks finishing streamed responses
+        self._pending_streams = set()
 
     async def assess(
         self, user_input: str, assessment_type: str, session: Dict
@@ -20,35 +28,64 @@ class KnowledgeAssessmentTool:
         # Clean the input to avoid code processing
         clean_input = self._clean_input(user_input)
 
+        # Answers the bank can classify get their next question without a model call
+        bank = get_question_bank()
+        if bank is not None:
+            local = bank.next_question(assessment_type, clean_input, session)
+            if local is not None:
+                return local
+
         prompt = self._create_assessment_prompt(clean_input, assessment_type, session)
 
         try:
-            response = self.model.generate_content(prompt)
+            if Config.STREAM_ASSESSMENT:
+                return await self._stream_assessment(prompt, assessment_type, session)
+            response = await self.router.generate(assessment_type, prompt, session)
             return self._parse_assessment_response(response.text, assessment_type)
         except Exception as e:
             print(f"Assessment error: {e}")
             return self._get_fallback_assessment(assessment_type)
 
+    async def _stream_assessment(
+        self, prompt: str, assessment_type: str, session: Dict
+    ) -> Dict[str, Any]:
+        """Return as soon as the follow-up question is complete"""
+        response = await self.router.generate(
+            assessment_type, prompt, session, stream=True
+        )
+        chunks = response.__aiter__()
+        parser = StreamingQuestionParser()
+
+        async for chunk in chunks:
+            if parser.feed(chunk.text) is not None:
+                break
+        else:
+            return self._parse_assessment_response(parser.text, assessment_type)
+
+        # The rest of the response keeps arriving for raw_response
+        result = self._parse_assessment_response(parser.text, assessment_type)
+        task = asyncio.create_task(self._finish_stream(chunks, parser, result))
+        self._pending_streams.add(task)
+        task.add_done_callback(self._pending_streams.discard)
+        result["raw_response_task"] = task
+        return result
+
+    async def _finish_stream(
+        self, chunks, parser: StreamingQuestionParser, result: Dict[str, Any]
+    ) -> str:
+        """Drain the remaining chunks into result["raw_response"]"""
+        try:
+            async for chunk in chunks:
+                parser.feed(chunk.text)
+        except Exception as e:
+            print(f"Assessment stream error: {e}")
+
+        result["raw_response"] = parser.text
+        return parser.text
+
     def _clean_input(self, user_input: str) -> str:
         """Clean user input to remove code and focus on environmental topics"""
-        # If input looks like code, return a default environmental topic
-        code_indicators = [
-            "def ",
-            "class ",
-            "import ",
-            "async ",
-            "await ",
-            "print(",
-            "self.",
-            "if ",
-            "for ",
-            "while ",
-        ]
-
-        if any(indicator in user_input for indicator in code_indicators):
-            return "environmental sustainability"
-
-        return user_input
+        return self.sanitizer.clean(user_input)
 
     def _create_assessment_prompt(
         self, user_input: str, assessment_type: str, session: Dict
@@ -59,6 +96,7 @@ class KnowledgeAssessmentTool:
             "general_environmental_knowledge": """
             Based on the user's response: "{user_input}"
             Assess their general environmental knowledge level (beginner, intermediate, advanced).
+            Start with one line: "Level: <level> (confidence: <0 to 1>)".
             Ask one follow-up question to clarify their understanding.
             Keep it conversational and educational about environmental topics.
             """,
@@ -80,10 +118,9 @@ class KnowledgeAssessmentTool:
         self, response: str, assessment_type: str
     ) -> Dict[str, Any]:
         """Parse Gemini response into structured assessment data"""
-        lines = [line.strip() for line in response.split("\n") if line.strip()]
-        question = next(
-            (line for line in lines if "?" in line),
-            "What aspect of environmental science interests you most?",
+        question = (
+            StreamingQuestionParser.parse(response)
+            or "What aspect of environmental science interests you most?"
         )
 
         return {
@@ -1,27 +1,25 @@
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-import google.generativeai as genai
-from dotenv import load_dotenv
-
-# Load .env from project root
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(os.path.dirname(current_dir))
-env_path = os.path.join(project_root, ".env")
-load_dotenv(env_path)
+from knowledge.question_bank import get_question_bank
+from utils.env import load_env
+from utils.model_router import ModelRouter
+from utils.sanitizer import ASSESSMENT_CODE_INDICATORS, InputSanitizer
 
 
 class KnowledgeAssessmentTool:
     """Custom tool for knowledge assessment - Simple version"""
 
-    def __init__(self):
-        # Configure Gemini with API key
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
+    def __init__(self, router: Optional[ModelRouter] = None):
+        # Gemini itself is configured by the router on first use
+        load_env()
+        if not os.getenv("GEMINI_API_KEY"):
             raise ValueError("GEMINI_API_KEY not found in environment")
 
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
+        self.router = router or ModelRouter(default_model="gemini-2.0-flash")
+        self.sanitizer = InputSanitizer(
+            extract_topic=False, indicators=ASSESSMENT_CODE_INDICATORS
+        )
 
     async def assess(
         self, user_input: str, assessment_type: str, session: Dict
@@ -29,10 +27,16 @@ class KnowledgeAssessmentTool:
         """Assess user knowledge based on input and assessment type"""
 
         clean_input = self._clean_input(user_input)
+        bank = get_question_bank()
+        if bank is not None:
+            local = bank.next_question(assessment_type, clean_input, session)
+            if local is not None:
+                return local
+
         prompt = self._create_assessment_prompt(clean_input, assessment_type)
 
         try:
-            response = self.model.generate_content(prompt)
+            response = await self.router.generate(assessment_type, prompt, session)
             return {
                 "next_question": response.text.strip(),
                 "assessment_type": assessment_type,
@@ -43,21 +47,7 @@ class KnowledgeAssessmentTool:
             return self._get_fallback_assessment(assessment_type)
 
     def _clean_input(self, user_input: str) -> str:
-        code_indicators = [
-            "def ",
-            "class ",
-            "import ",
-            "async ",
-            "await ",
-            "print(",
-            "self.",
-            "if ",
-            "for ",
-            "while ",
-        ]
-        if any(indicator in user_input for indicator in code_indicators):
-            return "environmental sustainability"
-        return user_input
+        return self.sanitizer.clean(user_input)
 
     def _create_assessment_prompt(self, user_input: str, assessment_type: str) -> str:
         if assessment_type == "specific_interests":
@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from urllib.parse import quote, urlsplit
+
+from utils.config import Config
+
+if TYPE_CHECKING:
+    import aiohttp
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+class ReferenceFetcher:
+    """Async HTTP client for reference APIs: one pooled session, disk cache, dedup"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        max_per_host: Optional[int] = None,
+        per_host_limits: Optional[Dict[str, int]] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.cache_dir = cache_dir or Config.HTTP_CACHE_DIR
+        self.max_connections = max_connections or Config.HTTP_MAX_CONNECTIONS
+        self.max_per_host = max_per_host or Config.HTTP_MAX_PER_HOST
+        # Hosts with their own concurrency cap, e.g. a rate-limited API
+        self.per_host_limits = per_host_limits or {}
+        self.timeout = timeout or Config.HTTP_TIMEOUT_SECONDS
+
+        # aiohttp is imported on first request; most runs never fetch
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.counters = {
+            "requests": 0,
+            "cache_hits": 0,
+            "revalidated": 0,
+            "deduplicated": 0,
+        }
+
+    async def get_text(self, url: str) -> str:
+        """Body of a GET, served from cache while fresh; raises on HTTP errors"""
+        cached = self._read_cache(url)
+        if cached is not None and time.time() < cached["expires_at"]:
+            self.counters["cache_hits"] += 1
+            return cached["body"]
+
+        # Concurrent callers for the same URL share one request
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url, cached))
+            self._inflight[url] = task
+            task.add_done_callback(lambda done: self._inflight.pop(url, None))
+        else:
+            self.counters["deduplicated"] += 1
+        return await asyncio.shield(task)
+
+    async def get_json(self, url: str) -> Any:
+        return json.loads(await self.get_text(url))
+
+    async def wikipedia_summary(self, title: str) -> Optional[Dict[str, str]]:
+        """Title, extract and page URL of a Wikipedia article, or None if missing"""
+        import aiohttp
+
+        url = Config.WIKIPEDIA_API + quote(title.strip().replace(" ", "_"))
+        try:
+            summary = await self.get_json(url)
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404:
+                return None
+            raise
+
+        if not summary.get("extract"):
+            return None
+        page = summary.get("content_urls", {}).get("desktop", {}).get("page")
+        return {
+            "title": summary.get("title", title),
+            "extract": summary["extract"],
+            "source": page or url,
+        }
+
+    async def current_weather(self, city: str) -> Optional[Dict[str, Any]]:
+        """OpenWeather conditions for a city, or None without an API key"""
+        if not Config.OPENWEATHER_API:
+            return None
+        url = (
+            f"{Config.OPENWEATHER_URL}?q={quote(city)}"
+            f"&appid={Config.OPENWEATHER_API}&units=metric"
+        )
+        return await self.get_json(url)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _fetch(self, url: str, cached: Optional[Dict[str, Any]]) -> str:
+        headers = {}
+        if cached is not None and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+
+        async with self._host_slot(url):
+            self.counters["requests"] += 1
+            async with self._get_session().get(url, headers=headers) as response:
+                if response.status == 304 and cached is not None:
+                    self.counters["revalidated"] += 1
+                    cached["expires_at"] = self._expires_at(response.headers)
+                    self._write_cache(url, cached)
+                    return cached["body"]
+
+                response.raise_for_status()
+                body = await response.text()
+
+        if "no-store" not in response.headers.get("Cache-Control", ""):
+            self._write_cache(
+                url,
+                {
+                    "etag": response.headers.get("ETag"),
+                    "expires_at": self._expires_at(response.headers),
+                    "body": body,
+                },
+            )
+        return body
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        import aiohttp
+
+        # Created on first use so it binds to the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_per_host,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": "EcoLearnTutor/1.0"},
+            )
+        return self._session
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_slots:
+            limit = self.per_host_limits.get(host, self.max_per_host)
+            self._host_slots[host] = asyncio.Semaphore(limit)
+        return self._host_slots[host]
+
+    def _expires_at(self, headers) -> float:
+        cache_control = headers.get("Cache-Control", "")
+        match = MAX_AGE_PATTERN.search(cache_control)
+        if "no-cache" in cache_control or match is None:
+            return 0.0  # Revalidate on every use
+        return time.time() + int(match.group(1))
+
+    def _cache_path(self, url: str) -> str:
+        return os.path.join(
+            self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json"
+        )
+
+    def _read_cache(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._cache_path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, url: str, entry: Dict[str, Any]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(url)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(temp_path, path)
+
+
+_shared: Optional[ReferenceFetcher] = None
+
+
+def get_reference_fetcher() -> Optional[ReferenceFetcher]:
+    """Process-wide fetcher, or None unless ECOLEARN_FETCH_REFERENCES=1"""
+    global _shared
+    if not Config.FETCH_REFERENCES:
+        return None
+    if _shared is None:
+        _shared = ReferenceFetcher()
+    return _shared
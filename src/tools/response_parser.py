@@ -0,0 +1,61 @@
+import re
+from typing import List, Optional
+
+# A sentence boundary inside a line: terminator (maybe closing bold) then whitespace
+SENTENCE_BREAK = re.compile(r"[.!:]\**\s+")
+
+
+class StreamingQuestionParser:
+    """Incremental parser that spots the first complete question in a streamed response"""
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._line = ""
+        self.question: Optional[str] = None
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Consume a chunk; return the question the moment it is complete, once"""
+        self._chunks.append(chunk)
+        if self.question is not None:
+            return None
+
+        self._line += chunk
+        while True:
+            mark = self._line.find("?")
+            newline = self._line.find("\n")
+
+            # Lines finished without a question can be discarded
+            if newline != -1 and (mark == -1 or newline < mark):
+                self._line = self._line[newline + 1 :]
+                continue
+
+            if mark == -1:
+                return None
+
+            question = self._last_sentence(self._line[: mark + 1])
+            if not question.strip("?"):
+                # A bare "?" is not a question; keep looking past it
+                self._line = self._line[mark + 1 :]
+                continue
+
+            self.question = question
+            self._line = ""
+            return question
+
+    @property
+    def text(self) -> str:
+        """Everything received so far"""
+        return "".join(self._chunks)
+
+    @classmethod
+    def parse(cls, response: str) -> Optional[str]:
+        """First question in an already complete response"""
+        parser = cls()
+        parser.feed(response)
+        return parser.question
+
+    def _last_sentence(self, line: str) -> str:
+        start = 0
+        for match in SENTENCE_BREAK.finditer(line):
+            start = match.end()
+        return line[start:].strip()
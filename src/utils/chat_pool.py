@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from typing import Any, Container, Dict, Optional, Tuple
+
+from utils.config import Config
+
+
+class ChatPool:
+    """Model chat sessions per learner session and route, least recently used first out"""
+
+    def __init__(
+        self, max_sessions: Optional[int] = None, history_turns: Optional[int] = None
+    ):
+        self.max_sessions = max_sessions or Config.CHAT_POOL_SIZE
+        self.history_turns = history_turns or Config.CHAT_HISTORY_TURNS
+        # session_id -> (route, model name) -> chat
+        self._chats: "OrderedDict[str, Dict[Tuple[str, str], Any]]" = OrderedDict()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._chats)
+
+    def chat_for(self, session_id: str, route: str, model_name: str, model: Any) -> Any:
+        """The session's chat for a route, started on first use"""
+        chats = self._chats.get(session_id)
+        if chats is None:
+            chats = self._chats[session_id] = {}
+            while len(self._chats) > self.max_sessions:
+                self._chats.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._chats.move_to_end(session_id)
+
+        chat = chats.get((route, model_name))
+        if chat is None:
+            chat = chats[(route, model_name)] = model.start_chat(history=[])
+            self.created += 1
+        else:
+            self.reused += 1
+            self._trim(chat)
+        return chat
+
+    def retain(self, session_ids: Container[str]) -> int:
+        """Drop chats whose learner session is gone; returns how many sessions"""
+        stale = [
+            session_id for session_id in self._chats if session_id not in session_ids
+        ]
+        for session_id in stale:
+            del self._chats[session_id]
+        self.evicted += len(stale)
+        return len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._chats),
+            "created": self.created,
+            "reused": self.reused,
+            "evicted": self.evicted,
+        }
+
+    def _trim(self, chat: Any):
+        # The chat resends its history with every message; keeping only the
+        # last few exchanges holds the request size steady as sessions grow
+        keep = 2 * self.history_turns
+        history = getattr(chat, "history", None)
+        if history is not None and len(history) > keep:
+            chat.history = history[-keep:]
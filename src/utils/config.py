@@ -1,9 +1,9 @@
 import os
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
-from dotenv import load_dotenv
+from utils.env import PROJECT_ROOT, load_env
 
-load_dotenv()
+load_env()
 
 
 class Config:
@@ -15,24 +15,104 @@ class Config:
     # Try different model names - use the first available one
     AVAILABLE_MODELS = ["gemini-2.5-flash"]
     GEMINI_MODEL = "gemini-2.5-flash"
+    # Filled by discover_models() during validate_config()
+    DISCOVERED_MODELS: List[str] = []
+    # Optional JSON file overriding the per-content-type model routing policy
+    MODEL_POLICY_PATH = os.getenv("ECOLEARN_MODEL_POLICY", "")
+    # Back each learner session with model chat sessions instead of one-off
+    # prompts; chats follow SessionManager expiry and keep a bounded history
+    CHAT_SESSIONS = os.getenv("ECOLEARN_CHAT_SESSIONS", "0") == "1"
+    CHAT_POOL_SIZE = 1000  # Learner sessions holding chats at once
+    CHAT_HISTORY_TURNS = 4  # Exchanges each chat resends with a message
     # Agent Configuration
     MAX_ASSESSMENT_QUESTIONS = 5
     LEARNING_SESSION_TIMEOUT = 300  # 5 minutes
+    MAX_INPUT_CHARS = 2000  # Longer pastes are truncated before prompt building
+    STREAM_ASSESSMENT = True  # Return the follow-up question before the response ends
+    BATCH_MAX_CONCURRENCY = 8  # Topics generated at once in classroom batch mode
+    # Learning sections still running this long after a turn starts are deferred
+    # to the next turn; 0 waits for all of them
+    LEARNING_SLO_SECONDS = float(os.getenv("ECOLEARN_LEARNING_SLO_SECONDS", "10"))
+    # Sections generated with every learning turn; the others are offered and
+    # only generated when the learner asks for them ("examples", "visual")
+    EAGER_SECTIONS = tuple(
+        name.strip()
+        for name in os.getenv(
+            "ECOLEARN_EAGER_SECTIONS", "explanation,examples,visual_suggestion"
+        ).split(",")
+        if name.strip()
+    )
 
     # Memory Configuration
     SESSION_EXPIRY_HOURS = 24
+    MAX_SESSION_INTERACTIONS = 50  # Older turns are compacted into a summary
+    # Sessions idle this long move to the compressed cold tier; 0 keeps all hot
+    COLD_AFTER_SECONDS = float(os.getenv("ECOLEARN_COLD_AFTER_SECONDS", "600"))
+    COLD_STORE_CODEC = os.getenv("ECOLEARN_COLD_STORE_CODEC", "zlib")  # or lzma
+    COLD_STORE_DIR = os.getenv("ECOLEARN_COLD_STORE_DIR", "")  # Unset: in memory
+    # Seconds a sampled bytes-per-session estimate is reused by stats()
+    SESSION_SIZE_REFRESH_SECONDS = 60.0
     MAX_CONTEXT_LENGTH = 4000
 
     # External APIs
     OPENWEATHER_API = os.getenv("OPENWEATHER_API_KEY", "")
     WIKIPEDIA_API = "https://en.wikipedia.org/api/rest_v1/page/summary/"
+    OPENWEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+    # Look up references online when the knowledge base has nothing on a topic
+    FETCH_REFERENCES = os.getenv("ECOLEARN_FETCH_REFERENCES", "0") == "1"
+    HTTP_CACHE_DIR = os.getenv(
+        "ECOLEARN_HTTP_CACHE", os.path.join(PROJECT_ROOT, "data", "http_cache")
+    )
+    HTTP_MAX_CONNECTIONS = 20
+    HTTP_MAX_PER_HOST = 4
+    HTTP_TIMEOUT_SECONDS = 10
+
+    # Offline knowledge base, built with src/knowledge/ingest.py
+    KNOWLEDGE_BASE_PATH = os.getenv(
+        "ECOLEARN_KB_PATH", os.path.join(PROJECT_ROOT, "data", "knowledge_base")
+    )
+    KB_TOP_K = 3  # Passages sent with each prompt
+    KB_PASSAGE_WORDS = 120
+    # Topic prerequisites used to order personalized learning paths
+    TOPIC_GRAPH_PATH = os.getenv(
+        "ECOLEARN_TOPIC_GRAPH", os.path.join(PROJECT_ROOT, "data", "topic_graph.json")
+    )
+    # Topics a learning path is padded up to; a learner's interests and their
+    # prerequisites are always included, so a path can be longer
+    LEARNING_PATH_LENGTH = 5
+    # Assessment ends early once level and interests are both this certain;
+    # above 1 always runs every step
+    ASSESSMENT_CONFIDENCE = float(os.getenv("ECOLEARN_ASSESSMENT_CONFIDENCE", "0.8"))
+    # Branching assessment questions picked locally, grown with
+    # src/knowledge/question_bank.py; empty sends every answer to the model
+    QUESTION_BANK_PATH = os.getenv(
+        "ECOLEARN_QUESTION_BANK",
+        os.path.join(PROJECT_ROOT, "data", "question_bank.json"),
+    )
+
+    # Append-only turn log, replayed into sessions at startup; unset disables it
+    EVENT_LOG_DIR = os.getenv("ECOLEARN_EVENT_LOG_DIR", "")
+    EVENT_LOG_SEGMENT_BYTES = 64 * 1024 * 1024
+    EVENT_LOG_FSYNC_EVERY = 64  # Events per fsync
+    EVENT_LOG_FSYNC_SECONDS = 1.0  # Also fsync once this old, while turns arrive
+
+    # Warm-restart snapshot of sessions, router and analytics; unset disables it
+    SNAPSHOT_PATH = os.getenv("ECOLEARN_SNAPSHOT_PATH", "")
+    SNAPSHOT_INTERVAL_SECONDS = 300
+    # Set inside each WorkerPool process, which then keeps its own snapshot
+    WORKER_INDEX: Optional[int] = None
+
+    # tracemalloc report every N turns (top allocation sites, bytes per
+    # session); 0 disables it, since tracing slows every allocation
+    MEMORY_PROFILE_EVERY = int(os.getenv("ECOLEARN_MEMORY_PROFILE_EVERY", "0"))
+    MEMORY_PROFILE_TOP = 10
 
     @classmethod
     def get_available_model(cls):
         """Get the first available model"""
-        import google.generativeai as genai
+        from utils.gemini import get_genai
 
-        genai.configure(api_key=cls.GEMINI_API_KEY)
+        genai = get_genai(cls.GEMINI_API_KEY)
 
         for model_name in cls.AVAILABLE_MODELS:
             try:
@@ -49,6 +129,24 @@ class Config:
             "No available Gemini models found. Please check your API key and model availability."
         )
 
+    @classmethod
+    def discover_models(cls) -> List[str]:
+        """Record which models this key can generate with, for the model router"""
+        from utils.gemini import get_genai
+
+        genai = get_genai(cls.GEMINI_API_KEY)
+
+        try:
+            cls.DISCOVERED_MODELS = [
+                model.name
+                for model in genai.list_models()
+                if "generateContent" in model.supported_generation_methods
+            ]
+        except Exception as e:
+            print(f"Model discovery failed, routing to {cls.GEMINI_MODEL} only: {e}")
+            cls.DISCOVERED_MODELS = []
+        return cls.DISCOVERED_MODELS
+
     @classmethod
     def validate_config(cls) -> bool:
         """Validate essential configuration"""
@@ -57,4 +155,5 @@ class Config:
 
         # Test the API key and get available model
         cls.GEMINI_MODEL = cls.get_available_model()
+        cls.discover_models()
         return True
@@ -1,10 +1,10 @@
 import os
-from typing import Any, Dict
+from typing import Any, Dict, List
 
-import google.generativeai as genai
-from dotenv import load_dotenv
+from utils.env import load_env
+from utils.gemini import get_genai
 
-load_dotenv()
+load_env()
 
 
 class Config:
@@ -12,6 +12,7 @@ class Config:
 
     # Gemini API Configuration
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    DISCOVERED_MODELS: List[str] = []
 
     @classmethod
     def get_available_model(cls):
@@ -19,7 +20,7 @@ class Config:
         if not cls.GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY environment variable is required")
 
-        genai.configure(api_key=cls.GEMINI_API_KEY)
+        genai = get_genai(cls.GEMINI_API_KEY)
 
         # Try to read from cached working model
         try:
@@ -49,6 +50,9 @@ class Config:
         if not available_models:
             raise ValueError("No Gemini models available for content generation")
 
+        # Keep the full list so the model router can pick per-tier models
+        cls.DISCOVERED_MODELS = available_models
+
         # Try each available model
         for model_name in available_models:
             try:
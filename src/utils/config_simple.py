@@ -1,13 +1,10 @@
 import os
+from typing import List
 
-import google.generativeai as genai
-from dotenv import load_dotenv
+from utils.env import load_env
+from utils.gemini import get_genai
 
-# Load .env from project root (one level up from src)
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(current_dir)
-env_path = os.path.join(project_root, ".env")
-load_dotenv(env_path)
+load_env()
 
 
 class Config:
@@ -18,6 +15,8 @@ class Config:
 
     # Use gemini-2.0-flash which is available
     GEMINI_MODEL = "gemini-2.0-flash"
+    # Filled by discover_models() during validate_config()
+    DISCOVERED_MODELS: List[str] = []
 
     # Agent Configuration
     MAX_ASSESSMENT_QUESTIONS = 5
@@ -27,6 +26,20 @@ class Config:
     SESSION_EXPIRY_HOURS = 24
     MAX_CONTEXT_LENGTH = 4000
 
+    @classmethod
+    def discover_models(cls) -> List[str]:
+        """Record which models this key can generate with, for the model router"""
+        try:
+            cls.DISCOVERED_MODELS = [
+                model.name
+                for model in get_genai(cls.GEMINI_API_KEY).list_models()
+                if "generateContent" in model.supported_generation_methods
+            ]
+        except Exception as e:
+            print(f"Model discovery failed, routing to {cls.GEMINI_MODEL} only: {e}")
+            cls.DISCOVERED_MODELS = []
+        return cls.DISCOVERED_MODELS
+
     @classmethod
     def validate_config(cls) -> bool:
         """Validate essential configuration"""
@@ -35,14 +48,16 @@ class Config:
                 "GEMINI_API_KEY environment variable is required. Check your .env file"
             )
 
-        # Configure Gemini with the API key
-        genai.configure(api_key=cls.GEMINI_API_KEY)
+        # Configure Gemini with the API key (first import of the SDK)
+        genai = get_genai(cls.GEMINI_API_KEY)
 
         # Test the configuration
         try:
             model = genai.GenerativeModel(cls.GEMINI_MODEL)
             response = model.generate_content("Test")
             print(f"API configuration successful using {cls.GEMINI_MODEL}")
-            return True
         except Exception as e:
             raise ValueError(f"API configuration failed: {str(e)}")
+
+        cls.discover_models()
+        return True
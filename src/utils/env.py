@@ -0,0 +1,21 @@
+import os
+from typing import Optional
+
+# Repository root (two levels up from this file)
+PROJECT_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+_loaded = False
+
+
+def load_env(path: Optional[str] = None):
+    """Parse the project's .env into os.environ, once per process"""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+
+    from dotenv import load_dotenv
+
+    load_dotenv(path or os.path.join(PROJECT_ROOT, ".env"))
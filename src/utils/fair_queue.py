@@ -0,0 +1,227 @@
+import asyncio
+import time
+from array import array
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+DEFAULT_TENANT = "default"
+WAIT_SAMPLES = 1000  # Recent queue waits kept per tenant for percentiles
+
+DEFAULT_FAIRNESS: Dict[str, Any] = {
+    # Model calls in flight across all tenants
+    "max_concurrency": 8,
+    # Queue wait each tenant is promised; stats report the share within it
+    "queue_slo_seconds": 1.0,
+    # Limits for tenants not listed below; null means uncapped
+    "default_tenant": {"weight": 1.0, "max_concurrency": 4, "rate_per_second": None},
+    "tenants": {},
+}
+
+
+def tenant_of(session: Optional[Dict[str, Any]]) -> str:
+    """Tenant from session["tenant"], else the "school:" prefix of the session id"""
+    if not session:
+        return DEFAULT_TENANT
+    if session.get("tenant"):
+        return session["tenant"]
+    session_id = session.get("session_id", "")
+    return session_id.split(":", 1)[0] if ":" in session_id else DEFAULT_TENANT
+
+
+class _Tenant:
+    def __init__(self, name: str, limits: Dict[str, Any]):
+        self.name = name
+        self.weight = float(limits.get("weight") or 1.0)
+        self.max_concurrency = limits.get("max_concurrency")
+        self.rate = limits.get("rate_per_second")
+        self.burst = float(limits.get("burst") or max(1.0, self.rate or 1.0))
+        self.tokens = self.burst
+        self.refilled_at = time.monotonic()
+
+        self.inflight = 0
+        self.finish_tag = 0.0
+        # session_id -> waiters; sessions take turns so one user can't hog
+        self.sessions: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.waiting = 0
+        self.granted = 0
+        self.rate_limited = 0
+        # Preallocated ring of recent waits: steady memory from the first call
+        self.waits = array("d", [0.0]) * WAIT_SAMPLES
+        self.wait_count = 0
+
+    def refill(self, now: float):
+        if self.rate:
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.refilled_at) * self.rate
+            )
+        self.refilled_at = now
+
+    def seconds_until_token(self) -> float:
+        return (1.0 - self.tokens) / self.rate if self.rate else 0.0
+
+    def record_wait(self, seconds: float):
+        self.waits[self.wait_count % WAIT_SAMPLES] = seconds
+        self.wait_count += 1
+
+    def recent_waits(self) -> List[float]:
+        return sorted(self.waits[: min(self.wait_count, WAIT_SAMPLES)])
+
+    def under_cap(self) -> bool:
+        return self.max_concurrency is None or self.inflight < self.max_concurrency
+
+
+class FairScheduler:
+    """Weighted fair queuing of model calls by tenant, round-robin by session"""
+
+    def __init__(self, fairness: Optional[Dict[str, Any]] = None):
+        fairness = {**DEFAULT_FAIRNESS, **(fairness or {})}
+        self.max_concurrency = fairness["max_concurrency"]
+        self.queue_slo_seconds = fairness["queue_slo_seconds"]
+        self.default_limits = fairness["default_tenant"]
+        self.tenant_limits = fairness["tenants"]
+        self.tenants: Dict[str, _Tenant] = {}
+        self.inflight = 0
+        self.virtual_time = 0.0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+    async def acquire(self, tenant_name: str, session_id: str = "") -> float:
+        """Wait for a slot; returns the seconds spent queued"""
+        tenant = self._tenant(tenant_name)
+        start = time.monotonic()
+        if not self._backlogged() and self._eligible(tenant, start):
+            self._grant(tenant)
+            tenant.record_wait(0.0)
+            return 0.0
+
+        if tenant.rate and tenant.tokens < 1.0:
+            tenant.rate_limited += 1
+        waiter = asyncio.get_running_loop().create_future()
+        tenant.sessions.setdefault(session_id, deque()).append(waiter)
+        tenant.waiting += 1
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the caller gave up: hand the slot back
+                self.release(tenant_name)
+            else:
+                self._forget(tenant, session_id, waiter)
+            raise
+        waited = time.monotonic() - start
+        tenant.record_wait(waited)
+        return waited
+
+    def release(self, tenant_name: str):
+        tenant = self.tenants[tenant_name]
+        tenant.inflight -= 1
+        self.inflight -= 1
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-tenant queue depth and wait percentiles against the queue SLO"""
+        tenants = {}
+        for name, tenant in self.tenants.items():
+            waits = tenant.recent_waits()
+            entry = {
+                "weight": tenant.weight,
+                "inflight": tenant.inflight,
+                "queued": tenant.waiting,
+                "granted": tenant.granted,
+                "rate_limited": tenant.rate_limited,
+            }
+            if waits:
+                entry.update(
+                    {
+                        "wait_p50_ms": round(waits[len(waits) // 2] * 1e3, 2),
+                        "wait_p95_ms": round(waits[int(len(waits) * 0.95)] * 1e3, 2),
+                        "wait_max_ms": round(waits[-1] * 1e3, 2),
+                        "within_slo": round(
+                            sum(wait <= self.queue_slo_seconds for wait in waits)
+                            / len(waits),
+                            4,
+                        ),
+                    }
+                )
+            tenants[name] = entry
+        return {
+            "inflight": self.inflight,
+            "max_concurrency": self.max_concurrency,
+            "queue_slo_seconds": self.queue_slo_seconds,
+            "tenants": tenants,
+        }
+
+    def _tenant(self, name: str) -> _Tenant:
+        tenant = self.tenants.get(name)
+        if tenant is None:
+            limits = {**self.default_limits, **self.tenant_limits.get(name, {})}
+            tenant = self.tenants[name] = _Tenant(name, limits)
+        return tenant
+
+    def _backlogged(self) -> bool:
+        return any(tenant.waiting for tenant in self.tenants.values())
+
+    def _eligible(self, tenant: _Tenant, now: float) -> bool:
+        if self.inflight >= self.max_concurrency or not tenant.under_cap():
+            return False
+        tenant.refill(now)
+        return tenant.tokens >= 1.0 or not tenant.rate
+
+    def _grant(self, tenant: _Tenant):
+        # Start-time fair queuing: the tenant's next call finishes 1/weight later
+        start = max(self.virtual_time, tenant.finish_tag)
+        self.virtual_time = start
+        tenant.finish_tag = start + 1.0 / tenant.weight
+        if tenant.rate:
+            tenant.tokens -= 1.0
+        tenant.inflight += 1
+        tenant.granted += 1
+        self.inflight += 1
+
+    def _dispatch(self):
+        now = time.monotonic()
+        retry_after = None
+        while self.inflight < self.max_concurrency:
+            best = None
+            for tenant in self.tenants.values():
+                if not tenant.waiting or not tenant.under_cap():
+                    continue
+                if not self._eligible(tenant, now):
+                    wait = tenant.seconds_until_token()
+                    retry_after = (
+                        wait if retry_after is None else min(retry_after, wait)
+                    )
+                    continue
+                tag = max(self.virtual_time, tenant.finish_tag)
+                if best is None or tag < best[0]:
+                    best = (tag, tenant)
+            if best is None:
+                break
+            self._wake_next(best[1])
+
+        if retry_after is not None and self._wakeup is None:
+            self._wakeup = asyncio.get_running_loop().call_later(
+                retry_after, self._on_wakeup
+            )
+
+    def _wake_next(self, tenant: _Tenant):
+        session_id, waiters = next(iter(tenant.sessions.items()))
+        waiter = waiters.popleft()
+        tenant.sessions.pop(session_id)
+        if waiters:
+            tenant.sessions[session_id] = waiters  # To the back of the rotation
+        tenant.waiting -= 1
+        self._grant(tenant)
+        waiter.set_result(None)
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
+
+    def _forget(self, tenant: _Tenant, session_id: str, waiter: asyncio.Future):
+        waiters = tenant.sessions.get(session_id)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            tenant.waiting -= 1
+            if not waiters:
+                del tenant.sessions[session_id]
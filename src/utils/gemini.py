@@ -0,0 +1,24 @@
+import os
+from typing import Any, Optional
+
+from utils.env import load_env
+
+_configured_key: Optional[str] = None
+
+
+def get_genai(api_key: Optional[str] = None) -> Any:
+    """google.generativeai, imported and configured on first use
+
+    The SDK takes most of a cold start to import, so nothing on the CLI's
+    import path loads it at module level.
+    """
+    global _configured_key
+    import google.generativeai as genai
+
+    if api_key is None:
+        load_env()
+        api_key = os.getenv("GEMINI_API_KEY")
+    if api_key != _configured_key:
+        genai.configure(api_key=api_key)
+        _configured_key = api_key
+    return genai
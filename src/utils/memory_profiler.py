@@ -0,0 +1,151 @@
+import itertools
+import sys
+import tracemalloc
+from typing import Any, Dict, Optional
+
+from utils.config import Config
+
+# Allocations made by the import system and tracemalloc itself are noise here
+IGNORED_FILES = (
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+    tracemalloc.__file__,
+)
+SESSION_SAMPLE = 200  # Sessions measured per report; the total is extrapolated
+
+
+def deep_size(obj: Any) -> int:
+    """Approximate bytes reachable from obj through dicts, lists, tuples and sets"""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return total
+
+
+def session_sizes(sessions: Dict[str, Dict]) -> Dict[str, Any]:
+    """Bytes per session, and per session field, estimated from a sample"""
+    sample = list(itertools.islice(sessions.values(), SESSION_SAMPLE))
+    if not sample:
+        return {"count": 0}
+    sizes = [deep_size(session) for session in sample]
+    by_field: Dict[str, int] = {}
+    for session in sample:
+        for key, value in session.items():
+            by_field[key] = by_field.get(key, 0) + deep_size(value)
+    mean = sum(sizes) / len(sizes)
+    return {
+        "count": len(sessions),
+        "sampled": len(sample),
+        "mean_bytes": round(mean),
+        "max_bytes": max(sizes),
+        "estimated_total_bytes": round(mean * len(sessions)),
+        "mean_bytes_by_field": {
+            key: round(total / len(sample))
+            for key, total in sorted(by_field.items(), key=lambda kv: -kv[1])
+        },
+    }
+
+
+class MemoryProfiler:
+    """tracemalloc reports every N turns: top allocation sites and session sizes"""
+
+    def __init__(
+        self, every: Optional[int] = None, top: Optional[int] = None, frames: int = 1
+    ):
+        self.every = every or Config.MEMORY_PROFILE_EVERY
+        self.top = top or Config.MEMORY_PROFILE_TOP
+        self.turns = 0
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start(frames)
+
+    def on_turn(self, session_manager) -> Optional[Dict[str, Any]]:
+        """Count a turn; every N turns take a snapshot and print a report"""
+        self.turns += 1
+        if self.turns % self.every:
+            return None
+        report = self.report(session_manager)
+        print(self.format(report))
+        return report
+
+    def report(self, session_manager=None) -> Dict[str, Any]:
+        """Top allocation sites (growth since the last report) and session sizes"""
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in IGNORED_FILES]
+        )
+        if self._previous is None:
+            stats = snapshot.statistics("lineno")
+        else:
+            stats = snapshot.compare_to(self._previous, "lineno")
+        self._previous = snapshot
+
+        current, peak = tracemalloc.get_traced_memory()
+        report = {
+            "turn": self.turns,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top_sites": [
+                {
+                    "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "bytes": stat.size,
+                    "growth_bytes": getattr(stat, "size_diff", stat.size),
+                    "blocks": stat.count,
+                }
+                for stat in stats[: self.top]
+            ],
+        }
+        if session_manager is not None:
+            report["sessions"] = session_sizes(session_manager.sessions)
+        self.last_report = report
+        return report
+
+    def format(self, report: Dict[str, Any]) -> str:
+        lines = [
+            f"Memory at turn {report['turn']}: "
+            f"{report['traced_bytes'] / 1024:.0f} KiB traced, "
+            f"peak {report['peak_bytes'] / 1024:.0f} KiB"
+        ]
+        sessions = report.get("sessions", {})
+        if sessions.get("count"):
+            lines.append(
+                f"  {sessions['count']} sessions, ~{sessions['mean_bytes']} bytes each "
+                f"(max {sessions['max_bytes']})"
+            )
+        for site in report["top_sites"]:
+            lines.append(
+                f"  {site['site']}: {site['bytes'] / 1024:.1f} KiB "
+                f"({site['growth_bytes'] / 1024:+.1f} KiB, {site['blocks']} blocks)"
+            )
+        return "\n".join(lines)
+
+    def close(self):
+        if self._started and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._previous = None
+
+
+_shared: Optional[MemoryProfiler] = None
+
+
+def get_memory_profiler() -> Optional[MemoryProfiler]:
+    """Process-wide profiler, or None unless ECOLEARN_MEMORY_PROFILE_EVERY is set"""
+    global _shared
+    if Config.MEMORY_PROFILE_EVERY <= 0:
+        return None
+    if _shared is None:
+        _shared = MemoryProfiler()
+    return _shared
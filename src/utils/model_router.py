@@ -0,0 +1,287 @@
+import copy
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.chat_pool import ChatPool
+from utils.config import Config
+from utils.fair_queue import DEFAULT_FAIRNESS, FairScheduler, tenant_of
+
+# Placeholder in tier model lists for the configured Config.GEMINI_MODEL
+DEFAULT_MODEL = "default"
+
+DEFAULT_POLICY: Dict[str, Any] = {
+    "ewma_alpha": 0.3,
+    # Seconds before a model skipped for breaking its SLO gets a probe request
+    "probe_after_seconds": 60,
+    "tiers": {
+        "fast": {
+            # Only used when model discovery reports them as available
+            "prefer_if_available": ["gemini-2.0-flash-lite", "gemini-2.0-flash"],
+            "models": [DEFAULT_MODEL],
+            "slo_seconds": 3.0,
+        },
+        "standard": {
+            "models": [DEFAULT_MODEL],
+            "slo_seconds": 8.0,
+            "fallback": "fast",
+        },
+    },
+    # Every route the agents call must be listed; unknown routes raise. No
+    # max_output_tokens by default: thinking models spend part of the budget
+    # before answering and come back empty (finish_reason MAX_TOKENS). Add
+    # generation_config per route in the policy file to cap output.
+    "routes": {
+        "explanation": {"tier": "standard"},
+        "examples": {"tier": "standard"},
+        "visual_suggestion": {"tier": "fast"},
+        "general_environmental_knowledge": {"tier": "fast"},
+        "specific_interests": {"tier": "standard"},
+        "current_understanding": {"tier": "fast"},
+        "motivation_level": {"tier": "fast"},
+    },
+    # Weighted fair queuing of calls by tenant and session, with per-tenant
+    # concurrency and rate caps; see utils.fair_queue
+    "fairness": DEFAULT_FAIRNESS,
+}
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_policy(path: Optional[str] = None) -> Dict[str, Any]:
+    """Default policy, overridden by the JSON file in ECOLEARN_MODEL_POLICY if set"""
+    path = path or Config.MODEL_POLICY_PATH
+    if not path:
+        return copy.deepcopy(DEFAULT_POLICY)
+
+    with open(path, "r") as f:
+        return _merge(DEFAULT_POLICY, json.load(f))
+
+
+class ModelRouter:
+    """Picks a model and generation config per content type, steered by EWMA latency"""
+
+    def __init__(
+        self,
+        default_model: Optional[str] = None,
+        available_models: Optional[Iterable[str]] = None,
+        policy: Optional[Dict[str, Any]] = None,
+        model_factory: Optional[Callable[[str], Any]] = None,
+        chat_pool: Optional[ChatPool] = None,
+    ):
+        self.default_model = default_model or Config.GEMINI_MODEL
+        self.policy = policy or load_policy()
+        self.model_factory = model_factory or self._create_model
+        self.available_models = (
+            {self._short_name(name) for name in available_models}
+            if available_models
+            else None
+        )
+
+        self.latency: Dict[str, float] = {}
+        self.samples: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.last_sample: Dict[str, float] = {}
+        # Streamed calls return after the first chunk, so their latency is kept
+        # apart and never compared against the full-response SLOs
+        self.first_chunk_latency: Dict[str, float] = {}
+        self.fallbacks = 0
+        self._models: Dict[str, Any] = {}
+        self.scheduler = FairScheduler(self.policy.get("fairness"))
+        # Per-learner model chats, when enabled, instead of one-off prompts
+        if chat_pool is None and Config.CHAT_SESSIONS:
+            chat_pool = ChatPool()
+        self.chats = chat_pool
+
+    def select(self, route: str) -> Tuple[str, Dict[str, Any]]:
+        """Model name and generation config for a content type or assessment step"""
+        candidates = self._candidates(route)
+        return candidates[0], self._route(route).get("generation_config", {})
+
+    async def generate(
+        self, route: str, prompt: str, session: Optional[Dict] = None, **kwargs
+    ) -> Any:
+        """Call the model once the session's tenant gets its fair share of a slot"""
+        tenant = tenant_of(session)
+        session_id = (session or {}).get("session_id", "")
+        await self.scheduler.acquire(tenant, session_id)
+        try:
+            return await self._generate(route, prompt, session_id, **kwargs)
+        finally:
+            self.scheduler.release(tenant)
+
+    async def _generate(
+        self, route: str, prompt: str, session_id: str = "", **kwargs
+    ) -> Any:
+        """Call the selected model, falling through to the next candidate on error"""
+        generation_config = self._route(route).get("generation_config", {})
+        candidates = self._candidates(route)[:2]
+        if candidates[0] not in self._tier_models(self._tier(route))[:1]:
+            self.fallbacks += 1
+
+        for attempt, model_name in enumerate(candidates):
+            model = self.get_model(model_name)
+            start = time.perf_counter()
+            try:
+                if self.chats is not None and session_id:
+                    chat = self.chats.chat_for(session_id, route, model_name, model)
+                    response = await chat.send_message_async(
+                        prompt, generation_config=generation_config or None, **kwargs
+                    )
+                else:
+                    response = await model.generate_content_async(
+                        prompt, generation_config=generation_config or None, **kwargs
+                    )
+            except Exception:
+                self.errors[model_name] = self.errors.get(model_name, 0) + 1
+                # Count a failure as a badly missed SLO so it gets skipped for a while
+                self.record(model_name, 2 * self._tier(route).get("slo_seconds", 10.0))
+                if attempt == len(candidates) - 1:
+                    raise
+                continue
+
+            self.record(
+                model_name, time.perf_counter() - start, streamed=kwargs.get("stream")
+            )
+            return response
+
+    def get_model(self, model_name: str) -> Any:
+        if model_name not in self._models:
+            self._models[model_name] = self.model_factory(model_name)
+        return self._models[model_name]
+
+    def record(self, model_name: str, seconds: float, streamed: bool = False):
+        """Fold one latency sample into the model's EWMA"""
+        if streamed:
+            self._fold(self.first_chunk_latency, model_name, seconds)
+            return
+
+        self._fold(self.latency, model_name, seconds)
+        self.samples[model_name] = self.samples.get(model_name, 0) + 1
+        self.last_sample[model_name] = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "models": {
+                name: {
+                    "ewma_seconds": round(self.latency[name], 4),
+                    "samples": self.samples.get(name, 0),
+                    "errors": self.errors.get(name, 0),
+                }
+                for name in self.latency
+            },
+            "first_chunk_ewma_seconds": {
+                name: round(seconds, 4)
+                for name, seconds in self.first_chunk_latency.items()
+            },
+            "fallbacks": self.fallbacks,
+            "queues": self.scheduler.stats(),
+            "chats": self.chats.stats() if self.chats is not None else None,
+        }
+
+    def state(self) -> Dict[str, Any]:
+        """Learned latency and discovery state, for snapshots"""
+        return {
+            "latency": self.latency,
+            "samples": self.samples,
+            "errors": self.errors,
+            "first_chunk_latency": self.first_chunk_latency,
+            "fallbacks": self.fallbacks,
+            "available_models": (
+                sorted(self.available_models)
+                if self.available_models is not None
+                else None
+            ),
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        """Resume from a snapshot, keeping models discovered in this run"""
+        self.latency = dict(state["latency"])
+        self.samples = dict(state["samples"])
+        self.errors = dict(state["errors"])
+        self.first_chunk_latency = dict(state["first_chunk_latency"])
+        self.fallbacks = state["fallbacks"]
+        # Monotonic times don't survive a restart; slow models may be probed now
+        self.last_sample = {}
+        if self.available_models is None and state["available_models"]:
+            self.available_models = set(state["available_models"])
+
+    def _candidates(self, route: str) -> List[str]:
+        """Models to try, healthy ones first, following tier fallbacks"""
+        tiers = self.policy["tiers"]
+        tier_name = self._route(route).get("tier", "standard")
+        healthy: List[str] = []
+        slow: List[str] = []
+        seen = set()
+
+        while tier_name in tiers and tier_name not in seen:
+            seen.add(tier_name)
+            tier = tiers[tier_name]
+            for model_name in self._tier_models(tier):
+                if model_name in healthy or model_name in slow:
+                    continue
+                if self._within_slo(model_name, tier["slo_seconds"]):
+                    healthy.append(model_name)
+                else:
+                    slow.append(model_name)
+            tier_name = tier.get("fallback")
+
+        slow.sort(key=lambda name: self.latency.get(name, 0.0))
+        return (healthy + slow) or [self.default_model]
+
+    def _tier_models(self, tier: Dict[str, Any]) -> List[str]:
+        preferred = [
+            name
+            for name in tier.get("prefer_if_available", [])
+            if self.available_models is not None and name in self.available_models
+        ]
+        models: List[str] = []
+        for name in preferred + tier.get("models", []):
+            name = self.default_model if name == DEFAULT_MODEL else name
+            if name not in models:
+                models.append(name)
+        return models
+
+    def _within_slo(self, model_name: str, slo_seconds: float) -> bool:
+        if model_name not in self.latency:
+            return True
+        if self.latency[model_name] <= slo_seconds:
+            return True
+        # Let a slow model back in occasionally so it can show it recovered
+        since = time.monotonic() - self.last_sample.get(model_name, 0.0)
+        return since >= self.policy["probe_after_seconds"]
+
+    def _tier(self, route: str) -> Dict[str, Any]:
+        tier_name = self._route(route).get("tier", "standard")
+        return self.policy["tiers"].get(tier_name, {})
+
+    def _route(self, route: str) -> Dict[str, Any]:
+        try:
+            return self.policy["routes"][route]
+        except KeyError:
+            raise ValueError(f"No model route configured for '{route}'") from None
+
+    def _fold(self, table: Dict[str, float], model_name: str, seconds: float):
+        alpha = self.policy["ewma_alpha"]
+        previous = table.get(model_name)
+        table[model_name] = (
+            seconds if previous is None else alpha * seconds + (1 - alpha) * previous
+        )
+
+    @staticmethod
+    def _short_name(name: str) -> str:
+        return name.split("/", 1)[1] if name.startswith("models/") else name
+
+    @staticmethod
+    def _create_model(model_name: str) -> Any:
+        from utils.gemini import get_genai
+
+        return get_genai().GenerativeModel(model_name)
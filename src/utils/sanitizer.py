@@ -0,0 +1,180 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Pattern, Sequence
+
+from utils.config import Config
+
+# Substrings that mark pasted code or shell sessions rather than a question
+# (content agents, where a topic can be salvaged from the paste)
+CODE_INDICATORS = [
+    "def ",
+    "class ",
+    "import ",
+    "async ",
+    "await ",
+    "print(",
+    "self.",
+    "if ",
+    "for ",
+    "while ",
+    "try:",
+    "except:",
+    "with ",
+    "open(",
+    "api_key",
+    "GEMINI_API_KEY",
+    "cat >",
+    "EOF",
+    "config.py",
+    "assessment_tools.py",
+    "orchestrator.py",
+    "content_agent.py",
+]
+
+# Narrower set for assessment answers, which are free-form prose
+ASSESSMENT_CODE_INDICATORS = [
+    "def ",
+    "class ",
+    "import ",
+    "async ",
+    "await ",
+    "print(",
+    "self.",
+    "if ",
+    "for ",
+    "while ",
+]
+
+# Code-shaped fragments: line-leading keywords, call syntax and shell heredocs.
+# Two hits are needed before a turn is treated as a paste.
+CODE_SHAPE_PATTERN = re.compile(
+    r"^\s*(def |class |import |from \S+ import |async def |@\w+)|"
+    r"print\(|self\.|\bawait |cat >|<<\s*'?EOF|GEMINI_API_KEY|api_key\s*=|"
+    r"[{};]\s*$",
+    re.MULTILINE,
+)
+CODE_SHAPE_MIN_HITS = 2
+
+# Topics salvaged from a code paste, in order of preference
+TOPIC_KEYWORDS = [
+    "environment",
+    "climate",
+    "sustainable",
+    "green",
+    "energy",
+    "recycle",
+    "planet",
+    "earth",
+    "eco",
+    "conservation",
+    "pollution",
+    "biodiversity",
+    "renewable",
+    "carbon",
+    "emissions",
+    "warming",
+]
+
+DEFAULT_TOPIC = "environmental sustainability"
+
+# Request phrasing stripped when grouping learners asking about the same topic
+TOPIC_PREFIX_PATTERN = re.compile(
+    r"^(?:(?:please|can you|could you|i want to|i'd like to|i would like to)\s+)*"
+    r"(?:explain|tell me about|teach me about|teach me|learn about|what is|what are|"
+    r"what's|how does|how do|describe)?\s*(?:the |a |an )?"
+)
+NON_WORD_PATTERN = re.compile(r"[^a-z0-9' ]+")
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build a regex that matches any of the words by walking a shared-prefix trie"""
+    trie: Dict[str, Dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Dict]) -> str:
+        branches = [
+            re.escape(char) + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        pattern = (
+            branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        )
+        return f"(?:{pattern})?" if "" in node else pattern
+
+    return build(trie)
+
+
+@lru_cache(maxsize=None)
+def _indicator_pattern(indicators: Sequence[str]) -> Pattern[str]:
+    return re.compile(_trie_pattern(indicators))
+
+
+class InputSanitizer:
+    """Shared input cleaning: length cap plus single-pass code and topic matching"""
+
+    _topic_pattern = re.compile(_trie_pattern(TOPIC_KEYWORDS))
+    _topic_rank = {keyword: rank for rank, keyword in enumerate(TOPIC_KEYWORDS)}
+
+    def __init__(
+        self,
+        max_chars: Optional[int] = None,
+        extract_topic: bool = True,
+        indicators: Iterable[str] = CODE_INDICATORS,
+    ):
+        self.max_chars = Config.MAX_INPUT_CHARS if max_chars is None else max_chars
+        self.extract_topic = extract_topic
+        self._code_pattern = _indicator_pattern(tuple(indicators))
+
+    def clean(self, user_input: str) -> str:
+        """Return text safe to build a prompt from"""
+        text = self.truncate(user_input)
+
+        if self._code_pattern.search(text) is None:
+            return text.strip()
+
+        if self.extract_topic:
+            return self.find_topic(text) or DEFAULT_TOPIC
+        return DEFAULT_TOPIC
+
+    def truncate(self, user_input: str) -> str:
+        """Cap input length so oversized pastes never reach the model"""
+        if self.max_chars and len(user_input) > self.max_chars:
+            return user_input[: self.max_chars]
+        return user_input
+
+    def looks_like_code(self, user_input: str) -> bool:
+        """Stricter check on code shape, for callers that reject rather than clean"""
+        hits = 0
+        for _ in CODE_SHAPE_PATTERN.finditer(self.truncate(user_input)):
+            hits += 1
+            if hits >= CODE_SHAPE_MIN_HITS:
+                return True
+        return False
+
+    def topic_key(self, user_input: str) -> str:
+        """Normalized topic so "Explain solar power!" and "solar power" group"""
+        text = NON_WORD_PATTERN.sub(" ", self.clean(user_input).lower())
+        text = " ".join(text.split())
+        return TOPIC_PREFIX_PATTERN.sub("", text, count=1).strip() or text
+
+    def find_topic(self, text: str) -> Optional[str]:
+        """Most preferred environmental keyword present in the text"""
+        best_rank = len(TOPIC_KEYWORDS)
+        # One lower() of the capped text is far cheaper than re.IGNORECASE
+        for match in self._topic_pattern.finditer(text.lower()):
+            rank = self._topic_rank[match.group()]
+            if rank < best_rank:
+                best_rank = rank
+                if rank == 0:
+                    break
+
+        if best_rank == len(TOPIC_KEYWORDS):
+            return None
+        return TOPIC_KEYWORDS[best_rank]
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+class StubResponse:
+    """Minimal stand-in for a Gemini response"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Offline model that records prompts and answers with canned text"""
+
+    def __init__(self, text: str = "Stub answer. What would you like to explore next?"):
+        self.text = text
+        self.prompts = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return StubResponse(self.text)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return self.generate_content(prompt, **kwargs)
+
+
+@pytest.fixture
+def stub_model():
+    return StubModel()
+
+
+@pytest.fixture
+def orchestrator(monkeypatch, stub_model):
+    """Simple-variant orchestrator wired to a stub model, no API key needed"""
+    from utils.config_simple import Config
+
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(Config, "validate_config", classmethod(lambda cls: True))
+
+    from agents.orchestrator_simple import EcoLearnOrchestrator
+
+    instance = EcoLearnOrchestrator()
+    instance.model = stub_model
+    instance.model_router.model_factory = lambda model_name: stub_model
+    return instance
@@ -1,6 +1,7 @@
 import pytest
 import asyncio
 from src.agents.assessment_agent import AssessmentAgent
+from src.agents.intent_router import IntentRouter
 
 @pytest.mark.asyncio
 async def test_assessment_agent_initialization():
@@ -20,5 +21,23 @@ async def test_assessment_flow():
     assert "question" in result
     assert agent.current_step == 1
 
+def test_intent_router_rules_and_classifier():
+    """Trivial turns are classified locally, topic questions are not"""
+    router = IntentRouter()
+    assert router.classify("Hello!") == IntentRouter.GREETING
+    assert router.classify("thanks so much") == IntentRouter.GREETING
+    assert router.classify("what's my progress?") == IntentRouter.PROGRESS
+    assert router.classify("how am I doing") == IntentRouter.PROGRESS
+    assert router.classify("what is the status of ocean pollution?") is None
+    assert router.classify("show me the progress of renewable energy adoption") is None
+    assert router.classify("help") == IntentRouter.HELP
+    assert router.classify("how can I help") is None
+    assert router.classify("what can I do to help") is None
+    assert router.classify("?!?!") == IntentRouter.GARBAGE
+    assert router.classify("import os\nprint(os.getcwd())") == IntentRouter.GARBAGE
+    assert router.classify("Explain climate change") is None
+    assert router.classify("hello, what is renewable energy?") is None
+    assert router.stats()["local_turns"] == 7
+
 if __name__ == "__main__":
     pytest.main([__file__])
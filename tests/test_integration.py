@@ -0,0 +1,286 @@
+import asyncio
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_local_intents_skip_the_model(orchestrator, stub_model):
+    """Greetings, help and progress queries are answered without a model call"""
+    greeting = await orchestrator.process_user_input("hello", "s1")
+    help_reply = await orchestrator.process_user_input("help", "s1")
+    progress = await orchestrator.process_user_input("what's my progress?", "s1")
+
+    assert greeting["type"] == "greeting"
+    assert help_reply["type"] == "help"
+    assert progress["type"] == "progress_check"
+    assert progress["handled_locally"]
+    assert stub_model.prompts == []
+    assert orchestrator.current_state == "assessment"
+
+
+@pytest.mark.asyncio
+async def test_topic_turns_still_reach_the_model(orchestrator, stub_model):
+    """Real questions are routed to the agents and counted in the router stats"""
+    await orchestrator.process_user_input("hi", "s1")
+    response = await orchestrator.process_user_input(
+        "I want to learn about climate change", "s1"
+    )
+
+    assert response["type"] == "assessment_question"
+    assert len(stub_model.prompts) == 1
+    stats = orchestrator.get_stats()["intent_router"]
+    assert stats["total_turns"] == 2
+    assert stats["local_share"] == 0.5
+
+
+class _EchoOrchestrator:
+    """Picklable stand-in that reports which process served the turn"""
+
+    def __init__(self):
+        self.session_manager = type("Sessions", (), {"sessions": {}})()
+        self.background_done = False
+
+    async def process_user_input(self, user_input, session_id):
+        import asyncio
+        import os
+
+        if user_input == "crash":
+            os._exit(1)
+        if user_input == "background":
+            self._task = asyncio.create_task(self._finish_later())
+        if user_input == "background?":
+            return {"type": "echo", "done": self.background_done}
+        self.session_manager.sessions[session_id] = True
+        return {"type": "echo", "pid": os.getpid(), "message": user_input}
+
+    async def _finish_later(self):
+        import asyncio
+
+        await asyncio.sleep(0.05)
+        self.background_done = True
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_sticky_routing_and_restart():
+    """Sessions stick to one worker, crashed workers are replaced"""
+    from serving.worker_pool import WorkerPool
+
+    async with WorkerPool(2, orchestrator_factory=_EchoOrchestrator) as pool:
+        first = await pool.process_user_input("one", "learner-a")
+        second = await pool.process_user_input("two", "learner-a")
+        assert first["pid"] == second["pid"]
+
+        with pytest.raises(RuntimeError):
+            await pool.process_user_input("crash", "learner-a")
+        after = await pool.process_user_input("three", "learner-a")
+        assert after["message"] == "three"
+        assert after["pid"] != first["pid"]
+
+        # Background tasks keep running while the worker waits for requests
+        await pool.process_user_input("background", "learner-a")
+        await asyncio.sleep(0.3)
+        check = await pool.process_user_input("background?", "learner-a")
+        assert check["done"]
+
+        metrics = await pool.metrics()
+        assert metrics["totals"]["restarts"] == 1
+        assert metrics["totals"]["requests"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_batch_generates_each_topic_once(orchestrator, stub_model):
+    """A cohort asking about the same topic shares one round of content calls"""
+    for session_id in ["amy", "ben", "cat", "dan"]:
+        orchestrator.session_manager.get_session(session_id)["state"] = "learning"
+
+    batch = await orchestrator.process_batch(
+        [
+            ("amy", "Explain solar power"),
+            ("ben", "solar power?"),
+            ("cat", "What is solar power"),
+            ("dan", "composting"),
+            ("eve", "hello"),
+            ("fay", "I know a little about recycling"),
+        ],
+        max_concurrency=2,
+    )
+
+    stats = batch["stats"]
+    assert stats["unique_topics"] == 2
+    assert stats["learning_turns"] == 4
+    assert stats["calls_saved"] == 6
+    # Two topics x three content calls; the assessment answer is classified
+    # locally and its question comes from the question bank
+    assert len(stub_model.prompts) == 6
+
+    results = batch["results"]
+    assert [r["session_id"] for r in results] == [
+        "amy",
+        "ben",
+        "cat",
+        "dan",
+        "eve",
+        "fay",
+    ]
+    assert results[0]["response"]["content"] == results[1]["response"]["content"]
+    assert results[4]["response"]["type"] == "greeting"
+    assert results[5]["response"]["type"] == "assessment_question"
+    assert orchestrator.session_manager.get_session("ben")["last_interaction"] == (
+        "solar power?"
+    )
+
+
+@pytest.mark.asyncio
+async def test_batch_honours_eager_sections_and_history(
+    monkeypatch, orchestrator, stub_model
+):
+    """Batch turns generate only eager sections nobody has seen, once per topic"""
+    from utils.config import Config
+
+    monkeypatch.setattr(Config, "EAGER_SECTIONS", ("explanation", "examples"))
+    for session_id in ["amy", "ben"]:
+        orchestrator.session_manager.get_session(session_id)["state"] = "learning"
+    await orchestrator.process_user_input("Explain solar power", "amy")
+    assert len(stub_model.prompts) == 2
+
+    batch = await orchestrator.process_batch(
+        [("amy", "what is solar power?"), ("ben", "solar power")]
+    )
+    # Amy has seen both eager sections; Ben's are generated once for him
+    assert len(stub_model.prompts) == 4
+    assert batch["stats"]["sections_generated"] == 2
+    assert batch["stats"]["calls_saved"] == 4
+    amy, ben = (result["response"] for result in batch["results"])
+    assert all(section.get("repeat") for section in amy["content"])
+    assert [section["type"] for section in ben["content"]] == [
+        "explanation",
+        "examples",
+    ]
+    assert ben["available_sections"] == ["visual_suggestion"]
+    topic = orchestrator.content_agent.sanitizer.topic_key("solar power")
+    delivered = orchestrator.session_manager.get_session("ben")["delivered"]
+    assert sorted(delivered["topics"][topic]) == ["examples", "explanation"]
+
+
+@pytest.mark.asyncio
+async def test_slow_sections_are_deferred_to_the_next_turn(monkeypatch, orchestrator):
+    """Sections stream in completion order and the SLO defers slow ones"""
+    from utils.config import Config
+
+    async def slow_examples(user_input, session, previous=()):
+        await asyncio.sleep(0.3)
+        return {"type": "examples", "content": "Slow examples"}
+
+    monkeypatch.setattr(Config, "LEARNING_SLO_SECONDS", 0.1)
+    monkeypatch.setattr(orchestrator.content_agent, "generate_examples", slow_examples)
+    orchestrator.session_manager.get_session("amy")["state"] = "learning"
+
+    chunks = [
+        chunk
+        async for chunk in orchestrator.stream_user_input("Explain wind power", "amy")
+    ]
+    assert [chunk["type"] for chunk in chunks] == [
+        "explanation",
+        "visual_suggestion",
+        "learning_content",
+    ]
+    assert chunks[-1]["pending_sections"] == ["examples"]
+
+    await asyncio.sleep(0.3)
+    response = await orchestrator.process_user_input("and solar power?", "amy")
+    assert response["deferred_sections"] == [
+        {"type": "examples", "content": "Slow examples", "deferred": True}
+    ]
+    assert response["pending_sections"] == ["examples"]
+    # Late sections are indexed once served, so asking again repeats them
+    delivered = orchestrator.session_manager.get_session("amy")["delivered"]
+    assert sum("examples" in kinds for kinds in delivered["topics"].values()) == 1
+    served = await orchestrator.get_deferred_sections("amy", timeout=1)
+    assert [section["type"] for section in served] == ["examples"]
+    assert sum("examples" in kinds for kinds in delivered["topics"].values()) == 2
+
+    # Sections still running for a session that is gone are dropped
+    await orchestrator.process_user_input("what about tidal power?", "amy")
+    assert len(orchestrator.deferred_sections) == 1
+    orchestrator.session_manager.sessions.pop("amy")
+    orchestrator.housekeeping()
+    assert len(orchestrator.deferred_sections) == 0
+
+
+@pytest.mark.asyncio
+async def test_cli_input_does_not_block_the_event_loop():
+    """Other tasks keep running while the CLI waits for a line"""
+    import os
+
+    from main import AsyncInput
+
+    read_fd, write_fd = os.pipe()
+    reader = AsyncInput(os.fdopen(read_fd))
+    line = asyncio.ensure_future(reader.readline())
+
+    ticks = 0
+    for _ in range(5):
+        await asyncio.sleep(0.01)
+        ticks += 1
+    assert ticks == 5 and not line.done()
+
+    os.write(write_fd, b"hello\n")
+    os.close(write_fd)
+    assert await asyncio.wait_for(line, 1) == "hello"
+    assert await asyncio.wait_for(reader.readline(), 1) is None
+
+
+@pytest.mark.asyncio
+async def test_repeated_topics_reuse_delivered_sections(orchestrator, stub_model):
+    """A repeat is served from the session; "more examples" regenerates one section"""
+    session = orchestrator.session_manager.get_session("s1")
+    session["state"] = "learning"
+
+    first = await orchestrator.process_user_input("Explain solar power", "s1")
+    assert len(stub_model.prompts) == 3
+
+    again = await orchestrator.process_user_input("what is solar power?", "s1")
+    assert len(stub_model.prompts) == 3
+    sections = [item for item in again["content"] if item.get("repeat")]
+    assert [item["content"] for item in sections] == [
+        item["content"] for item in first["content"]
+    ]
+
+    more = await orchestrator.process_user_input("more examples", "s1")
+    assert len(stub_model.prompts) == 4
+    assert "Do not repeat these examples" in stub_model.prompts[-1]
+    assert [item["type"] for item in more["content"]][0] == "examples"
+
+    assert session["delivered"]["model_calls_saved"] == 5
+    assert orchestrator.get_stats()["model_calls_saved"] == 5
+
+
+@pytest.mark.asyncio
+async def test_lazy_sections_are_generated_on_request(
+    orchestrator, stub_model, monkeypatch
+):
+    """Only eager sections are generated; the rest wait until asked for"""
+    from utils.config import Config
+
+    monkeypatch.setattr(Config, "EAGER_SECTIONS", ("explanation",))
+    orchestrator.session_manager.get_session("s1")["state"] = "learning"
+
+    first = await orchestrator.process_user_input("Explain solar power", "s1")
+    assert len(stub_model.prompts) == 1
+    assert [item["type"] for item in first["content"]][0] == "explanation"
+    assert first["available_sections"] == ["examples", "visual_suggestion"]
+
+    examples = await orchestrator.get_section("s1", "examples")
+    assert examples["type"] == "examples" and len(stub_model.prompts) == 2
+    again = await orchestrator.get_section("s1", "examples")
+    assert again["repeat"] and len(stub_model.prompts) == 2
+
+    repeat = await orchestrator.process_user_input("what is solar power?", "s1")
+    assert len(stub_model.prompts) == 2
+    assert repeat["available_sections"] == ["visual_suggestion"]
+
+    assert orchestrator.get_stats()["lazy_sections"] == {
+        "offered": 2,
+        "requested": 1,
+        "model_calls_avoided": 1,
+    }
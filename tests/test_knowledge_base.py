@@ -0,0 +1,122 @@
+import json
+import os
+
+import pytest
+
+from knowledge.index import KnowledgeBase, tokenize
+from knowledge.ingest import chunk_document, ingest, read_corpus
+from knowledge.topic_graph import TopicGraph, get_topic_graph
+from utils.config import Config
+
+SEED_CORPUS = os.path.join(
+    os.path.dirname(__file__), "..", "data", "corpus", "environment_seed.jsonl"
+)
+
+
+@pytest.fixture
+def knowledge_base(tmp_path):
+    ingest(read_corpus(SEED_CORPUS), str(tmp_path))
+    kb = KnowledgeBase(str(tmp_path))
+    yield kb
+    kb.close()
+
+
+def test_chunking_overlaps_long_documents():
+    """Long paragraphs become overlapping passages of bounded size"""
+    text = " ".join(f"w{i}" for i in range(250))
+    passages = list(chunk_document("Doc", text, max_words=100, overlap=20))
+    assert [len(p["text"].split()) for p in passages] == [100, 100, 90]
+    assert passages[1]["text"].startswith("w80 ")
+
+
+def test_bm25_ranks_the_matching_article_first(knowledge_base):
+    """Retrieval from the memory-mapped index finds the topical passage"""
+    results = knowledge_base.search("solar panels")
+    assert results[0].title == "Solar power"
+    assert results[0].score >= results[-1].score
+    assert knowledge_base.search("zzzz unknown") == ()
+    assert tokenize("The Forests") == ["forest"]
+
+
+@pytest.mark.asyncio
+async def test_content_agent_grounds_prompts_and_falls_back(knowledge_base, stub_model):
+    """Retrieved notes go into the prompt, and are served when the model fails"""
+    from agents.content_agent import ContentAgent
+    from utils.model_router import ModelRouter
+
+    router = ModelRouter(model_factory=lambda name: stub_model)
+    agent = ContentAgent(router, knowledge_base=knowledge_base)
+    await agent.generate_explanation("composting", {})
+    assert "Composting:" in stub_model.prompts[-1]
+
+    def broken(name):
+        raise RuntimeError("model unavailable")
+
+    agent.router = ModelRouter(model_factory=broken)
+    fallback = await agent.generate_explanation("composting", {})
+    assert fallback["source"] == "Composting"
+    assert "methane" in fallback["content"]
+
+
+def _assessed(general: str, interests: str) -> dict:
+    return {
+        "assessment_data": {
+            "general_environmental_knowledge": {"answer": general},
+            "specific_interests": {"answer": interests},
+        }
+    }
+
+
+def test_learning_path_respects_prerequisites_and_interests():
+    """Paths are topological, lead to the learner's interests and are cached"""
+    graph = get_topic_graph()
+    session = _assessed("I know a little", "solar panels and electric vehicles")
+    path = graph.path_for(session)
+
+    assert graph.profile(session)[0] == "beginner"
+    assert {"Renewable Energy", "The Clean Energy Transition"} <= set(path)
+    position = {title: i for i, title in enumerate(path)}
+    for title in path:
+        topic = graph.index[graph.ids[graph.titles.index(title)]]
+        for prerequisite in graph._bits(graph.prerequisites[topic]):
+            if graph.titles[prerequisite] in position:
+                assert position[graph.titles[prerequisite]] < position[title]
+
+    advanced = graph.path_for(_assessed("I'm a researcher", "coral reefs"))
+    assert "Introduction to Environmental Science" not in advanced
+    assert advanced.index("Oceans and Marine Life") < advanced.index(
+        "Climate Impacts and Adaptation"
+    )
+
+    # The length bounds padding only: interests and prerequisites go on top
+    assert len(graph.path_for(_assessed("I know a little", "nothing yet"))) == (
+        Config.LEARNING_PATH_LENGTH
+    )
+    broad = graph.path_for(
+        _assessed("I know a little", "solar, coral reefs, recycling and forests")
+    )
+    assert len(broad) > Config.LEARNING_PATH_LENGTH
+    assert {
+        "Renewable Energy",
+        "Oceans and Marine Life",
+        "Waste, Recycling and Composting",
+        "Forests and Deforestation",
+    } <= set(broad)
+
+    hits = graph.path_for_profile.cache_info().hits
+    assert graph.path_for(_assessed("a little", "electric vehicles and solar")) == path
+    assert graph.path_for_profile.cache_info().hits == hits + 1
+
+
+def test_topic_graph_rejects_cycles(tmp_path):
+    """A prerequisite cycle is reported when the graph is compiled"""
+    path = tmp_path / "graph.json"
+    topics = [
+        {"id": "a", "title": "A", "difficulty": 1, "prerequisites": ["b"]},
+        {"id": "b", "title": "B", "difficulty": 1, "prerequisites": ["a"]},
+    ]
+    path.write_text(
+        json.dumps({"topics": [dict(t, keywords=[t["id"]]) for t in topics]})
+    )
+    with pytest.raises(ValueError, match="cycle"):
+        TopicGraph(str(path))
@@ -0,0 +1,384 @@
+import asyncio
+import os
+import random
+import sys
+import time
+
+import pytest
+
+from agents.progress_agent import ProgressAgent
+from memory.analytics import ProgressAnalytics
+from memory.cold_store import ColdStore
+from memory.event_log import EventLog, EventReader, replay
+from memory.session_locks import SessionLocks
+from memory.session_manager import SessionManager, interaction_count
+from memory.snapshot import (
+    Snapshot,
+    get_snapshotter,
+    restore_snapshot,
+    write_snapshot,
+)
+from utils.memory_profiler import MemoryProfiler
+from utils.model_router import ModelRouter
+
+
+def test_analytics_tracks_phases_and_gaps():
+    """Per-turn updates fold into the session's columns"""
+    analytics = ProgressAnalytics(capacity=2)
+    analytics.record_turn("a", "assessment", timestamp=100.0)
+    analytics.record_turn("a", "learning", "solar energy", timestamp=110.0)
+    analytics.record_turn("a", "learning", "solar energy", timestamp=130.0)
+    for i in range(3):
+        analytics.record_turn(f"s{i}", "assessment", timestamp=100.0)
+
+    summary = analytics.summary()
+    assert summary["sessions"] == 4
+    assert summary["turns"] == 6
+    assert summary["by_phase"] == {"assessment": 3, "learning": 1, "progress": 0}
+    assert summary["transitions"] == 1
+    assert analytics.mean_seconds_between_turns()[0] == pytest.approx(15.0)
+    assert analytics.topic_popularity() == [{"topic": "solar energy", "turns": 2}]
+    assert analytics.percentile_of("a") == pytest.approx(75.0)
+    assert analytics.percentile_of("missing") is None
+
+
+def test_stuck_learners_and_distribution():
+    """Vectorized queries find learners stuck in a phase"""
+    analytics = ProgressAnalytics()
+    for _ in range(9):
+        analytics.record_turn("stuck", "assessment")
+    for _ in range(12):
+        analytics.record_turn("stuck-longer", "learning")
+    for phase in ["assessment", "learning", "learning"]:
+        analytics.record_turn("moving", phase)
+
+    assert set(analytics.stuck_learners()) == {"stuck", "stuck-longer"}
+    assert analytics.stuck_learners(limit=1) == ["stuck-longer"]
+    assert analytics.stuck_learners(phases=("progress",)) == []
+
+    histogram = analytics.progress_distribution(bins=2)
+    assert histogram["counts"] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_progress_check_reports_cohort_percentile():
+    """The progress agent places a learner within the cohort"""
+    analytics = ProgressAnalytics()
+    analytics.record_turn("ahead", "learning")
+    analytics.record_turn("ahead", "learning")
+    analytics.record_turn("behind", "learning")
+
+    agent = ProgressAgent(analytics)
+    result = await agent.check_progress({"session_id": "ahead"})
+    assert result["cohort_percentile"] == 50.0
+    assert "cohort_percentile" not in await ProgressAgent().check_progress({})
+
+
+def test_event_log_rotates_and_skips_torn_tail(tmp_path):
+    """Events read back in order across segments; a torn write is dropped"""
+    log = EventLog(str(tmp_path), segment_bytes=200, fsync_every=3)
+    for i in range(10):
+        log.append({"session_id": f"s{i % 2}", "turn": i})
+    log.close()
+    assert log.stats()["segments"] > 1
+    assert log.stats()["fsyncs"] >= 4
+
+    reader = EventReader(str(tmp_path))
+    with open(reader.segments()[-1], "ab") as f:
+        f.write(b"\x40\x00\x00\x00\x00\x00\x00\x00{truncated")
+    assert [event["turn"] for event in reader] == list(range(10))
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_replays_event_log(
+    monkeypatch, tmp_path, orchestrator, stub_model
+):
+    """A restarted orchestrator rebuilds sessions from the turn log"""
+    from memory import event_log
+    from utils.config import Config
+
+    monkeypatch.setattr(Config, "EVENT_LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(event_log, "_shared", None)
+    first = type(orchestrator)()
+    first.model_router.model_factory = lambda model_name: stub_model
+    await first.process_user_input("hello", "amy")
+    await first.process_user_input("I recycle paper at home", "amy")
+    await first.close()
+
+    monkeypatch.setattr(event_log, "_shared", None)
+    restarted = type(orchestrator)()
+    session = restarted.session_manager.sessions["amy"]
+    assert session["learning_interactions"] == [
+        {"type": "user", "content": "I recycle paper at home"}
+    ]
+    assert session["assessment_step"] == 1
+    assert session["last_interaction"] == "I recycle paper at home"
+    assert restarted.analytics.summary()["turns"] == 2
+
+
+def test_snapshot_restores_sessions_lazily(tmp_path):
+    """Sessions, router latency and analytics survive a restart"""
+    path = str(tmp_path / "state.snap")
+    sessions = SessionManager()
+    for session_id in ["amy", "ben"]:
+        sessions.get_session(session_id)["state"] = "learning"
+    router = ModelRouter(default_model="model-a", available_models=["models/x"])
+    router.record("model-a", 2.5)
+    analytics = ProgressAnalytics()
+    analytics.record_turn("amy", "learning", "solar energy", timestamp=10.0)
+    stats = write_snapshot(path, sessions, router, analytics)
+    assert stats["sessions"] == 2
+
+    restored = SessionManager()
+    restored_router = ModelRouter(default_model="model-a")
+    restored_analytics = ProgressAnalytics()
+    restore_snapshot(Snapshot(path), restored, restored_router, restored_analytics)
+    assert restored.sessions == {}
+    assert restored.get_session("amy")["state"] == "learning"
+    assert list(restored.sessions) == ["amy"]
+    assert restored_router.latency == {"model-a": 2.5}
+    assert restored_router.available_models == {"x"}
+    assert restored_analytics.summary() == analytics.summary()
+    restored_analytics.record_turn("cat", "assessment")
+    assert restored_analytics.summary()["sessions"] == 2
+
+    # Untouched sessions are carried into the next snapshot without decoding
+    write_snapshot(path, restored)
+    again = SessionManager()
+    restore_snapshot(Snapshot(path), again)
+    assert again.get_session("ben")["state"] == "learning"
+    assert len(again.restored) == 2
+
+
+def test_pool_workers_keep_separate_snapshots(monkeypatch, tmp_path):
+    """Each worker writes its own file, so no worker's sessions are overwritten"""
+    from utils.config import Config
+
+    monkeypatch.setattr(Config, "SNAPSHOT_PATH", str(tmp_path / "state.snap"))
+    paths = []
+    for worker in [0, 1]:
+        monkeypatch.setattr(Config, "WORKER_INDEX", worker)
+        sessions = SessionManager()
+        sessions.get_session(f"learner-{worker}")
+        snapshotter = get_snapshotter()
+        snapshotter.save(sessions)
+        paths.append(snapshotter.path)
+    assert [os.path.basename(path) for path in paths] == [
+        "state.worker-0.snap",
+        "state.worker-1.snap",
+    ]
+    for worker, path in enumerate(paths):
+        assert list(Snapshot(path).sessions.index) == [f"learner-{worker}"]
+
+
+def test_replay_skips_events_already_in_the_snapshot(tmp_path):
+    """Only turns logged after the snapshot are replayed on top of it"""
+    now = time.time()
+    log = EventLog(str(tmp_path))
+    for timestamp, text in [(now - 20, "before"), (now - 10, "after")]:
+        log.append(
+            {
+                "timestamp": timestamp,
+                "session_id": "amy",
+                "input": text,
+                "phase": "assessment",
+            }
+        )
+    log.close()
+
+    sessions = SessionManager()
+    assert replay(str(tmp_path), sessions, since=now - 15) == 1
+    assert sessions.get_session("amy")["learning_interactions"] == [
+        {"type": "user", "content": "after"}
+    ]
+
+
+def test_compaction_and_analytics_expiry_keep_memory_bounded():
+    """Old interactions fold into a counted summary; stale analytics rows go"""
+    manager = SessionManager()
+    manager.max_interactions = 10
+    session = manager.get_session("a")
+    for i in range(25):
+        manager.log_interaction(session, {"type": "user", "content": f"q{i}"})
+    assert len(session["learning_interactions"]) <= 10
+    assert interaction_count(session) == 25
+
+    analytics = ProgressAnalytics(capacity=4)
+    analytics.record_turn("old", "learning", "solar", timestamp=100.0)
+    analytics.record_turn("new", "learning", "wind", timestamp=200.0)
+    analytics.record_turn("new", "learning", "solar", timestamp=210.0)
+    assert analytics.expire(before=150.0) == 1
+    assert analytics.summary()["sessions"] == 1
+    assert analytics.percentile_of("old") is None
+    analytics.record_turn("new", "learning", "wind", timestamp=220.0)
+    assert analytics.topics_touched[0] == 2
+
+    # Topic bitsets widen past 64 topics and compact with their rows
+    for i in range(70):
+        analytics.record_turn("new", "learning", f"topic {i}", timestamp=230.0)
+    analytics.record_turn("newer", "learning", "topic 69", timestamp=300.0)
+    analytics.record_turn("new", "learning", "topic 69", timestamp=240.0)
+    assert analytics.topics_touched[0] == 72
+    assert analytics.expire(before=250.0) == 1
+    analytics.record_turn("newer", "learning", "topic 69", timestamp=310.0)
+    analytics.record_turn("newer", "learning", "topic 0", timestamp=320.0)
+    assert analytics.topics_touched[0] == 2
+
+
+def test_memory_profiler_reports_sites_and_session_sizes():
+    """Every N turns the profiler reports allocation sites and bytes per session"""
+    manager = SessionManager()
+    for i in range(3):
+        manager.get_session(f"s{i}")["response"] = {"content": "x" * 1000}
+    profiler = MemoryProfiler(every=2, top=3)
+    try:
+        assert profiler.on_turn(manager) is None
+        report = profiler.on_turn(manager)
+    finally:
+        profiler.close()
+    assert report["turn"] == 2
+    assert len(report["top_sites"]) <= 3
+    assert report["sessions"]["count"] == 3
+    assert report["sessions"]["mean_bytes_by_field"]["response"] > 1000
+
+
+def test_soak_memory_stays_bounded():
+    """Simulated hours of traffic plateau once sessions start expiring"""
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+    try:
+        import soak
+    finally:
+        sys.path.pop(0)
+
+    # Bounded caches are still filling for a few hours after the first expiry
+    samples = soak.soak(hours=16, learners_per_hour=10, expiry_hours=2)
+    assert max(sample["sessions"] for sample in samples[3:]) <= 30
+    assert soak.growth_after_warmup(samples, warmup_hours=6) < 0.05
+
+
+@pytest.mark.parametrize("codec, on_disk", [("zlib", False), ("lzma", True)])
+def test_idle_sessions_move_to_the_cold_tier(tmp_path, codec, on_disk):
+    """Idle sessions are compressed out of the hot dict and come back on access"""
+    manager = SessionManager()
+    manager.cold = ColdStore(str(tmp_path) if on_disk else "", codec)
+    manager.cold_after = 60
+    for name in ("idle", "busy"):
+        manager.get_session(name)["preferences"] = {"topic": name * 100}
+    manager.sessions["idle"]["last_updated"] -= 120
+    manager.sessions["idle"]["last_accessed"] -= 120
+
+    assert manager.demote_idle() == 1
+    assert list(manager.sessions) == ["busy"]
+    assert "idle" in manager.cold and manager.cold.bytes > 0
+
+    # Cold sessions are carried by snapshots without being rehydrated
+    path = str(tmp_path / "snap.bin")
+    write_snapshot(path, manager)
+    restored = SessionManager()
+    restore_snapshot(Snapshot(path), restored)
+    assert restored.get_session("idle")["preferences"]["topic"] == "idle" * 100
+
+    session = manager.get_session("idle")
+    assert session["preferences"]["topic"] == "idle" * 100
+    assert "idle" not in manager.cold and manager.cold.bytes == 0
+    stats = manager.stats()
+    assert stats["hot_sessions"] == 2 and stats["rehydrated"] == 1
+    assert stats["mean_rehydrate_ms"] is not None
+    assert stats["hot_bytes_estimate"] > 0
+
+    # State that JSON can't hold fails at demotion instead of coming back as text
+    session["preferences"]["topics"] = {"solar", "wind"}
+    session["last_updated"] = session["last_accessed"] = 0
+    with pytest.raises(TypeError):
+        manager.demote_idle()
+    assert "idle" in manager.sessions and "idle" not in manager.cold
+    manager.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_turns_for_one_session_lose_nothing(
+    orchestrator, stub_model, monkeypatch
+):
+    """Simultaneous turns per session are serialized; nothing is lost or reused"""
+    from utils.config import Config
+
+    monkeypatch.setattr(Config, "ASSESSMENT_CONFIDENCE", 1.1)  # Every step runs
+    generate = stub_model.generate_content
+
+    async def jittery(prompt, **kwargs):
+        await asyncio.sleep(random.uniform(0, 0.002))
+        return generate(prompt)
+
+    monkeypatch.setattr(stub_model, "generate_content_async", jittery)
+    answers = ["we did a project at school", "my teacher mentioned it", "hmm"]
+    session_ids = [f"learner-{i}" for i in range(25)]
+    await asyncio.gather(
+        *(
+            orchestrator.process_user_input(answer, session_id)
+            for answer in answers
+            for session_id in session_ids
+        )
+    )
+
+    for session_id in session_ids:
+        session = orchestrator.session_manager.get_session(session_id)
+        assert interaction_count(session) == len(answers)
+        assert session["assessment_step"] == 3
+        assert len(session["assessment_data"]) == 3
+    locks = orchestrator.get_stats()["session_locks"]
+    assert locks["acquired"] == len(answers) * len(session_ids)
+    assert locks["contended"] > 0 and locks["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_session_locks_only_serialize_the_same_session():
+    """A busy session queues its own turns, not anyone else's, then drops its lock"""
+    locks = SessionLocks()
+    order = []
+
+    async def turn(session_id, name, seconds):
+        async with locks.hold(session_id):
+            order.append(f"{name} start")
+            await asyncio.sleep(seconds)
+            order.append(f"{name} end")
+
+    await asyncio.gather(turn("a", "a1", 0.01), turn("a", "a2", 0), turn("b", "b1", 0))
+    assert order == ["a1 start", "b1 start", "b1 end", "a1 end", "a2 start", "a2 end"]
+    assert len(locks) == 0 and locks.stats()["max_waiters"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_wedge_the_session_lock():
+    """A turn cancelled while queued is skipped and the next one still runs"""
+    locks = SessionLocks()
+    await locks.acquire("a")
+    cancelled = asyncio.ensure_future(locks.acquire("a"))
+    queued = asyncio.ensure_future(locks.acquire("a"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    locks.release("a")
+    await asyncio.wait_for(queued, 1)
+    locks.release("a")
+    assert cancelled.cancelled() and len(locks) == 0
+
+
+@pytest.mark.asyncio
+async def test_closed_streams_and_section_requests_respect_the_session_lock(
+    orchestrator,
+):
+    """A stream closed early frees its session; on-request sections wait their turn"""
+    locks = orchestrator.session_manager.locks
+    orchestrator.session_manager.get_session("amy")["state"] = "learning"
+    stream = orchestrator.stream_user_input("Explain solar power", "amy")
+    await stream.__anext__()
+    assert locks.locked("amy")
+    await stream.aclose()
+    assert not locks.locked("amy")
+
+    async with locks.hold("amy"):
+        request = asyncio.ensure_future(orchestrator.get_section("amy", "examples"))
+        await asyncio.sleep(0.01)
+        assert not request.done()
+    await asyncio.wait_for(request, 5)
+    assert len(locks) == 0
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+# Cold import of the CLI entry point; the Gemini SDK alone takes ~600 ms
+IMPORT_BUDGET_MS = float(os.getenv("ECOLEARN_IMPORT_BUDGET_MS", "400"))
+LAZY_MODULES = ["google.generativeai", "aiohttp"]
+
+
+def import_profile(module: str):
+    """Cumulative import time in ms per module, from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            profile[name.strip()] = int(cumulative) / 1000
+    return profile
+
+
+def test_cli_import_stays_within_budget():
+    """Importing main.py loads no SDKs and stays under the time budget"""
+    # Best of two, so the first run can write bytecode caches
+    profiles = [import_profile("main") for _ in range(2)]
+    profile = min(profiles, key=lambda p: p["main"])
+
+    for module in LAZY_MODULES:
+        assert module not in profile, f"{module} is imported eagerly"
+    assert (
+        profile["main"] <= IMPORT_BUDGET_MS
+    ), f"import main took {profile['main']:.0f} ms, budget {IMPORT_BUDGET_MS:.0f} ms"
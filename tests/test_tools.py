@@ -0,0 +1,453 @@
+import asyncio
+
+import pytest
+
+from tools.response_parser import StreamingQuestionParser
+from utils.fair_queue import FairScheduler
+from utils.model_router import ModelRouter, load_policy
+from utils.sanitizer import ASSESSMENT_CODE_INDICATORS, DEFAULT_TOPIC, InputSanitizer
+
+
+def test_sanitizer_passes_questions_through():
+    """Plain questions are only stripped"""
+    sanitizer = InputSanitizer()
+    assert sanitizer.clean("  What is composting?  ") == "What is composting?"
+
+
+def test_sanitizer_salvages_topic_from_code():
+    """Code pastes collapse to the most preferred environmental keyword"""
+    sanitizer = InputSanitizer()
+    paste = "import os\n# measure CARBON emissions and climate data"
+    assert sanitizer.clean(paste) == "climate"
+    assert sanitizer.clean("def run(): pass") == DEFAULT_TOPIC
+    assert InputSanitizer(extract_topic=False).clean(paste) == DEFAULT_TOPIC
+
+
+def test_sanitizer_truncates_large_pastes():
+    """Oversized input is capped before it can reach a prompt"""
+    sanitizer = InputSanitizer(max_chars=100)
+    cleaned = sanitizer.clean("water " * 1_000_000)
+    assert len(cleaned) <= 100
+    assert not sanitizer.looks_like_code("a" * 200 + "import os")
+
+
+def test_assessment_sanitizer_keeps_prose_answers():
+    """Assessment answers are only rewritten for the narrower indicator set"""
+    sanitizer = InputSanitizer(
+        extract_topic=False, indicators=ASSESSMENT_CODE_INDICATORS
+    )
+    answer = "I want to live with less plastic"
+    assert sanitizer.clean(answer) == answer
+    assert sanitizer.clean("import os") == DEFAULT_TOPIC
+    assert not sanitizer.looks_like_code("print(a) is all I know")
+    assert sanitizer.looks_like_code("import os\nprint(os.getcwd())")
+
+
+def test_streaming_parser_emits_question_once_complete():
+    """The question is emitted on the chunk that closes it, not at the end"""
+    parser = StreamingQuestionParser()
+    assert parser.feed("You seem to be a beginner.\nGreat start! What do") is None
+    assert parser.feed(" you know about compost") is None
+    assert parser.feed("ing?\nHere is more") == "What do you know about composting?"
+    assert parser.feed(" text later.") is None
+    assert parser.text.endswith("more text later.")
+    assert StreamingQuestionParser.parse("No question here.") is None
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class _GatedStreamModel:
+    """Streams a question immediately, then waits for the test to release the rest"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        return self._chunks()
+
+    async def _chunks(self):
+        yield _Chunk("Nice. Which topic interests you most?")
+        yield _Chunk("\nSome slower")
+        await self.release.wait()
+        yield _Chunk(" explanation.")
+
+
+@pytest.mark.asyncio
+async def test_assessment_returns_question_before_stream_ends():
+    """assess() returns on the question; raw_response fills in afterwards"""
+    from tools.assessment_tools import KnowledgeAssessmentTool
+
+    model = _GatedStreamModel()
+    tool = KnowledgeAssessmentTool(ModelRouter(model_factory=lambda name: model))
+
+    result = await tool.assess("I like rivers", "general_environmental_knowledge", {})
+    assert result["next_question"] == "Which topic interests you most?"
+    assert not result["raw_response_task"].done()
+
+    model.release.set()
+    raw = await result["raw_response_task"]
+    assert raw.endswith("slower explanation.")
+    assert result["raw_response"] == raw
+
+
+@pytest.mark.asyncio
+async def test_assessment_agent_stores_streamed_raw_response():
+    """The agent keeps the answer, question and late-arriving raw reply per step"""
+    from agents.assessment_agent import AssessmentAgent
+
+    model = _GatedStreamModel()
+    agent = AssessmentAgent(ModelRouter(model_factory=lambda name: model))
+    session = {"assessment_data": {}}
+
+    response = await agent.assess_knowledge("I like rivers", session)
+    record = session["assessment_data"]["general_environmental_knowledge"]
+    assert record["answer"] == "I like rivers"
+    assert record["question"] == response["question"]
+    assert not record["raw_response"].endswith("slower explanation.")
+
+    model.release.set()
+    await asyncio.gather(*agent.assessment_tool._pending_streams)
+    await asyncio.sleep(0)
+    assert record["raw_response"].endswith("slower explanation.")
+
+
+class _SlowModel:
+    async def generate_content_async(self, prompt, **kwargs):
+        await asyncio.sleep(0.02 if "rivers" in prompt else 0.01)
+        return _Chunk("Noted. What else interests you?")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_assessment_turns_keep_their_own_step(monkeypatch):
+    """Two sessions at different steps share one agent without clobbering"""
+    from agents.assessment_agent import AssessmentAgent
+    from utils.config import Config
+
+    monkeypatch.setattr(Config, "STREAM_ASSESSMENT", False)
+    agent = AssessmentAgent(ModelRouter(model_factory=lambda name: _SlowModel()))
+    ahead, fresh = {"assessment_step": 2}, {}
+
+    first, second = await asyncio.gather(
+        agent.assess_knowledge("I like rivers", ahead),
+        agent.assess_knowledge("Not much yet", fresh),
+    )
+    assert ahead["assessment_step"] == 3 and first["progress"] == "3/4"
+    assert fresh["assessment_step"] == 1 and second["progress"] == "1/4"
+
+
+class _TimedModel:
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    async def generate_content_async(self, prompt, generation_config=None, **kwargs):
+        self.calls.append((self.name, generation_config))
+        return _Chunk(self.name)
+
+
+@pytest.mark.asyncio
+async def test_model_router_falls_back_when_slo_is_broken():
+    """A tier whose EWMA latency breaks its SLO hands over to the faster tier"""
+    calls = []
+    router = ModelRouter(
+        default_model="big-model",
+        available_models=["models/big-model", "models/gemini-2.0-flash-lite"],
+        model_factory=lambda name: _TimedModel(name, calls),
+    )
+
+    await router.generate("explanation", "Explain composting")
+    assert calls[-1] == ("big-model", None)
+
+    router.record("big-model", 30.0)
+    await router.generate("explanation", "Explain composting")
+    assert calls[-1][0] == "gemini-2.0-flash-lite"
+    assert router.fallbacks == 1
+
+    await router.generate("visual_suggestion", "Draw composting")
+    assert calls[-1] == ("gemini-2.0-flash-lite", None)
+
+    with pytest.raises(ValueError):
+        await router.generate("assessment", "Which step is this?")
+
+
+@pytest.mark.asyncio
+async def test_model_router_keeps_streamed_latency_apart():
+    """Time to first chunk is tracked separately from full-response latency"""
+    calls = []
+    router = ModelRouter(
+        default_model="big-model",
+        model_factory=lambda name: _TimedModel(name, calls),
+    )
+
+    await router.generate("current_understanding", "Ask a question", stream=True)
+    assert "big-model" not in router.latency
+    assert "big-model" in router.stats()["first_chunk_ewma_seconds"]
+
+    await router.generate("motivation_level", "Ask why")
+    assert router.samples["big-model"] == 1
+
+
+class _ChatModel:
+    """Model whose chats record how much history each message carries"""
+
+    def __init__(self):
+        self.sent = []
+
+    def start_chat(self, history):
+        model = self
+
+        class Chat:
+            def __init__(self):
+                self.history = list(history)
+
+            async def send_message_async(self, prompt, **kwargs):
+                model.sent.append(len(self.history))
+                self.history += [prompt, "reply"]
+                return _Chunk("reply")
+
+        return Chat()
+
+
+@pytest.mark.asyncio
+async def test_model_router_reuses_bounded_chats_per_session():
+    """Each learner keeps a chat per route; history and pool size stay bounded"""
+    from utils.chat_pool import ChatPool
+
+    model = _ChatModel()
+    router = ModelRouter(
+        model_factory=lambda name: model,
+        chat_pool=ChatPool(max_sessions=2, history_turns=2),
+    )
+    for turn in range(6):
+        await router.generate("explanation", f"turn {turn}", {"session_id": "a"})
+    assert model.sent == [0, 2, 4, 4, 4, 4]
+
+    await router.generate("explanation", "hi", {"session_id": "b"})
+    await router.generate("examples", "hi", {"session_id": "b"})
+    await router.generate("explanation", "hi", {"session_id": "c"})
+    assert router.stats()["chats"] == {
+        "sessions": 2,
+        "created": 4,
+        "reused": 5,
+        "evicted": 1,
+    }
+
+    assert router.chats.retain({"b": {}}) == 1
+    assert len(router.chats) == 1
+
+
+@pytest.mark.asyncio
+async def test_fair_scheduler_interleaves_tenants_and_sessions():
+    """A bursting tenant can't starve another, nor one session its neighbours"""
+    scheduler = FairScheduler({"max_concurrency": 1})
+    order = []
+
+    async def call(tenant, session_id):
+        await scheduler.acquire(tenant, session_id)
+        order.append(session_id)
+        await asyncio.sleep(0)
+        scheduler.release(tenant)
+
+    calls = [("big", "big:s1")] * 3 + [("big", "big:s2"), ("small", "small:s1")]
+    await asyncio.gather(*(call(*args) for args in calls))
+    assert order == ["big:s1", "small:s1", "big:s1", "big:s2", "big:s1"]
+
+    stats = scheduler.stats()["tenants"]
+    assert stats["big"]["granted"] == 4 and stats["small"]["granted"] == 1
+    assert stats["big"]["wait_max_ms"] >= stats["big"]["wait_p50_ms"]
+    assert stats["small"]["within_slo"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_model_router_caps_concurrency_per_tenant():
+    """One school's calls queue at its cap while another school gets a slot"""
+    release = asyncio.Event()
+
+    class _HeldModel:
+        async def generate_content_async(self, prompt, **kwargs):
+            await release.wait()
+            return _Chunk("done")
+
+    router = ModelRouter(
+        default_model="big-model",
+        model_factory=lambda name: _HeldModel(),
+        policy={
+            **load_policy(),
+            "fairness": {
+                "max_concurrency": 8,
+                "default_tenant": {"max_concurrency": 2},
+            },
+        },
+    )
+    calls = [
+        asyncio.create_task(
+            router.generate("explanation", "Explain", {"session_id": f"north:{i}"})
+        )
+        for i in range(4)
+    ]
+    calls.append(
+        asyncio.create_task(
+            router.generate("explanation", "Explain", {"session_id": "south:1"})
+        )
+    )
+    await asyncio.sleep(0)
+
+    queues = router.stats()["queues"]["tenants"]
+    assert (queues["north"]["inflight"], queues["north"]["queued"]) == (2, 2)
+    assert (queues["south"]["inflight"], queues["south"]["queued"]) == (1, 0)
+
+    release.set()
+    await asyncio.gather(*calls)
+    assert router.scheduler.inflight == 0
+    assert router.stats()["queues"]["tenants"]["north"]["granted"] == 4
+
+
+class _ReferenceServer:
+    """Local stand-in for a reference API, counting hits and concurrency"""
+
+    def __init__(self):
+        self.hits = 0
+        self.active = 0
+        self.peak = 0
+
+    async def handle(self, request):
+        from aiohttp import web
+
+        self.hits += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.05)
+            if request.headers.get("If-None-Match") == '"v1"':
+                return web.Response(status=304, headers={"ETag": '"v1"'})
+            cache_control = "max-age=60" if request.path == "/fresh" else "no-cache"
+            return web.json_response(
+                {"title": request.path, "extract": "Recycling saves energy."},
+                headers={"ETag": '"v1"', "Cache-Control": cache_control},
+            )
+        finally:
+            self.active -= 1
+
+    async def __aenter__(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/{name}", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_reference_fetcher_caches_and_revalidates(tmp_path):
+    """max-age responses come from disk; ETag responses are revalidated"""
+    from tools.reference_fetcher import ReferenceFetcher
+
+    async with _ReferenceServer() as server:
+        async with ReferenceFetcher(cache_dir=str(tmp_path)) as fetcher:
+            fresh = await fetcher.get_json(server.url + "/fresh")
+            assert await fetcher.get_json(server.url + "/fresh") == fresh
+            await fetcher.get_json(server.url + "/etag")
+            await fetcher.get_json(server.url + "/etag")
+
+        # A new fetcher (e.g. after a restart) still uses the disk cache
+        async with ReferenceFetcher(cache_dir=str(tmp_path)) as fetcher:
+            await fetcher.get_json(server.url + "/fresh")
+            assert fetcher.stats()["cache_hits"] == 1
+
+    assert server.hits == 3
+    assert fetcher.stats()["requests"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reference_fetcher_dedups_and_caps_per_host(tmp_path):
+    """Identical concurrent requests share one call; one host gets N at a time"""
+    from tools.reference_fetcher import ReferenceFetcher
+
+    async with _ReferenceServer() as server:
+        async with ReferenceFetcher(cache_dir=str(tmp_path), max_per_host=2) as fetcher:
+            same = await asyncio.gather(
+                *(fetcher.get_text(server.url + "/same") for _ in range(5))
+            )
+            assert len(set(same)) == 1
+            assert fetcher.stats()["deduplicated"] == 4
+
+            await asyncio.gather(
+                *(fetcher.get_text(f"{server.url}/page{i}") for i in range(6))
+            )
+
+    assert server.hits == 7
+    assert server.peak <= 2
+
+
+@pytest.mark.asyncio
+async def test_question_bank_answers_classified_turns_locally(monkeypatch):
+    """Classified answers branch through the bank; the rest reach the model"""
+    from agents.assessment_agent import AssessmentAgent
+    from knowledge.question_bank import get_question_bank
+    from knowledge.topic_graph import get_topic_graph
+    from utils.config import Config
+
+    monkeypatch.setattr(Config, "STREAM_ASSESSMENT", False)
+    monkeypatch.setattr(Config, "ASSESSMENT_CONFIDENCE", 1.1)  # Every step
+    calls = []
+    agent = AssessmentAgent(
+        ModelRouter(model_factory=lambda name: _TimedModel(name, calls))
+    )
+    bank = get_question_bank()
+    hits = bank.hits
+    session = {"assessment_data": {}}
+
+    first = await agent.assess_knowledge("Honestly I know a little", session)
+    second = await agent.assess_knowledge("solar panels mostly", session)
+    assert calls == [] and bank.hits == hits + 2
+    questions = bank.questions
+    assert first["question"] == questions["general_environmental_knowledge"]["beginner"]
+    # Branches on both answers, not just the latest one
+    assert second["question"] == questions["specific_interests"]["beginner/energy"]
+    assert get_topic_graph().detect_level(session) == "beginner"
+
+    # Naming two categories at once is ambiguous, so the model decides
+    assert bank.classify("specific_interests", "recycling and solar") is None
+    await agent.assess_knowledge("we covered it in class", session)
+    assert len(calls) == 1
+    assert session["assessment_data"]["current_understanding"]["category"] is None
+
+
+class _LevelModel:
+    async def generate_content_async(self, prompt, **kwargs):
+        return _Chunk(
+            "Level: intermediate (confidence: 0.9)\nGood start. What do you know?"
+        )
+
+
+@pytest.mark.asyncio
+async def test_assessment_ends_once_level_and_interests_are_confident(monkeypatch):
+    """Confident level and interests skip the rest of the flow"""
+    from agents.assessment_agent import AssessmentAgent
+    from utils.config import Config
+
+    monkeypatch.setattr(Config, "STREAM_ASSESSMENT", False)
+    agent = AssessmentAgent(ModelRouter(model_factory=lambda name: _LevelModel()))
+    session = {"assessment_data": {}}
+
+    # The model rates the level; a topic named in passing is not enough yet
+    first = await agent.assess_knowledge("I read about ocean plastic a lot", session)
+    assert first["type"] == "assessment_question"
+    assert session["assessment_confidence"] == {"level": 0.9, "interests": 0.7}
+
+    second = await agent.assess_knowledge("mostly recycling", session)
+    assert second["assessment_complete"] and second["skipped_steps"] == 2
+    assert "Waste, Recycling and Composting" in second["learning_path"]
+    assert session["knowledge_level"] == "intermediate"
+    assert session["assessment_step"] == len(agent.assessment_flow)
+    assert agent.stats() == {"early_exits": 1, "steps_skipped": 2}